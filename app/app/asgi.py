@@ -3,14 +3,131 @@ ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Django 3.0 views are synchronous, so the handler runs each request on a
+thread pool while the event loop deals with the client connections. The
+pool is bounded by the ASGI_THREADS setting, which also bounds the number
+of database connections a process can hold.
+
+Connections belong to the pool thread that opened them, while Django's
+request_started and request_finished handlers, which enforce CONN_MAX_AGE,
+run on whichever thread the signal was sent from. Every task of the pool
+therefore closes the obsolete connections of its own thread before and
+after running (see core.db.with_own_connections). Work moved off the pool,
+for example to async views, must not rely on CONN_MAX_AGE.
+
+Django 3.0 iterates a streaming response on the event loop, where the
+queries of a body generator, such as the recipe export, are refused.
+StreamingASGIHandler reads streaming bodies in one task of the pool
+instead, so the body's queries run on a single thread and connection, and
+that thread's connections are only released once the body has been sent.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 """
 
+import asyncio
 import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
-from django.core.asgi import get_asgi_application
+from core.db import with_own_connections
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+
+class ConnectionAgingExecutor(ThreadPoolExecutor):
+    """Thread pool closing obsolete connections around every task"""
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(with_own_connections(fn), *args, **kwargs)
+
+
+executor = ConnectionAgingExecutor(
+    max_workers=settings.ASGI_THREADS, thread_name_prefix='asgi'
+)
+_configured_loops = weakref.WeakSet()
+
+
+def response_headers(response):
+    """Return the ASGI headers of a response, cookies included"""
+    headers = []
+    for header, value in response.items():
+        if isinstance(header, str):
+            header = header.encode('ascii')
+        if isinstance(value, str):
+            value = value.encode('latin1')
+        headers.append((bytes(header), bytes(value)))
+    for cookie in response.cookies.values():
+        headers.append(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+        )
+
+    return headers
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGI handler reading streaming response bodies on the pool"""
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers(response),
+        })
+        loop = asyncio.get_running_loop()
+
+        def send_body():
+            """Iterate the body, handing every chunk to the event loop"""
+            try:
+                for part in response:
+                    for chunk, _ in self.chunk_bytes(part):
+                        asyncio.run_coroutine_threadsafe(send({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        }), loop).result()
+            finally:
+                response.close()
+
+        await loop.run_in_executor(executor, send_body)
+        await send({'type': 'http.response.body'})
+
+
+django_application = StreamingASGIHandler()
+
+
+def use_bounded_executor():
+    """Make the pool the default executor of the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _configured_loops:
+        loop.set_default_executor(executor)
+        _configured_loops.add(loop)
+
+
+async def lifespan(scope, receive, send):
+    """Answer the server's startup and shutdown events"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            use_bounded_executor()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+
+    use_bounded_executor()
+    await django_application(scope, receive, send)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -45,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.HashingUnavailableMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,9 +85,44 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        # Seconds a connection is kept open across requests, 0 closes it
+        # after every request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Required behind pgbouncer in transaction pooling mode. Querysets
+        # read with iterator() are then fetched in full by the client.
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', ''
+        ).lower() in ('1', 'true'),
+    }
+}
+
+# Replace persistent connections the server or a pooler has dropped when
+# a request first uses them, instead of failing the request
+DB_CONN_HEALTH_CHECKS = os.environ.get(
+    'DB_CONN_HEALTH_CHECKS', '1'
+).lower() in ('1', 'true')
+
+
+# Threads running requests in an ASGI process, each may hold a database
+# connection
+
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -108,6 +146,68 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Request profiling, see core.middleware.ProfilingMiddleware
+
+SERVER_TIMING = os.environ.get(
+    'SERVER_TIMING', '1' if DEBUG else '0'
+).lower() in ('1', 'true')
+
+PROFILING_BUCKETS = [
+    int(bucket) for bucket in os.environ.get(
+        'PROFILING_BUCKETS', '5,10,25,50,100,250,500,1000,2500'
+    ).split(',')
+]
+
+
+# Password hashing
+# The default profile runs PBKDF2 on a bounded pool of threads, the fast
+# profile trades all security for speed and is only meant for the tests.
+
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+PASSWORD_HASHER_PROFILE = os.environ.get(
+    'PASSWORD_HASHER_PROFILE', 'fast' if TESTING else 'default'
+)
+
+PASSWORD_HASHER_PROFILES = {
+    'default': [
+        'core.hashers.PooledPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    ],
+    'fast': [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ],
+}
+
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 180000)
+)
+
+# Every worker process has its own hashing pool, so by default the cores
+# are shared between the gunicorn workers (see gunicorn.conf.py). The pool
+# only bounds anything when a process serves requests concurrently, with
+# GUNICORN_THREADS above 1 or under ASGI; a sync worker hashes one password
+# at a time whatever the size of its pool.
+GUNICORN_WORKERS = int(
+    os.environ.get('GUNICORN_WORKERS', (os.cpu_count() or 1) * 2 + 1)
+)
+
+PASSWORD_HASHING_THREADS = int(os.environ.get(
+    'PASSWORD_HASHING_THREADS',
+    max(1, (os.cpu_count() or 1) // GUNICORN_WORKERS)
+))
+
+PASSWORD_HASHING_QUEUE = int(
+    os.environ.get('PASSWORD_HASHING_QUEUE', 4 * PASSWORD_HASHING_THREADS)
+)
+
+PASSWORD_HASHING_RETRY_AFTER = int(
+    os.environ.get('PASSWORD_HASHING_RETRY_AFTER', 1)
+)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
 
@@ -128,3 +228,114 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 AUTH_USER_MODEL = 'core.User'
+
+
+# Pagination for the recipe API endpoints
+
+RECIPE_API_PAGE_SIZE = int(os.environ.get('RECIPE_API_PAGE_SIZE', 100))
+
+RECIPE_API_MAX_PAGE_SIZE = int(
+    os.environ.get('RECIPE_API_MAX_PAGE_SIZE', 1000)
+)
+
+
+# Build list and detail responses from plain rows instead of serializers
+
+RECIPE_API_FAST_READS = os.environ.get(
+    'RECIPE_API_FAST_READS', '1'
+).lower() in ('1', 'true')
+
+
+# Recipe full text search
+
+RECIPE_SEARCH_MAX_RESULTS = int(
+    os.environ.get('RECIPE_SEARCH_MAX_RESULTS', 50)
+)
+
+
+# In-process cache of rendered recipe API responses
+
+RECIPE_RESPONSE_CACHE_SIZE = int(
+    os.environ.get('RECIPE_RESPONSE_CACHE_SIZE', 1024)
+)
+
+RECIPE_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get('RECIPE_RESPONSE_CACHE_TIMEOUT', 300)
+)
+
+RECIPE_RESPONSE_CACHE_MAX_ENTRY_BYTES = int(
+    os.environ.get('RECIPE_RESPONSE_CACHE_MAX_ENTRY_BYTES', 1024 * 1024)
+)
+
+# Total size of the cached bodies, per process
+RECIPE_RESPONSE_CACHE_MAX_BYTES = int(
+    os.environ.get('RECIPE_RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+)
+
+
+# Streaming exports of a user's recipes
+
+RECIPE_EXPORT_CHUNK_SIZE = int(
+    os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000)
+)
+
+
+# Recipes written per transaction by the import_recipes command
+
+RECIPE_IMPORT_CHUNK_SIZE = int(
+    os.environ.get('RECIPE_IMPORT_CHUNK_SIZE', 1000)
+)
+
+
+# Bulk writes on the recipe API
+
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 1000))
+
+RECIPE_BULK_BATCH_SIZE = int(os.environ.get('RECIPE_BULK_BATCH_SIZE', 500))
+
+
+# Recipe stats, accounts with at least the threshold of recipes keep
+# running totals instead of aggregating their recipes on every request
+
+RECIPE_STATS_SUMMARY_THRESHOLD = int(
+    os.environ.get('RECIPE_STATS_SUMMARY_THRESHOLD', 1000)
+)
+
+RECIPE_STATS_TOP = int(os.environ.get('RECIPE_STATS_TOP', 5))
+
+
+# Token authentication cache
+
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS', 'default')
+
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 300))
+
+TOKEN_CACHE_LOCAL_MAX_SIZE = int(
+    os.environ.get('TOKEN_CACHE_LOCAL_MAX_SIZE', 1024)
+)
+
+TOKEN_CACHE_LOCAL_TIMEOUT = int(os.environ.get('TOKEN_CACHE_LOCAL_TIMEOUT', 5))
+
+
+# Write throttling, rates per scope as '<requests>/<sec|min|hour|day>'.
+# An empty rate disables the scope, all scopes are off under manage.py test.
+
+THROTTLE_CACHE_ALIAS = os.environ.get('THROTTLE_CACHE_ALIAS', 'default')
+
+# Anonymous clients are told apart by address. With no proxies in front
+# X-Forwarded-For is ignored, as any client can send one; set the number
+# of trusted proxies to take the address they appended instead.
+REST_FRAMEWORK = {
+    'NUM_PROXIES': int(os.environ.get('DRF_NUM_PROXIES', 0)),
+}
+
+THROTTLE_RATES = {
+    scope: os.environ.get(
+        f'THROTTLE_RATE_{scope.upper()}', '' if TESTING else rate
+    )
+    for scope, rate in [
+        ('register', '20/hour'),
+        ('login', '30/min'),
+        ('recipe_write', '120/min'),
+    ]
+}
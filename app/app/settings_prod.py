@@ -0,0 +1,72 @@
+"""
+Production settings for app project.
+
+Selected with DJANGO_SETTINGS_MODULE=app.settings_prod, they extend the
+development settings in app/settings.py. DEBUG is off, so queries are no
+longer recorded in memory, and the secret key and allowed hosts must come
+from the environment.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from app.settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host
+]
+
+# Timings tell clients about the internals, only send them when asked
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true')
+
+# Throttle counters and cached tokens have to be shared by every worker
+# process, the memcached service of docker-compose.prod.yml by default
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'memcached:11211'),
+    }
+}
+
+# A per-process cache would give each worker its own throttle counters
+_throttled = any(THROTTLE_RATES.values())  # noqa: F405
+_throttle_alias = THROTTLE_CACHE_ALIAS  # noqa: F405
+_throttle_backend = CACHES.get(_throttle_alias, {}).get('BACKEND')
+if _throttled and \
+        _throttle_backend == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured(
+        f'Throttling is enabled but the {_throttle_alias!r} cache is local '
+        'to each process; set CACHE_BACKEND and CACHE_LOCATION to a shared '
+        'cache or disable the THROTTLE_RATE_* scopes.'
+    )
+
+STATIC_ROOT = os.environ.get('DJANGO_STATIC_ROOT', '/vol/web/static')
+
+# The browsable API renders HTML forms for every response
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ],
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('DJANGO_LOG_LEVEL', 'WARNING'),
+    },
+}
@@ -16,8 +16,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
     path('api/user/', include('user.urls')),
     path('api/recipe/', include('recipe.urls'))
 ]
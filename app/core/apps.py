@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+        from core import db, hashers, metrics, profiling
+        from core import signals  # noqa
+
+        request_started.connect(db.check_connections)
+        connection_created.connect(db.count_new_connection)
+        connection_created.connect(db.install_reconnect)
+        metrics.register('db_connections', db.connection_stats)
+        metrics.register('password_hashing', hashers.hashing_stats)
+        metrics.register('requests', profiling.route_stats)
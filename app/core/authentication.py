@@ -0,0 +1,139 @@
+import json
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.cache import LRUCache
+
+
+_local_tokens = None
+_local_tokens_lock = threading.Lock()
+
+
+def get_local_token_cache():
+    """Return the process wide token cache, creating it on first use"""
+    global _local_tokens
+    if _local_tokens is None:
+        with _local_tokens_lock:
+            if _local_tokens is None:
+                _local_tokens = LRUCache(
+                    settings.TOKEN_CACHE_LOCAL_MAX_SIZE,
+                    settings.TOKEN_CACHE_LOCAL_TIMEOUT
+                )
+
+    return _local_tokens
+
+
+def get_shared_token_cache():
+    """Return the Django cache backend holding authenticated tokens"""
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+# User columns cached with a token, the other columns load on first access
+CACHED_USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def token_cache_key(key):
+    """Return the cache key used to store the token with the given key"""
+    return f'auth:token:{key}'
+
+
+def invalidate_tokens(*keys):
+    """Drop the given token keys from the local and shared caches"""
+    local_cache = get_local_token_cache()
+    cache_keys = [token_cache_key(key) for key in keys]
+    for cache_key in cache_keys:
+        local_cache.delete(cache_key)
+
+    get_shared_token_cache().delete_many(cache_keys)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token and its user.
+
+    Lookups go to a small in-process LRU first, then to the shared cache
+    backend configured by TOKEN_CACHE_ALIAS and only then to the database.
+    Entries are invalidated from signals when a token is deleted or its
+    user is saved; other processes pick up changes once their local entry
+    expires after TOKEN_CACHE_LOCAL_TIMEOUT seconds.
+
+    Only the user id and the flags checked on every request are cached,
+    as a JSON string, so the shared cache never holds password hashes or
+    pickles. The other user columns are deferred and load when accessed.
+    """
+
+    def authenticate_credentials(self, key):
+        token = self.get_token(key)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (token.user, token)
+
+    def get_token(self, key):
+        """Return the token with its user, loading it through the caches"""
+        cache_key = token_cache_key(key)
+        local_cache = get_local_token_cache()
+
+        data = local_cache.get(cache_key)
+        if data is None:
+            data = get_shared_token_cache().get(cache_key)
+            if data is None:
+                data = self.dump_token(self.get_token_from_db(key))
+                get_shared_token_cache().set(
+                    cache_key, data, settings.TOKEN_CACHE_TIMEOUT
+                )
+            local_cache.set(cache_key, data)
+
+        # Every request gets its own instances so handlers can't mutate a
+        # user that concurrent requests are also holding
+        return self.load_token(key, data)
+
+    def dump_token(self, token):
+        """Return the cached form of a token and its user"""
+        return json.dumps({
+            'created': token.created.isoformat(),
+            'user': {
+                name: getattr(token.user, name) for name in CACHED_USER_FIELDS
+            },
+        })
+
+    def load_token(self, key, data):
+        """Return a token and its user built from their cached form"""
+        values = json.loads(data)
+        user_model = get_user_model()
+        # from_db takes the values in the order of the model's columns
+        names = [
+            field.attname for field in user_model._meta.concrete_fields
+            if field.attname in values['user']
+        ]
+        user = user_model.from_db(
+            router.db_for_read(user_model),
+            names,
+            [values['user'][name] for name in names]
+        )
+        model = self.get_model()
+        token = model(key=key, user=user, created=parse_datetime(
+            values['created']
+        ))
+        token._state.adding = False
+
+        return token
+
+    def get_token_from_db(self, key):
+        """Return the token for key from the database"""
+        model = self.get_model()
+        try:
+            return model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
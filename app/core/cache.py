@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread safe in-process cache bounded in size and entry age.
+
+    With max_bytes the entries are also bounded by the total of the sizes
+    given to set(), so a few large values cannot grow the process past it.
+    """
+
+    def __init__(self, max_size, timeout, max_bytes=None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value stored for key or None if missing or expired"""
+        with self._lock:
+            try:
+                expires, value, size = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            if expires < time.monotonic():
+                del self._data[key]
+                self.bytes -= size
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size=0):
+        """Store value for key, evicting the least recently used entries"""
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.delete(key)
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.monotonic() + self.timeout, value, size)
+            self.bytes += size
+            while len(self._data) > self.max_size or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def delete(self, key):
+        """Remove key from the cache if present"""
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def _pop(self, key):
+        """Remove key and its size, the lock must be held"""
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def stats(self):
+        """Return the size and hit, miss and eviction counters"""
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,118 @@
+import functools
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.utils import InterfaceError, OperationalError
+
+_stats = {'created': 0, 'reused': 0, 'discarded': 0}
+_stats_lock = threading.Lock()
+
+
+def count(name):
+    """Increment one of the connection counters"""
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def connection_stats():
+    """Return the connection counters and the share of reused connections"""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    total = stats['created'] + stats['reused']
+    stats['reuse_rate'] = stats['reused'] / total if total else 0.0
+    return stats
+
+
+def count_new_connection(sender, connection, **kwargs):
+    """Count a newly opened database connection"""
+    count('created')
+
+
+def check_connections(**kwargs):
+    """
+    Have broken persistent connections replaced when a request uses them.
+
+    Runs after Django's own request_started handler has closed the
+    connections past CONN_MAX_AGE, and again in every task of the ASGI
+    thread pool, as the signal may be sent from another thread than the
+    view's. Open connections are marked so that their first query counts
+    them as reused and, when DB_CONN_HEALTH_CHECKS is set, reconnects and
+    runs again once if the server or a pooler dropped the connection
+    meanwhile (see reconnect_on_first_query). Nothing is probed up front,
+    so requests pay no extra round trip; only a connection already known
+    to be closed is discarded here.
+    """
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+
+        if settings.DB_CONN_HEALTH_CHECKS and \
+                getattr(connection.connection, 'closed', False):
+            connection.close()
+            count('discarded')
+        else:
+            connection.first_use_pending = True
+
+
+def reconnect_on_first_query(execute, sql, params, many, context):
+    """
+    Execute wrapper retrying the first query of a reused connection.
+
+    Counts the connection as reused, or with DB_CONN_HEALTH_CHECKS set,
+    runs the query again once on a new connection if it failed because the
+    connection was dropped. Queries inside a transaction, whose earlier
+    statements would be lost, and server-side cursors are not retried.
+    """
+    connection = context['connection']
+    if not getattr(connection, 'first_use_pending', False):
+        return execute(sql, params, many, context)
+
+    connection.first_use_pending = False
+    try:
+        result = execute(sql, params, many, context)
+    except (OperationalError, InterfaceError):
+        cursor = context['cursor']
+        if not settings.DB_CONN_HEALTH_CHECKS or \
+                connection.in_atomic_block or \
+                getattr(cursor.cursor, 'name', None):
+            raise
+
+        connection.close()
+        count('discarded')
+        connection.ensure_connection()
+        cursor.cursor = connection.create_cursor()
+        return execute(sql, params, many, context)
+
+    count('reused')
+    return result
+
+
+def install_reconnect(sender, connection, **kwargs):
+    """Add reconnect_on_first_query to a new database connection"""
+    if reconnect_on_first_query not in connection.execute_wrappers:
+        # First, as connection.execute_wrapper() blocks pop the last one
+        connection.execute_wrappers.insert(0, reconnect_on_first_query)
+
+
+def with_own_connections(func):
+    """
+    Return func wrapped to close obsolete connections of its own thread.
+
+    Django closes connections past CONN_MAX_AGE from the request signals,
+    which under ASGI run on a different thread than the view. Wrapping the
+    work submitted to the ASGI thread pool ages out the connections where
+    they are used, so persistent connections still honour CONN_MAX_AGE,
+    and marks them for the first use check of check_connections.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        close_old_connections()
+        check_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return wrapper
@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.translation import ugettext_lazy as _
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class HashingUnavailable(Exception):
+    """
+    Raised when too many password hashes are already waiting.
+
+    Callers may retry after wait seconds. DRF views answer it as Throttled
+    (see core.throttling.HashingUnavailableMixin) and the other views get
+    a 429 from core.middleware.HashingUnavailableMiddleware.
+    """
+    message = _('Too many password checks in progress.')
+
+    def __init__(self, wait):
+        super().__init__(self.message)
+        self.wait = wait
+
+
+class HashingPool:
+    """
+    Run password hashing on a fixed number of threads.
+
+    At most max_workers hashes run at once and at most max_queue more wait
+    for a thread. Callers past that are turned away with HashingUnavailable
+    straight away instead of queueing behind a burst of logins, which would
+    hold their request threads and starve every other request.
+    """
+
+    def __init__(self, max_workers, max_queue):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix='hashing'
+        )
+        self.slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self.stats = {'pending': 0, 'completed': 0, 'rejected': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        """Change one of the pool counters"""
+        with self.lock:
+            self.stats[name] += amount
+
+    def run(self, func, *args, **kwargs):
+        """Call func on a pool thread and return its result"""
+        if not self.slots.acquire(blocking=False):
+            self.count('rejected')
+            raise HashingUnavailable(
+                wait=settings.PASSWORD_HASHING_RETRY_AFTER
+            )
+
+        self.count('pending')
+        try:
+            return self.executor.submit(func, *args, **kwargs).result()
+        finally:
+            self.count('pending', -1)
+            self.count('completed')
+            self.slots.release()
+
+    def get_stats(self):
+        """Return the pool limits and counters"""
+        with self.lock:
+            stats = dict(self.stats)
+
+        stats['max_workers'] = self.max_workers
+        stats['max_queue'] = self.max_queue
+        return stats
+
+
+def get_hashing_pool():
+    """Return the process wide password hashing pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    settings.PASSWORD_HASHING_THREADS,
+                    settings.PASSWORD_HASHING_QUEUE
+                )
+
+    return _pool
+
+
+def hashing_stats():
+    """Return the counters of the hashing pool, if it was started"""
+    if _pool is None:
+        return {}
+
+    return _pool.get_stats()
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher running on the hashing pool.
+
+    Keeps the pbkdf2_sha256 algorithm name so existing hashes still verify.
+    Setting, checking and the dummy hash of failed logins all go through
+    encode, so user creation, password changes and token logins share the
+    pool. The work factor comes from PASSWORD_HASH_ITERATIONS and stored
+    hashes are upgraded on the next login when it changes.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        parent = super().encode
+        return get_hashing_pool().run(parent, password, salt, iterations)
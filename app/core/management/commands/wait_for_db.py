@@ -1,21 +1,123 @@
+import random
 import time
 
+from django.conf import settings
+from django.core.cache import caches
 from django.db import connections
-from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.db.utils import InterfaceError, OperationalError
+from django.core.management.base import BaseCommand, CommandError
+
+CACHE_PROBE_KEY = 'wait_for_db:probe'
 
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
+    help = (
+        'Wait until the databases, and optionally a cache, answer queries. '
+        'Retries with jittered exponential backoff until the timeout.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Database alias to check, can be repeated '
+                 '(defaults to default)'
+        )
+        parser.add_argument(
+            '--cache', nargs='?', const='default', default=None,
+            help='Also check the cache with this alias (defaults to default)'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait in total before giving up'
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='Seconds to wait after the first failed attempt'
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Upper bound of the wait between attempts'
+        )
 
     def handle(self, *args, **options):
-        self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+        checks = []
+        for alias in options['databases'] or ['default']:
+            if alias not in connections.databases:
+                raise CommandError(f'Unknown database alias {alias!r}.')
+            checks.append((f'Database {alias}', self.check_database, alias))
+
+        if options['cache']:
+            alias = options['cache']
+            if alias not in settings.CACHES:
+                raise CommandError(f'Unknown cache alias {alias!r}.')
+            checks.append((f'Cache {alias}', self.check_cache, alias))
+
+        names = ', '.join(name.lower() for name, _, _ in checks)
+        self.stdout.write(f'Waiting for {names}...')
+        started = time.monotonic()
+        deadline = started + options['timeout']
+
+        for name, check, alias in checks:
+            self.wait_for(name, check, alias, deadline, options)
+
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'{name} available! ({elapsed:.2f}s)'
+            ))
+
+    def wait_for(self, name, check, alias, deadline, options):
+        """Call check until it passes, sleeping between attempts"""
+        attempt = 0
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second.')
-                time.sleep(1)
+                check(alias)
+                return
+            except (OperationalError, InterfaceError) as exc:
+                error = ' '.join(str(exc).split()) or exc.__class__.__name__
+
+            delay = min(
+                options['max_delay'],
+                options['initial_delay'] * 2 ** attempt
+            )
+            # Jitter keeps replicas started together from retrying in step
+            delay = random.uniform(delay / 2, delay)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError(
+                    f'{name} unavailable after {options["timeout"]}s: {error}'
+                )
+
+            delay = min(delay, remaining)
+            self.stdout.write(
+                f'{name} unavailable ({error}), '
+                f'waiting {delay:.2f} seconds.'
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def check_database(self, alias):
+        """Run a query on the database alias"""
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except (OperationalError, InterfaceError):
+            # Drop the broken connection so the next attempt reconnects
+            if not connection.in_atomic_block:
+                connection.close()
+            raise
+
+    def check_cache(self, alias):
+        """Write and read back a key on the cache alias"""
+        cache = caches[alias]
+        value = str(time.monotonic())
+        try:
+            cache.set(CACHE_PROBE_KEY, value, 10)
+            cached = cache.get(CACHE_PROBE_KEY)
+        except Exception as exc:
+            # Cache backends raise their client library's own errors
+            raise OperationalError(str(exc)) from exc
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
+        if cached != value:
+            raise OperationalError('cache did not return the probe value')
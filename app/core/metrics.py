@@ -0,0 +1,11 @@
+_collectors = {}
+
+
+def register(name, collector):
+    """Register a callable returning the metrics reported under name"""
+    _collectors[name] = collector
+
+
+def collect():
+    """Return the current metrics of every registered collector"""
+    return {name: collector() for name, collector in _collectors.items()}
@@ -0,0 +1,128 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+from core import profiling
+from core.hashers import HashingUnavailable
+
+
+def get_route(request):
+    """Return the route name and action of the view that served request"""
+    match = request.resolver_match
+    if match is None:
+        return None, None
+
+    # Viewsets map HTTP methods to actions, other views use the method
+    actions = getattr(match.func, 'actions', None) or {}
+    method = request.method.lower()
+
+    return match.view_name, actions.get(method, method)
+
+
+def get_query_budget(request, action):
+    """Return the query budget the view declares for action, if any"""
+    match = request.resolver_match
+    view_class = getattr(match.func, 'cls', None) if match else None
+    budgets = getattr(view_class, 'query_budgets', None) or {}
+
+    return budgets.get(action)
+
+
+def server_timing(profile, total):
+    """Return the Server-Timing header value of a profile"""
+    metrics = [
+        f'db;dur={profile.timings["db"] * 1000:.1f};'
+        f'desc="{profile.queries} queries"'
+    ]
+    for name, seconds in profile.timings.items():
+        if name != 'db':
+            metrics.append(f'{name};dur={seconds * 1000:.1f}')
+    metrics.append(f'total;dur={total * 1000:.1f}')
+
+    return ', '.join(metrics)
+
+
+class ProfilingMiddleware:
+    """
+    Count the queries and time the parts of every request.
+
+    Queries are counted and timed through connection.execute_wrapper on
+    every database alias, so nothing depends on DEBUG query logging.
+    Serializers with TimedSerializerMixin add to the serialize timing and
+    rendering the response is timed as render. Each request is added to
+    the histogram of its route name and action, reported under requests
+    by the metrics endpoint. With SERVER_TIMING set the timings are sent
+    back in a Server-Timing header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = profiling.start_profile()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            profiling.end_profile()
+
+        total = profile.total()
+        if profile.render_started is not None:
+            # The handler renders right after process_template_response
+            profile.timings['render'] = (
+                profile.timings.get('render', 0.0)
+                + total - profile.render_started
+            )
+
+        route, action = get_route(request)
+        if route:
+            profiling.record_route(
+                f'{route} {action}', profile, total,
+                get_query_budget(request, action)
+            )
+
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = server_timing(profile, total)
+
+        return response
+
+    def process_template_response(self, request, response):
+        profile = profiling.current_profile()
+        if profile is not None:
+            # Responses are rendered once every middleware hook has run
+            profile.render_started = profile.total()
+
+        return response
+
+
+class HashingUnavailableMiddleware:
+    """
+    Answer requests turned away by the password hashing pool with 429.
+
+    DRF views convert HashingUnavailable to Throttled themselves, this
+    covers the others, such as the admin login, which would otherwise
+    answer with a server error.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, HashingUnavailable):
+            return None
+
+        response = HttpResponse(
+            str(exception.message), status=429,
+            content_type='text/plain; charset=utf-8'
+        )
+        response['Retry-After'] = str(int(exception.wait))
+        return response
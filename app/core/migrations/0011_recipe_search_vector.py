@@ -0,0 +1,67 @@
+# Generated by Django 3.0.14 on 2026-10-18 02:26
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    """Create the PostgreSQL only search indexes and fill the vectors"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        'CREATE INDEX core_recipe_search_vector_idx '
+        'ON core_recipe USING gin (search_vector)'
+    )
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        trigram_available = cursor.fetchone() is not None
+    if trigram_available:
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX core_recipe_title_trgm_idx '
+            'ON core_recipe USING gin (title gin_trgm_ops)'
+        )
+
+    schema_editor.execute("""
+        UPDATE core_recipe SET search_vector =
+            setweight(to_tsvector('english', title), 'A') ||
+            setweight(to_tsvector('english', COALESCE((
+                SELECT STRING_AGG(t.name, ' ') FROM core_tag t
+                JOIN core_recipe_tags rt ON rt.tag_id = t.id
+                WHERE rt.recipe_id = core_recipe.id
+            ), '')), 'B') ||
+            setweight(to_tsvector('english', COALESCE((
+                SELECT STRING_AGG(i.name, ' ') FROM core_ingredient i
+                JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+                WHERE ri.recipe_id = core_recipe.id
+            ), '')), 'B')
+    """)
+
+
+def drop_search_indexes(apps, schema_editor):
+    """Drop the PostgreSQL only search indexes"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS core_recipe_title_trgm_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS core_recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
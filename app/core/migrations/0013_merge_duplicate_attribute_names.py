@@ -0,0 +1,64 @@
+# Generated by Django 3.0.14 on 2026-10-18 09:12
+
+from django.db import migrations
+from django.db.models import Count, F, Min
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+ATTRIBUTES = (
+    ('Tag', 'tags'),
+    ('Ingredient', 'ingredients'),
+)
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Keep the oldest of the objects sharing a name, ignoring case"""
+    Recipe = apps.get_model('core', 'Recipe')
+    CollectionVersion = apps.get_model('core', 'CollectionVersion')
+
+    for model_name, field_name in ATTRIBUTES:
+        model = apps.get_model('core', model_name)
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        column = field.m2m_reverse_field_name()
+
+        objects = model.objects.annotate(lower_name=Lower('name'))
+        groups = objects.values('user_id', 'lower_name').annotate(
+            keep_id=Min('id'), total=Count('id')
+        ).filter(total__gt=1).order_by()
+
+        users = set()
+        for group in groups.iterator():
+            duplicate_ids = list(objects.filter(
+                user_id=group['user_id'], lower_name=group['lower_name']
+            ).exclude(id=group['keep_id']).values_list('id', flat=True))
+
+            for duplicate_id in duplicate_ids:
+                linked = list(through.objects.filter(
+                    **{column: group['keep_id']}
+                ).values_list('recipe_id', flat=True))
+                rows = through.objects.filter(**{column: duplicate_id})
+                rows.filter(recipe_id__in=linked).delete()
+                rows.update(**{column: group['keep_id']})
+
+            model.objects.filter(id__in=duplicate_ids).delete()
+            users.add(group['user_id'])
+
+        # Historical models send no signals, so cached responses and
+        # validators are invalidated here
+        CollectionVersion.objects.filter(
+            user_id__in=users, collection__in=[field_name, 'recipes']
+        ).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_collectionversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_names, migrations.RunPython.noop
+        ),
+    ]
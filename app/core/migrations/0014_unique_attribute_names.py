@@ -0,0 +1,25 @@
+# Generated by Django 3.0.14 on 2026-10-18 09:12
+
+from django.db import migrations
+
+
+# Kept apart from the merge in 0013, PostgreSQL can't index a table with
+# pending trigger events left by changes in the same transaction
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_merge_duplicate_attribute_names'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_tag_user_lower_name_uniq '
+            'ON core_tag (user_id, LOWER(name))',
+            'DROP INDEX core_tag_user_lower_name_uniq'
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_ingredient_user_lower_name_uniq '
+            'ON core_ingredient (user_id, LOWER(name))',
+            'DROP INDEX core_ingredient_user_lower_name_uniq'
+        ),
+    ]
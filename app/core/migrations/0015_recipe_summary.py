@@ -0,0 +1,29 @@
+# Generated by Django 3.0.14 on 2026-10-18 03:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_unique_attribute_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('price_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('price_min', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('price_max', models.DecimalField(decimal_places=2, max_digits=5, null=True)),
+                ('time_total', models.BigIntegerField(default=0)),
+                ('time_min', models.IntegerField(null=True)),
+                ('time_max', models.IntegerField(null=True)),
+                ('stale', models.BooleanField(default=False)),
+            ],
+        ),
+    ]
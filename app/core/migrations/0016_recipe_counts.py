@@ -0,0 +1,88 @@
+# Generated by Django 3.0.14 on 2026-10-18 03:28
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+ATTRIBUTES = (
+    ('Tag', 'tags'),
+    ('Ingredient', 'ingredients'),
+)
+
+
+def count_recipes(apps, schema_editor):
+    """Fill recipe_count of existing tags and ingredients"""
+    Recipe = apps.get_model('core', 'Recipe')
+
+    for model_name, field_name in ATTRIBUTES:
+        model = apps.get_model('core', model_name)
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        column = field.m2m_reverse_field_name()
+
+        counts = through.objects.filter(**{column: OuterRef('pk')}).order_by(
+        ).values(column).annotate(total=Count('recipe_id')).values('total')
+        model.objects.update(recipe_count=Coalesce(
+            Subquery(counts, output_field=IntegerField()), 0
+        ))
+
+
+# Columns are added with plain SQL, SQLite would otherwise rebuild the
+# tables and lose the name indexes created by raw SQL in 0014
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_recipe_summary'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE core_ingredient ADD COLUMN recipe_count '
+                    'integer NOT NULL DEFAULT 0',
+                    'ALTER TABLE core_ingredient DROP COLUMN recipe_count'
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='ingredient',
+                    name='recipe_count',
+                    field=models.IntegerField(default=0, editable=False),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE core_tag ADD COLUMN recipe_count '
+                    'integer NOT NULL DEFAULT 0',
+                    'ALTER TABLE core_tag DROP COLUMN recipe_count'
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='tag',
+                    name='recipe_count',
+                    field=models.IntegerField(default=0, editable=False),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(
+                fields=['user', 'recipe_count', 'id'],
+                name='core_ingredient_user_count_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(
+                fields=['user', 'recipe_count', 'id'],
+                name='core_tag_user_count_idx'
+            ),
+        ),
+        migrations.RunPython(
+            count_recipes, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import migrations
+
+RECIPE_SEARCH_VECTOR = """
+    setweight(to_tsvector('english', COALESCE(NEW.title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE((
+        SELECT STRING_AGG(t.name, ' ') FROM core_tag t
+        JOIN core_recipe_tags rt ON rt.tag_id = t.id
+        WHERE rt.recipe_id = NEW.id
+    ), '')), 'B') ||
+    setweight(to_tsvector('english', COALESCE((
+        SELECT STRING_AGG(i.name, ' ') FROM core_ingredient i
+        JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+        WHERE ri.recipe_id = NEW.id
+    ), '')), 'B')
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    """Compute the search vector in the INSERT or UPDATE of a title"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(f"""
+        CREATE FUNCTION core_recipe_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {RECIPE_SEARCH_VECTOR};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute(
+        'CREATE TRIGGER core_recipe_search_vector_insert '
+        'BEFORE INSERT ON core_recipe FOR EACH ROW '
+        'EXECUTE PROCEDURE core_recipe_search_vector()'
+    )
+    schema_editor.execute(
+        'CREATE TRIGGER core_recipe_search_vector_update '
+        'BEFORE UPDATE OF title ON core_recipe FOR EACH ROW '
+        'WHEN (OLD.title IS DISTINCT FROM NEW.title) '
+        'EXECUTE PROCEDURE core_recipe_search_vector()'
+    )
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    """Drop the search vector trigger"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        'DROP TRIGGER IF EXISTS core_recipe_search_vector_update '
+        'ON core_recipe'
+    )
+    schema_editor.execute(
+        'DROP TRIGGER IF EXISTS core_recipe_search_vector_insert '
+        'ON core_recipe'
+    )
+    schema_editor.execute('DROP FUNCTION IF EXISTS core_recipe_search_vector()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_attribute_name_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            create_search_vector_trigger, drop_search_vector_trigger
+        ),
+    ]
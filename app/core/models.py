@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
     PermissionsMixin
@@ -45,6 +46,22 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    # Recipes using the tag, maintained by recipe.usage
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        # Names are also unique per user ignoring case, through the
+        # core_tag_user_lower_name_uniq index of migration 0014
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='core_tag_name_id_idx'
+            ),
+            models.Index(
+                fields=['user', 'recipe_count', 'id'],
+                name='core_tag_user_count_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -57,11 +74,35 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    # Recipes using the ingredient, maintained by recipe.usage
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        # Names are also unique per user ignoring case, through the
+        # core_ingredient_user_lower_name_uniq index of migration 0014
+        indexes = [
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='core_ingredient_name_id_idx'
+            ),
+            models.Index(
+                fields=['user', 'recipe_count', 'id'],
+                name='core_ingredient_user_count_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeManager(models.Manager):
+    """Manager leaving the search vector out of recipe queries"""
+
+    def get_queryset(self):
+        # Only search filters and ranks on the vector, nothing reads it
+        return super().get_queryset().defer('search_vector')
+
+
 class Recipe(models.Model):
     """Recipe object"""
     user = models.ForeignKey(
@@ -76,5 +117,99 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
 
+    # Set from the title by a database trigger (migration 0018), and by
+    # recipe.search when tag or ingredient names change
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'id'],
+                name='core_recipe_user_id_idx'
+            ),
+            models.Index(
+                fields=['user', 'time_minutes'],
+                name='core_recipe_user_time_idx'
+            ),
+            models.Index(
+                fields=['user', 'price'],
+                name='core_recipe_user_price_idx'
+            ),
+            models.Index(
+                fields=['user', 'title'],
+                name='core_recipe_user_title_idx',
+                opclasses=['int4_ops', 'varchar_pattern_ops']
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets recipe.stats apply the change of a saved recipe as a delta
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return self.title
+
+
+class RecipeSummary(models.Model):
+    """Running totals of a user's recipes, kept for large accounts"""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    recipe_count = models.IntegerField(default=0)
+    price_total = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0
+    )
+    price_min = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    price_max = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    time_total = models.BigIntegerField(default=0)
+    time_min = models.IntegerField(null=True)
+    time_max = models.IntegerField(null=True)
+    # Set when a deleted or changed recipe held a minimum or maximum
+    stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f'{self.recipe_count} recipes'
+
+
+class CollectionVersion(models.Model):
+    """Version counter of one of a user's collections, e.g. recipes"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    collection = models.CharField(max_length=32)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [('user', 'collection')]
+
+    def __str__(self):
+        return f'{self.collection} v{self.version}'
+
+
+class ImportCheckpoint(models.Model):
+    """Progress of a resumable recipe import, saved with every chunk"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    name = models.CharField(max_length=255)
+    source = models.TextField()
+    records = models.IntegerField(default=0)
+    rows = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [('user', 'name')]
+
+    def __str__(self):
+        return f'{self.name}: {self.records} records'
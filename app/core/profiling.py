@@ -0,0 +1,147 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_local = threading.local()
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+class Profile:
+    """Queries and timings of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.timings = {'db': 0.0}
+        self.depth = {}
+        self.render_started = None
+
+    def record_query(self, execute, sql, params, many, context):
+        """Execute wrapper counting and timing every query"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.timings['db'] += time.perf_counter() - started
+
+    @contextmanager
+    def measure(self, name):
+        """Add the time spent in the block to the timing called name"""
+        # Nested blocks, such as nested serializers, count once
+        depth = self.depth.get(name, 0)
+        self.depth[name] = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.depth[name] = depth
+            if not depth:
+                elapsed = time.perf_counter() - started
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def total(self):
+        """Return the seconds since the request started"""
+        return time.perf_counter() - self.started
+
+
+def start_profile():
+    """Start the profile of the request handled by this thread"""
+    _local.profile = Profile()
+    return _local.profile
+
+
+def end_profile():
+    """Stop collecting into the profile of this thread"""
+    _local.profile = None
+
+
+def current_profile():
+    """Return the profile of the request handled by this thread, if any"""
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def measure(name):
+    """Time the block into the current profile, if a request is profiled"""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+
+    with profile.measure(name):
+        yield
+
+
+class RouteStats:
+    """Histogram of response times and totals of one route and action"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.over_budget = 0
+        self.seconds = {}
+
+    def add(self, profile, total, budget=None):
+        """Count a finished request"""
+        self.counts[bisect_left(self.buckets, total * 1000)] += 1
+        self.requests += 1
+        self.queries += profile.queries
+        self.max_queries = max(self.max_queries, profile.queries)
+        if budget is not None and profile.queries > budget:
+            self.over_budget += 1
+        for name, seconds in [*profile.timings.items(), ('total', total)]:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def as_dict(self):
+        """Return the histogram and averages in milliseconds"""
+        bounds = [str(bucket) for bucket in self.buckets] + ['+Inf']
+        return {
+            'requests': self.requests,
+            'histogram_ms': dict(zip(bounds, self.counts)),
+            'queries_avg': self.queries / self.requests,
+            'queries_max': self.max_queries,
+            'over_budget': self.over_budget,
+            'avg_ms': {
+                name: round(seconds * 1000 / self.requests, 3)
+                for name, seconds in self.seconds.items()
+            },
+        }
+
+
+def record_route(route, profile, total, budget=None):
+    """Add a finished request to the stats of its route"""
+    with _routes_lock:
+        stats = _routes.get(route)
+        if stats is None:
+            stats = _routes[route] = RouteStats(settings.PROFILING_BUCKETS)
+        stats.add(profile, total, budget)
+
+
+def route_stats():
+    """Return the stats of every route seen by this process"""
+    with _routes_lock:
+        return {
+            route: stats.as_dict() for route, stats in sorted(_routes.items())
+        }
+
+
+def reset_route_stats():
+    """Forget the stats of every route"""
+    with _routes_lock:
+        _routes.clear()
+
+
+class TimedSerializerMixin:
+    """Serializer mixin adding its output time to the request profile"""
+
+    def to_representation(self, instance):
+        with measure('serialize'):
+            return super().to_representation(instance)
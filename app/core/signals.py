@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_tokens
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Drop a token from the auth cache when it changes or is deleted"""
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached tokens of a user so the cached user is never stale"""
+    if created:
+        return
+
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    if keys:
+        invalidate_tokens(*keys)
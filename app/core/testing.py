@@ -0,0 +1,90 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin holding endpoints to the query budgets of their views.
+
+    Views declare the most queries each action may run in query_budgets,
+    the same numbers ProfilingMiddleware counts as over_budget in the
+    metrics endpoint.
+    """
+
+    @contextmanager
+    def assertWithinQueryBudget(self, view_class, action):
+        """Fail when the block runs more queries than action's budget"""
+        budget = view_class.query_budgets[action]
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        executed = len(context)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f'{view_class.__name__}.{action} ran {executed} queries, '
+                f'over its budget of {budget}:\n{queries}'
+            )
+
+
+def asgi_request(application, path, headers=()):
+    """
+    Send a GET request for path through an ASGI application.
+
+    Returns the response status, its headers as a dict and the body. The
+    database connections opened while handling the request, on whichever
+    thread, are closed afterwards so none is left to keep the test
+    database from being dropped.
+    """
+    messages = []
+    opened = []
+
+    def track(sender, connection, **kwargs):
+        opened.append(connection)
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode('ascii'),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), *headers],
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+    connection_created.connect(track)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(application(scope, receive, send))
+    finally:
+        connection_created.disconnect(track)
+        for wrapper in opened:
+            wrapper.inc_thread_sharing()
+            wrapper.close()
+            wrapper.dec_thread_sharing()
+        # Closing a loop shuts its default executor down, which here is the
+        # ASGI thread pool shared by every request of the process.
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+        loop.close()
+
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict(start['headers']), body
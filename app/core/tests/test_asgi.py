@@ -0,0 +1,55 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from app import asgi
+from core.testing import asgi_request
+
+
+class AsgiApplicationTests(TransactionTestCase):
+    """Test requests made through the ASGI application"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'TestPass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def test_request_through_handler(self):
+        """Test that a view answers through the ASGI application"""
+        status, headers, body = asgi_request(
+            asgi.application, reverse('user:account'),
+            [(b'authorization', f'Token {self.token.key}'.encode('ascii'))]
+        )
+
+        self.assertEqual(status, 200)
+        self.assertIn(b'test@gmail.com', body)
+
+    def test_streaming_body_read_on_pool(self):
+        """Test that a streaming body queries the database off the loop"""
+        threads = []
+
+        def content():
+            threads.append(threading.current_thread().name)
+            yield str(get_user_model().objects.count())
+            threads.append(threading.current_thread().name)
+            yield ' users'
+
+        response = StreamingHttpResponse(content())
+        response['X-Test'] = 'streamed'
+
+        def view_application(scope, receive, send):
+            return asgi.django_application.send_response(response, send)
+
+        status, headers, body = asgi_request(view_application, '/')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'X-Test'], b'streamed')
+        self.assertEqual(body, b'1 users')
+        self.assertEqual(len(set(threads)), 1)
+        self.assertTrue(threads[0].startswith('asgi'))
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+from core.authentication import CachedTokenAuthentication, \
+    get_local_token_cache, get_shared_token_cache, token_cache_key
+from user.serializers import UserSerializer
+
+
+def sample_user(email='test@gmail.com', password='Password01'):
+    """Create sample user to be used in tests"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating with cached tokens"""
+
+    def setUp(self):
+        get_local_token_cache().clear()
+        get_shared_token_cache().clear()
+        self.user = sample_user()
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_authenticate_valid_token(self):
+        """Test that a valid token returns its user"""
+        user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_cached_token_skips_database(self):
+        """Test that a cached token is authenticated without queries"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user, self.user)
+
+    def test_shared_cache_used_when_local_cache_empty(self):
+        """Test that other processes reuse the shared cache entry"""
+        self.auth.authenticate_credentials(self.token.key)
+        get_local_token_cache().clear()
+
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_cache_holds_no_password(self):
+        """Test that only plain values without the hash are cached"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        data = get_shared_token_cache().get(token_cache_key(self.token.key))
+        self.assertIsInstance(data, str)
+        self.assertNotIn(self.user.password, data)
+        self.assertNotIn(self.user.email, data)
+
+    def test_cached_user_loads_other_fields(self):
+        """Test that the cached user loads its other columns on access"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+            self.assertTrue(user.is_active)
+            self.assertFalse(user.is_staff)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, self.user.email)
+
+    def test_invalid_token(self):
+        """Test that an unknown token is rejected"""
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials('invalid')
+
+    def test_deleted_token_invalidated(self):
+        """Test that a deleted token can no longer authenticate"""
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_invalidated(self):
+        """Test that a deactivated user can no longer authenticate"""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_user_serializer_update_invalidates(self):
+        """Test that updating a user through the serializer is picked up"""
+        self.auth.authenticate_credentials(self.token.key)
+        serializer = UserSerializer(
+            self.user, data={'name': 'New Name'}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.name, 'New Name')
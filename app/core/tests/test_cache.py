@@ -0,0 +1,67 @@
+from django.test import SimpleTestCase
+
+from core.cache import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test the in-process LRU cache"""
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest unused entry is evicted when full"""
+        cache = LRUCache(max_size=2, timeout=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_expired_entries_are_missing(self):
+        """Test that entries older than the timeout are not returned"""
+        cache = LRUCache(max_size=2, timeout=-1)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_stats_count_hits_misses_and_evictions(self):
+        """Test that the cache reports its usage counters"""
+        cache = LRUCache(max_size=1, timeout=60)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b')
+        cache.set('b', 2)
+
+        self.assertEqual(cache.stats(), {
+            'size': 1,
+            'max_size': 1,
+            'bytes': 0,
+            'max_bytes': None,
+            'hits': 1,
+            'misses': 1,
+            'evictions': 1,
+        })
+
+    def test_evicts_until_under_max_bytes(self):
+        """Test that entries are evicted to keep the total size bounded"""
+        cache = LRUCache(max_size=10, timeout=60, max_bytes=10)
+        cache.set('a', 1, size=4)
+        cache.set('b', 2, size=4)
+        cache.set('a', 3, size=2)
+        cache.set('c', 4, size=5)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 3)
+        self.assertEqual(cache.get('c'), 4)
+        self.assertEqual(cache.stats()['bytes'], 7)
+
+    def test_entry_larger_than_max_bytes_not_stored(self):
+        """Test that a value over the byte budget is not cached"""
+        cache = LRUCache(max_size=10, timeout=60, max_bytes=10)
+        cache.set('a', 1, size=4)
+        cache.set('b', 2, size=11)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
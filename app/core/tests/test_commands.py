@@ -1,23 +1,89 @@
+from io import StringIO
 from unittest.mock import patch
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+
+CURSOR_EXECUTE = 'django.db.backends.utils.CursorWrapper.execute'
 
 
 class CommandTest(TestCase):
-    """docstring for CommandTest."""
+    """Test the wait_for_db management command"""
 
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
+        with patch(CURSOR_EXECUTE) as execute:
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+            execute.assert_called_once_with('SELECT 1')
 
-    @patch('time.sleep', return_value=True)
-    def test_wait_for_db(self, ts):
-        """Test waiting for db"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+    @patch('time.sleep', return_value=None)
+    def test_wait_for_db(self, sleep):
+        """Test waiting for db retries with growing delays"""
+        with patch(CURSOR_EXECUTE) as execute:
+            execute.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', initial_delay=1, max_delay=100)
+
+        self.assertEqual(execute.call_count, 6)
+        delays = [call[0][0] for call in sleep.call_args_list]
+        self.assertEqual(len(delays), 5)
+        for attempt, delay in enumerate(delays):
+            self.assertGreaterEqual(delay, 2 ** attempt / 2)
+            self.assertLessEqual(delay, 2 ** attempt)
+
+    @patch('time.sleep', return_value=None)
+    def test_wait_for_db_delay_capped(self, sleep):
+        """Test that the delay between attempts never exceeds max_delay"""
+        with patch(CURSOR_EXECUTE) as execute:
+            execute.side_effect = [OperationalError] * 8 + [None]
+            call_command('wait_for_db', initial_delay=1, max_delay=3)
+
+        self.assertTrue(all(call[0][0] <= 3 for call in sleep.call_args_list))
+
+    def test_wait_for_db_timeout(self):
+        """Test that the command gives up after the timeout"""
+        with patch(CURSOR_EXECUTE, side_effect=OperationalError):
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=0.05, initial_delay=0.01)
+
+    def test_wait_for_multiple_databases(self):
+        """Test that every requested alias is queried"""
+        with patch(CURSOR_EXECUTE) as execute:
+            call_command('wait_for_db', databases=['default', 'default'])
+
+        self.assertEqual(execute.call_count, 2)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+    }})
+    def test_wait_for_cache_unavailable(self):
+        """Test that a cache that loses writes is reported unavailable"""
+        with patch(CURSOR_EXECUTE):
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', cache='default', timeout=0.05,
+                             initial_delay=0.01)
+
+    def test_wait_for_cache(self):
+        """Test waiting for the cache after the database"""
+        out = StringIO()
+        with patch(CURSOR_EXECUTE):
+            call_command('wait_for_db', cache='default', stdout=out)
+
+        self.assertIn('Database default available!', out.getvalue())
+        self.assertIn('Cache default available!', out.getvalue())
+
+    def test_unknown_database_alias(self):
+        """Test that an unknown database alias is reported, not raised"""
+        with patch(CURSOR_EXECUTE) as execute:
+            with self.assertRaisesMessage(CommandError, "'missing'"):
+                call_command('wait_for_db', databases=['default', 'missing'])
+
+        execute.assert_not_called()
+
+    def test_unknown_cache_alias(self):
+        """Test that an unknown cache alias is reported before waiting"""
+        with patch(CURSOR_EXECUTE) as execute:
+            with self.assertRaisesMessage(CommandError, "'missing'"):
+                call_command('wait_for_db', cache='missing')
+
+        execute.assert_not_called()
@@ -0,0 +1,182 @@
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.utils import InterfaceError, OperationalError
+from django.test import SimpleTestCase, TransactionTestCase, \
+    override_settings
+
+from core import db
+
+
+def mock_connection(is_open=True, closed=0):
+    """Return a mock database wrapper, its connection closed if given"""
+    wrapper = MagicMock(first_use_pending=False)
+    wrapper.connection = MagicMock(closed=closed) if is_open else None
+    return wrapper
+
+
+def deltas_since(before):
+    """Return how much each connection counter grew since before"""
+    after = db.connection_stats()
+    return {
+        name: after[name] - before[name]
+        for name in ('created', 'reused', 'discarded')
+    }
+
+
+class ConnectionHealthTests(SimpleTestCase):
+    """Test the checks and counters of persistent connections"""
+
+    def check(self, *wrappers):
+        """Run the request started check over wrappers, return the deltas"""
+        before = db.connection_stats()
+        with patch('core.db.connections') as connections:
+            connections.all.return_value = list(wrappers)
+            db.check_connections()
+
+        return deltas_since(before)
+
+    def run_first_query(self, wrapper, execute):
+        """Run a query through the reconnect wrapper, return the deltas"""
+        before = db.connection_stats()
+        context = {'connection': wrapper, 'cursor': MagicMock()}
+        context['cursor'].cursor.name = None
+        result = db.reconnect_on_first_query(
+            execute, 'SELECT 1', None, False, context
+        )
+
+        return result, context['cursor'], deltas_since(before)
+
+    def test_closed_connection_discarded(self):
+        """Test that a connection known to be closed is dropped at once"""
+        closed = mock_connection(closed=1)
+
+        deltas = self.check(closed)
+
+        closed.close.assert_called_once_with()
+        self.assertEqual(deltas['discarded'], 1)
+        self.assertFalse(closed.first_use_pending)
+
+    def test_open_connection_marked(self):
+        """Test that open connections are checked on first use only"""
+        wrapper = mock_connection()
+
+        deltas = self.check(wrapper, mock_connection(is_open=False))
+
+        wrapper.close.assert_not_called()
+        self.assertTrue(wrapper.first_use_pending)
+        self.assertEqual(deltas['discarded'], 0)
+
+    def test_first_query_counts_reuse(self):
+        """Test that a working connection is counted once as reused"""
+        wrapper = mock_connection()
+        wrapper.first_use_pending = True
+        execute = MagicMock(return_value='rows')
+
+        result, _, deltas = self.run_first_query(wrapper, execute)
+        _, _, later = self.run_first_query(wrapper, execute)
+
+        self.assertEqual(result, 'rows')
+        self.assertEqual(deltas['reused'], 1)
+        self.assertEqual(later['reused'], 0)
+        wrapper.close.assert_not_called()
+
+    def test_dropped_connection_reconnects(self):
+        """Test that the first query on a dropped connection runs again"""
+        wrapper = mock_connection()
+        wrapper.first_use_pending = True
+        wrapper.in_atomic_block = False
+        execute = MagicMock(side_effect=[OperationalError('gone'), 'rows'])
+
+        result, cursor, deltas = self.run_first_query(wrapper, execute)
+
+        self.assertEqual(result, 'rows')
+        wrapper.close.assert_called_once_with()
+        wrapper.ensure_connection.assert_called_once_with()
+        self.assertEqual(cursor.cursor, wrapper.create_cursor.return_value)
+        self.assertEqual(deltas['discarded'], 1)
+
+    def test_dropped_connection_in_transaction_fails(self):
+        """Test that a query inside a transaction is not run again"""
+        wrapper = mock_connection()
+        wrapper.first_use_pending = True
+        wrapper.in_atomic_block = True
+        execute = MagicMock(side_effect=InterfaceError('gone'))
+
+        with self.assertRaises(InterfaceError):
+            self.run_first_query(wrapper, execute)
+
+        self.assertEqual(execute.call_count, 1)
+        wrapper.ensure_connection.assert_not_called()
+
+    @override_settings(DB_CONN_HEALTH_CHECKS=False)
+    def test_health_checks_disabled(self):
+        """Test that dropped connections fail the query when checks are off"""
+        wrapper = mock_connection()
+        wrapper.first_use_pending = True
+        wrapper.in_atomic_block = False
+        execute = MagicMock(side_effect=OperationalError('gone'))
+
+        with self.assertRaises(OperationalError):
+            self.run_first_query(wrapper, execute)
+
+        wrapper.ensure_connection.assert_not_called()
+
+    def test_new_connections_counted(self):
+        """Test that opened connections count against the reuse rate"""
+        before = db.connection_stats()['created']
+
+        connection_created.send(
+            sender=connection.__class__, connection=connection
+        )
+
+        stats = db.connection_stats()
+        self.assertEqual(stats['created'], before + 1)
+        self.assertLess(stats['reuse_rate'], 1)
+
+
+class OwnConnectionsTests(SimpleTestCase):
+    """Test closing connections on the thread that uses them"""
+
+    def test_closes_old_connections_around_call(self):
+        """Test that obsolete connections are closed before and after"""
+        calls = []
+
+        def work(value):
+            calls.append('work')
+            return value * 2
+
+        with patch('core.db.close_old_connections') as close, \
+                patch('core.db.check_connections') as check:
+            close.side_effect = lambda: calls.append('close')
+            check.side_effect = lambda: calls.append('check')
+            result = db.with_own_connections(work)(21)
+
+        self.assertEqual(result, 42)
+        self.assertEqual(calls, ['close', 'check', 'work', 'close'])
+
+
+class DroppedConnectionTests(TransactionTestCase):
+    """Test replacing a connection the server has closed"""
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_request_survives_terminated_backend(self):
+        """Test that a query after the server dropped the connection works"""
+        connection.ensure_connection()
+        pid = connection.connection.get_backend_pid()
+        other = connection.copy()
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        finally:
+            other.close()
+
+        db.check_connections()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            row = cursor.fetchone()
+
+        self.assertEqual(row, (1,))
+        self.assertNotEqual(connection.connection.get_backend_pid(), pid)
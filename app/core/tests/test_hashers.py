@@ -0,0 +1,124 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, \
+    check_password, make_password
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.hashers import HashingPool, HashingUnavailable, \
+    PooledPBKDF2PasswordHasher
+
+POOLED_HASHERS = ['core.hashers.PooledPBKDF2PasswordHasher']
+
+
+def saturated_pool():
+    """Return a pool with no free slot, and the event releasing it"""
+    pool = HashingPool(max_workers=1, max_queue=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    threading.Thread(target=pool.run, args=(block,)).start()
+    started.wait(5)
+    return pool, release
+
+
+class HashingPoolTests(SimpleTestCase):
+    """Test the bounded password hashing pool"""
+
+    def test_run_returns_result(self):
+        """Test that work runs on a pool thread and returns its result"""
+        pool = HashingPool(max_workers=2, max_queue=2)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith('hashing'))
+        self.assertEqual(pool.get_stats()['completed'], 1)
+        self.assertEqual(pool.get_stats()['pending'], 0)
+
+    def test_run_raises_errors(self):
+        """Test that errors of the work reach the caller"""
+        pool = HashingPool(max_workers=1, max_queue=0)
+
+        with self.assertRaises(ZeroDivisionError):
+            pool.run(lambda: 1 / 0)
+
+        self.assertEqual(pool.run(lambda: 'free'), 'free')
+
+    @override_settings(PASSWORD_HASHING_RETRY_AFTER=3)
+    def test_saturated_pool_rejects(self):
+        """Test that work past the workers and queue is turned away"""
+        pool, release = saturated_pool()
+        try:
+            with self.assertRaises(HashingUnavailable) as context:
+                pool.run(lambda: None)
+        finally:
+            release.set()
+
+        self.assertEqual(context.exception.wait, 3)
+        self.assertEqual(pool.get_stats()['rejected'], 1)
+
+
+@override_settings(PASSWORD_HASHERS=POOLED_HASHERS)
+class PooledHasherTests(SimpleTestCase):
+    """Test the PBKDF2 hasher running on the pool"""
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_hash_compatible_with_pbkdf2(self):
+        """Test that hashes keep the pbkdf2_sha256 format and work factor"""
+        encoded = make_password('Testpass123')
+
+        algorithm, iterations, _, _ = encoded.split('$')
+        self.assertEqual(algorithm, 'pbkdf2_sha256')
+        self.assertEqual(iterations, '1000')
+        self.assertTrue(PBKDF2PasswordHasher().verify('Testpass123', encoded))
+        self.assertTrue(check_password('Testpass123', encoded))
+        self.assertFalse(check_password('Wrongpass123', encoded))
+
+    def test_changed_iterations_need_update(self):
+        """Test that hashes with another work factor are upgraded"""
+        hasher = PooledPBKDF2PasswordHasher()
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            encoded = hasher.encode('Testpass123', hasher.salt())
+            self.assertFalse(hasher.must_update(encoded))
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_hashing_uses_pool(self):
+        """Test that hashing is rejected while the pool is saturated"""
+        pool, release = saturated_pool()
+        try:
+            with patch('core.hashers.get_hashing_pool', return_value=pool):
+                with self.assertRaises(HashingUnavailable):
+                    make_password('Testpass123')
+        finally:
+            release.set()
+
+
+@override_settings(PASSWORD_HASHERS=POOLED_HASHERS)
+class HashingUnavailableMiddlewareTests(TestCase):
+    """Test views outside DRF while password hashing is saturated"""
+
+    def test_admin_login_busy_hashing(self):
+        """Test that an admin login is answered with 429, not 500"""
+        get_user_model().objects.create_superuser(
+            'admin@gmail.com', 'Testpass123'
+        )
+
+        with patch('core.hashers.HashingPool.run') as run:
+            run.side_effect = HashingUnavailable(wait=2)
+            res = self.client.post(reverse('admin:login'), {
+                'username': 'admin@gmail.com', 'password': 'Testpass123'
+            })
+
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(res['Retry-After'], '2')
+        self.assertEqual(
+            res.content.decode(), 'Too many password checks in progress.'
+        )
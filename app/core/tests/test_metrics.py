@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+METRICS_URL = reverse('metrics')
+
+
+class MetricsApiTests(TestCase):
+    """Test the in-process metrics endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_metrics_require_staff(self):
+        """Test that regular users can't read the metrics"""
+        user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Password01'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_report_response_cache(self):
+        """Test that staff users get the response cache counters"""
+        admin = get_user_model().objects.create_superuser(
+            'admin@gmail.com', 'Password01'
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('hits', res.data['response_cache'])
+        self.assertIn('evictions', res.data['response_cache'])
+
+    def test_metrics_report_connection_reuse(self):
+        """Test that staff users get the database connection counters"""
+        admin = get_user_model().objects.create_superuser(
+            'admin@gmail.com', 'Password01'
+        )
+        self.client.force_authenticate(admin)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertIn('reuse_rate', res.data['db_connections'])
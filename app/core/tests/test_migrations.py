@@ -0,0 +1,59 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+MERGE_FROM = [('core', '0012_collectionversion')]
+MERGE_TO = [('core', '0014_unique_attribute_names')]
+
+
+class MergeDuplicateNamesMigrationTests(TransactionTestCase):
+    """Test merging tags and ingredients that only differ in case"""
+
+    def migrate(self, targets):
+        """Migrate the database and return the historical app registry"""
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_merged(self):
+        """Test that duplicates are merged into the oldest object"""
+        apps = self.migrate(MERGE_FROM)
+        User = apps.get_model('core', 'User')
+        Tag = apps.get_model('core', 'Tag')
+        Recipe = apps.get_model('core', 'Recipe')
+
+        user = User.objects.create(email='test@gmail.com')
+        other = User.objects.create(email='other@gmail.com')
+        keep = Tag.objects.create(user=user, name='Vegan')
+        duplicate = Tag.objects.create(user=user, name='VEGAN')
+        other_tag = Tag.objects.create(user=other, name='vegan')
+        both = Recipe.objects.create(
+            user=user, title='Salad', time_minutes=5, price=3
+        )
+        both.tags.add(keep, duplicate)
+        only_duplicate = Recipe.objects.create(
+            user=user, title='Soup', time_minutes=5, price=3
+        )
+        only_duplicate.tags.add(duplicate)
+
+        apps = self.migrate(MERGE_TO)
+        Tag = apps.get_model('core', 'Tag')
+        Recipe = apps.get_model('core', 'Recipe')
+
+        self.assertEqual(
+            sorted(Tag.objects.values_list('id', flat=True)),
+            sorted([keep.id, other_tag.id])
+        )
+        for recipe_id in (both.id, only_duplicate.id):
+            self.assertEqual(
+                list(Recipe.objects.get(id=recipe_id).tags.values_list(
+                    'id', flat=True
+                )),
+                [keep.id]
+            )
@@ -0,0 +1,116 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import profiling
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+class ProfileTests(SimpleTestCase):
+    """Test the timings of a request profile"""
+
+    def test_nested_measures_count_once(self):
+        """Test that nested blocks of one name are not counted twice"""
+        profile = profiling.Profile()
+
+        with profile.measure('serialize'):
+            with profile.measure('serialize'):
+                time.sleep(0.01)
+
+        self.assertGreaterEqual(profile.timings['serialize'], 0.01)
+        self.assertLess(profile.timings['serialize'], 0.02)
+
+    def test_measure_without_profile(self):
+        """Test that measuring outside a request does nothing"""
+        with profiling.measure('serialize'):
+            pass
+
+        self.assertIsNone(profiling.current_profile())
+
+    @override_settings(PROFILING_BUCKETS=[10, 100])
+    def test_route_stats(self):
+        """Test the histogram, averages and budget of a route"""
+        profiling.reset_route_stats()
+        for queries, total in [(2, 0.005), (4, 0.05), (6, 0.5)]:
+            profile = profiling.Profile()
+            profile.queries = queries
+            profiling.record_route('route list', profile, total, budget=4)
+
+        stats = profiling.route_stats()['route list']
+
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(
+            stats['histogram_ms'], {'10': 1, '100': 1, '+Inf': 1}
+        )
+        self.assertEqual(stats['queries_avg'], 4)
+        self.assertEqual(stats['queries_max'], 6)
+        self.assertEqual(stats['over_budget'], 1)
+        self.assertAlmostEqual(stats['avg_ms']['total'], 185)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Test the per request queries and timings"""
+
+    def setUp(self):
+        profiling.reset_route_stats()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Password01'
+        )
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.create(
+            user=self.user, title='Cake', time_minutes=10, price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Sweet'))
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        """Test that responses carry their queries and timings"""
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        metrics = res['Server-Timing'].split(', ')
+        names = [metric.split(';')[0] for metric in metrics]
+        self.assertEqual(names, ['db', 'serialize', 'render', 'total'])
+        self.assertIn('desc="4 queries"', metrics[0])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Test that the header is left out unless enabled"""
+        res = self.client.get(RECIPE_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(RECIPE_API_FAST_READS=False)
+    def test_route_stats_per_action(self):
+        """Test that requests are counted per route name and action"""
+        self.client.get(RECIPE_URL)
+        self.client.get(RECIPE_URL)
+        self.client.post(RECIPE_URL, {'title': 'Pie'})
+
+        stats = profiling.route_stats()
+
+        self.assertEqual(stats['recipe:recipe-list list']['requests'], 2)
+        self.assertEqual(stats['recipe:recipe-list list']['over_budget'], 0)
+        self.assertIn('serialize', stats['recipe:recipe-list list']['avg_ms'])
+        self.assertEqual(stats['recipe:recipe-list create']['requests'], 1)
+
+    def test_metrics_report_requests(self):
+        """Test that the route stats are reported by the metrics endpoint"""
+        admin = get_user_model().objects.create_superuser(
+            'admin@gmail.com', 'Password01'
+        )
+        self.client.force_authenticate(admin)
+
+        self.client.get(METRICS_URL)
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.data['requests']['metrics get']['requests'], 1)
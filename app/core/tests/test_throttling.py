@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from core.throttling import WriteRateThrottle
+
+
+class ScopedView:
+    """Stand in for a view declaring a throttle scope"""
+    throttle_scope = 'test'
+
+
+def make_request(method='post', address='10.0.0.1', **headers):
+    """Return a DRF request from an anonymous client at address"""
+    factory = APIRequestFactory()
+    request = getattr(factory, method)('/', REMOTE_ADDR=address, **headers)
+    request.user = AnonymousUser()
+    return request
+
+
+@override_settings(THROTTLE_RATES={'test': '3/min'})
+class WriteRateThrottleTests(SimpleTestCase):
+    """Test the sliding window write throttle"""
+
+    def setUp(self):
+        cache.clear()
+        self.now = 600.0
+
+    def allow(self, request=None, view=ScopedView()):
+        """Run a fresh throttle at the current time, return it and result"""
+        throttle = WriteRateThrottle()
+        with patch.object(WriteRateThrottle, 'timer', lambda _: self.now):
+            allowed = throttle.allow_request(request or make_request(), view)
+
+        return throttle, allowed
+
+    def test_limit_per_period(self):
+        """Test that writes past the rate are rejected"""
+        results = [self.allow()[1] for _ in range(4)]
+
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_reads_not_throttled(self):
+        """Test that safe methods are never counted"""
+        for _ in range(5):
+            self.assertTrue(self.allow(make_request('get'))[1])
+
+        self.assertTrue(self.allow()[1])
+
+    def test_clients_counted_apart(self):
+        """Test that each IP address has its own counter"""
+        for _ in range(3):
+            self.allow()
+
+        self.assertFalse(self.allow()[1])
+        self.assertTrue(self.allow(make_request(address='10.0.0.2'))[1])
+
+    def test_forwarded_for_not_trusted(self):
+        """Test that a spoofed X-Forwarded-For does not reset the bucket"""
+        for number in range(3):
+            self.allow(make_request(HTTP_X_FORWARDED_FOR=f'1.2.3.{number}'))
+
+        spoofed = make_request(HTTP_X_FORWARDED_FOR='5.6.7.8')
+        self.assertFalse(self.allow(spoofed)[1])
+
+    def test_rejection_not_counted(self):
+        """Test that rejected requests do not use up the next period"""
+        for _ in range(10):
+            throttle, _ = self.allow()
+
+        self.assertEqual(cache.get(f'{throttle.key}:10'), 3)
+        self.now += 120
+        self.assertTrue(self.allow()[1])
+
+    def test_previous_period_slides_out(self):
+        """Test that the previous period counts for its share of the window"""
+        for _ in range(3):
+            self.allow()
+
+        self.now += 60 + 10
+        throttle, allowed = self.allow()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 10)
+
+        self.now += 11
+        self.assertTrue(self.allow()[1])
+
+    def test_wait_until_next_period(self):
+        """Test that the wait covers the rest of a full period"""
+        for _ in range(3):
+            self.allow()
+
+        self.now += 15
+        throttle, allowed = self.allow()
+
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(throttle.wait(), 45 + 20)
+
+    @override_settings(THROTTLE_RATES={'test': ''})
+    def test_empty_rate_disables(self):
+        """Test that a scope without rate is not throttled"""
+        for _ in range(5):
+            self.assertTrue(self.allow()[1])
+
+    def test_view_without_scope(self):
+        """Test that views without throttle_scope are not throttled"""
+        for _ in range(5):
+            self.assertTrue(self.allow(view=object())[1])
@@ -0,0 +1,122 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.hashers import HashingUnavailable
+
+
+class WriteRateThrottle(SimpleRateThrottle):
+    """
+    Limit the write requests of a client per scope.
+
+    Views name their scope in throttle_scope and its rate, such as
+    '60/min', comes from the THROTTLE_RATES setting. Clients are told
+    apart by user id once authenticated and by IP address before that.
+    Reads are never throttled.
+
+    Each client has a counter per period in the cache configured by
+    THROTTLE_CACHE_ALIAS. A request is let through while the count of the
+    current period plus the share of the previous period still inside a
+    sliding period stays under the limit, which refills like a token
+    bucket. Counters only change through cache.add and cache.incr, which
+    are atomic in the shared backends, and a rejection reads the cache
+    without touching the database.
+    """
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+    timer = time.time
+
+    def __init__(self):
+        # The scope is only known once the view is, see allow_request
+        pass
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_rate(self):
+        return settings.THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+
+        self.scope = getattr(view, 'throttle_scope', None)
+        self.rate = self.get_rate() if self.scope else None
+        if not self.rate:
+            return True
+
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        self.now = self.timer()
+        period, elapsed = divmod(self.now, self.duration)
+        self.elapsed = elapsed / self.duration
+        current_key = f'{self.key}:{int(period)}'
+        previous_key = f'{self.key}:{int(period) - 1}'
+
+        counts = self.cache.get_many([current_key, previous_key])
+        self.previous = counts.get(previous_key, 0)
+        self.current = counts.get(current_key, 0)
+        if self.used() + 1 > self.num_requests:
+            return False
+
+        self.cache.add(current_key, 0, 2 * self.duration)
+        try:
+            self.current = self.cache.incr(current_key)
+        except ValueError:
+            # The counter expired between add and incr
+            self.cache.set(current_key, 1, 2 * self.duration)
+            self.current = 1
+
+        # Concurrent requests each get their own count back from incr, so
+        # only those within the limit pass
+        return self.used() <= self.num_requests
+
+    def used(self):
+        """Return the requests counted in the sliding period"""
+        return self.previous * (1 - self.elapsed) + self.current
+
+    def wait(self):
+        """Return the seconds until the next request would be let through"""
+        remaining = self.duration * (1 - self.elapsed)
+        if self.current >= self.num_requests:
+            # Wait for the next period, then for the current one to slide
+            # far enough out of the window
+            slide = 1 - (self.num_requests - 1) / self.current
+            return remaining + self.duration * slide
+
+        if not self.previous:
+            return remaining
+
+        free = self.num_requests - 1 - self.current
+        slide = (1 - self.elapsed) - free / self.previous
+        return max(self.duration * slide, 0)
+
+
+class HashingUnavailableMixin:
+    """
+    APIView mixin answering with 429 while password hashing is saturated.
+
+    The hasher raises a plain HashingUnavailable, turned into Throttled
+    here so the response is rendered like the one of a throttle.
+    """
+
+    def handle_exception(self, exc):
+        if isinstance(exc, HashingUnavailable):
+            exc = Throttled(
+                wait=exc.wait, detail=str(exc.message),
+                code='hashing_unavailable'
+            )
+
+        return super().handle_exception(exc)
@@ -0,0 +1,16 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import metrics
+from core.authentication import CachedTokenAuthentication
+
+
+class MetricsView(APIView):
+    """Report in-process metrics to staff users"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        """Return the metrics of every registered collector"""
+        return Response(metrics.collect())
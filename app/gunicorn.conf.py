@@ -0,0 +1,64 @@
+"""
+Gunicorn configuration for serving the app in production.
+
+Start it from the project directory with:
+
+    gunicorn app.wsgi
+
+Every value can be overridden from the environment. The app is loaded
+once in the master before forking (preload), so workers share the
+imported code pages. Preloaded code is not reloaded by SIGHUP, so deploy
+new code by sending SIGUSR2 to start a new master and then SIGQUIT to
+the old one. SIGHUP still gracefully restarts the workers to pick up
+configuration changes.
+
+Set GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker together with
+app.asgi:application to serve the ASGI application instead.
+
+Password hashing runs on a small thread pool per worker, sized from
+GUNICORN_WORKERS so the workers share the cores instead of each starting
+a thread per core. It only limits concurrent hashes with GUNICORN_THREADS
+above 1 or ASGI workers; raise PASSWORD_HASHING_THREADS when running few
+workers.
+"""
+
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    """Return an integer environment variable or default"""
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Requests mostly wait on PostgreSQL, so run more workers than cores
+workers = env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = env_int('GUNICORN_THREADS', 1)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true')
+
+# Workers silent for longer than timeout are killed and replaced, on
+# restart they get graceful_timeout to finish the requests in flight
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers now and then so slow leaks can't grow unbounded, the
+# jitter keeps them from restarting all at once
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    """Close master connections so forked workers never share a socket"""
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.close()
@@ -3,3 +3,12 @@ from django.apps import AppConfig
 
 class RecipeConfig(AppConfig):
     name = 'recipe'
+
+    def ready(self):
+        from core import metrics
+        from recipe import signals  # noqa
+        from recipe.cache import get_response_cache
+
+        metrics.register(
+            'response_cache', lambda: get_response_cache().stats()
+        )
@@ -0,0 +1,89 @@
+from django.db import connection
+from django.db.models.functions import Lower
+
+from recipe.versions import bump_collection_versions
+
+
+def unique_names(names):
+    """Return names without case insensitive repeats, keeping the first"""
+    seen = {}
+    for name in names:
+        seen.setdefault(name.lower(), name)
+
+    return list(seen.values())
+
+
+def find_names(model, user, names):
+    """Return a map of lower cased name to (id, name) of existing objects"""
+    rows = model.objects.filter(user=user).annotate(
+        lower_name=Lower('name')
+    ).filter(
+        lower_name__in=[name.lower() for name in names]
+    ).values_list('id', 'name')
+
+    return {name.lower(): (pk, name) for pk, name in rows}
+
+
+def insert_names_postgresql(model, user, names):
+    """Insert missing names and read existing ones in one statement"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    values = ', '.join(['(%s)'] * len(names))
+    sql = f"""
+        WITH input (name) AS (VALUES {values}),
+        inserted AS (
+            INSERT INTO {table} (user_id, name, recipe_count)
+            SELECT %s, name, 0 FROM input
+            ON CONFLICT (user_id, (LOWER(name))) DO NOTHING
+            RETURNING id, name
+        )
+        SELECT id, name, TRUE FROM inserted
+        UNION ALL
+        SELECT t.id, t.name, FALSE FROM {table} t
+        JOIN input ON LOWER(t.name) = LOWER(input.name)
+        WHERE t.user_id = %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*names, user.id, user.id])
+        rows = cursor.fetchall()
+
+    found = {name.lower(): (pk, name) for pk, name, _ in rows}
+    created = any(inserted for _, _, inserted in rows)
+    return found, created
+
+
+def upsert_names(model, user, names, collection):
+    """
+    Return the (id, name) of a user's tags or ingredients, creating any
+    that are missing.
+
+    Names are matched ignoring case and the results follow the order of
+    names, without repeats. PostgreSQL does it in one round trip with
+    INSERT ... ON CONFLICT DO NOTHING, other databases look names up
+    around an insert ignoring conflicts. The version of collection is
+    bumped when anything was created, as raw inserts send no signals.
+    """
+    names = unique_names(names)
+    if not names:
+        return []
+
+    if connection.vendor == 'postgresql':
+        found, created = insert_names_postgresql(model, user, names)
+    else:
+        found = find_names(model, user, names)
+        missing = [name for name in names if name.lower() not in found]
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True
+        )
+        created = bool(missing)
+
+    missing = [name for name in names if name.lower() not in found]
+    if missing:
+        # Created by a concurrent transaction after our snapshot was taken
+        # on PostgreSQL, or inserted above without returning ids elsewhere
+        found.update(find_names(model, user, missing))
+
+    if created:
+        bump_collection_versions(user.id, collection)
+
+    return [found[name.lower()] for name in names]
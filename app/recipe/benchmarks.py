@@ -0,0 +1,83 @@
+from statistics import mean
+
+# Changes below these are noise on any machine
+MIN_LATENCY_DELTA_MS = 1.0
+MIN_MEMORY_DELTA_KB = 64
+
+
+def percentile(values, fraction):
+    """Return the value below which fraction of values fall"""
+    if not values:
+        return 0.0
+
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def router_endpoints(router):
+    """
+    Return (url name, method, action, detail) of every route of router.
+
+    Format suffix duplicates and the API root are left out.
+    """
+    endpoints = []
+    for pattern in router.urls:
+        actions = getattr(pattern.callback, 'actions', None)
+        if not actions or 'format' in pattern.pattern.regex.groupindex:
+            continue
+
+        detail = 'pk' in pattern.pattern.regex.groupindex
+        for method, action in actions.items():
+            endpoints.append((pattern.name, method, action, detail))
+
+    return endpoints
+
+
+def summarize(latencies, queries, peaks, statuses):
+    """Return the result of one endpoint, times in milliseconds"""
+    latencies = [latency * 1000 for latency in latencies]
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(mean(latencies), 3),
+        'queries_avg': round(mean(queries), 2),
+        'queries_max': max(queries),
+        'peak_memory_kb': round(max(peaks) / 1024, 1) if peaks else None,
+        'statuses': sorted(set(statuses)),
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Return the regressions of current against baseline results.
+
+    An endpoint regresses when its p95 latency or peak memory grew by more
+    than threshold, as a fraction, or when it runs more queries at most.
+    Each regression is a tuple of endpoint, metric, old and new value.
+    """
+    regressions = []
+    for name, result in current['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if before is None:
+            continue
+
+        old, new = before['p95_ms'], result['p95_ms']
+        if new > old * (1 + threshold) and new - old > MIN_LATENCY_DELTA_MS:
+            regressions.append((name, 'p95_ms', old, new))
+
+        if result['queries_max'] > before['queries_max']:
+            regressions.append((
+                name, 'queries_max', before['queries_max'],
+                result['queries_max']
+            ))
+
+        old, new = before['peak_memory_kb'], result['peak_memory_kb']
+        if old is not None and new is not None and \
+                new > old * (1 + threshold) and \
+                new - old > MIN_MEMORY_DELTA_KB:
+            regressions.append((name, 'peak_memory_kb', old, new))
+
+    return regressions
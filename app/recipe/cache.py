@@ -0,0 +1,42 @@
+import threading
+
+from django.conf import settings
+
+from core.cache import LRUCache
+
+_responses = None
+_responses_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Return the process wide cache of rendered responses"""
+    global _responses
+    if _responses is None:
+        with _responses_lock:
+            if _responses is None:
+                _responses = LRUCache(
+                    settings.RECIPE_RESPONSE_CACHE_SIZE,
+                    settings.RECIPE_RESPONSE_CACHE_TIMEOUT,
+                    settings.RECIPE_RESPONSE_CACHE_MAX_BYTES
+                )
+
+    return _responses
+
+
+def response_cache_key(version, action, path, media_type):
+    """
+    Return the cache key of a rendered response.
+
+    The key holds the collection version and its timestamp, so every write
+    bumping the version (see recipe.signals) moves readers to new keys and
+    the stale entries simply age out of the LRU.
+    """
+    return (
+        version.user_id,
+        version.collection,
+        version.version,
+        version.updated_at.timestamp(),
+        action,
+        path,
+        media_type,
+    )
@@ -0,0 +1,42 @@
+from django.conf import settings
+
+from recipe.renderers import encode_item
+from recipe.representations import recipe_rows, represent_recipes
+
+
+def export_chunks(queryset, chunk_size=None):
+    """
+    Yield lists of recipes with their tags and ingredients nested.
+
+    Rows are read from a server-side cursor where the database supports
+    one and relations are loaded once per chunk, so memory use depends on
+    the chunk size rather than on the number of recipes.
+    """
+    chunk_size = chunk_size or settings.RECIPE_EXPORT_CHUNK_SIZE
+    rows = recipe_rows(queryset).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield represent_recipes(chunk, detail=True)
+            chunk = []
+
+    if chunk:
+        yield represent_recipes(chunk, detail=True)
+
+
+def export_ndjson(queryset, chunk_size=None):
+    """Yield the recipes as newline delimited JSON, a chunk at a time"""
+    for chunk in export_chunks(queryset, chunk_size):
+        yield b''.join(encode_item(item) + b'\n' for item in chunk)
+
+
+def export_json(queryset, chunk_size=None):
+    """Yield the recipes as one JSON array, a chunk at a time"""
+    yield b'['
+    separator = b''
+    for chunk in export_chunks(queryset, chunk_size):
+        yield separator + b','.join(encode_item(item) for item in chunk)
+        separator = b','
+    yield b']'
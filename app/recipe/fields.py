@@ -0,0 +1,90 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field limited to objects owned by the requesting user.
+
+    With many=True all submitted keys are resolved together by
+    UserManyRelatedField. Resolved objects are cached in the serializer
+    context, so bulk writers can call preload() once for a whole batch
+    and have every item validated without further queries.
+    """
+
+    def get_queryset(self):
+        """Return the queryset scoped to the authenticated user"""
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is not None:
+            queryset = queryset.filter(user=request.user)
+
+        return queryset
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """Resolve lists of keys with UserManyRelatedField"""
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return UserManyRelatedField(**list_kwargs)
+
+    def get_object_cache(self):
+        """Return the context cache of resolved objects for this model"""
+        cache = self.context.setdefault('related_objects', {})
+        return cache.setdefault(self.get_queryset().model, {})
+
+    def to_pk(self, data):
+        """Convert submitted data to a primary key or return None"""
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, (dict, list)):
+            return None
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            return None
+
+    def preload(self, values):
+        """Fetch the objects for many submitted keys with one query"""
+        pks = {self.to_pk(value) for value in values}
+        pks.discard(None)
+
+        cache = self.get_object_cache()
+        missing = pks.difference(cache)
+        if missing:
+            cache.update(self.get_queryset().in_bulk(missing))
+
+        return cache
+
+
+class UserManyRelatedField(serializers.ManyRelatedField):
+    """Many related field resolving every key with one id__in query"""
+    default_error_messages = {
+        'does_not_exist': 'Invalid pks {pk_values} - objects do not exist.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = []
+        for item in data:
+            pk = self.child_relation.to_pk(item)
+            if pk is None:
+                self.child_relation.fail(
+                    'incorrect_type', data_type=type(item).__name__
+                )
+            pks.append(pk)
+
+        objects = self.child_relation.preload(pks)
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            self.fail('does_not_exist', pk_values=missing)
+
+        return [objects[pk] for pk in pks]
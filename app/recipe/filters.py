@@ -0,0 +1,137 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef
+from rest_framework.exceptions import ValidationError
+
+from core.models import Recipe
+
+MAX_FILTER_IDS = 100
+
+
+def parse_ids(params, name):
+    """Return the comma separated ids of a query parameter"""
+    value = params.get(name)
+    if not value:
+        return []
+
+    try:
+        ids = [int(part) for part in value.split(',')]
+    except ValueError:
+        raise ValidationError(
+            {name: 'Expected a comma separated list of ids.'}
+        )
+
+    if len(ids) > MAX_FILTER_IDS:
+        raise ValidationError(
+            {name: f'Ensure there are no more than {MAX_FILTER_IDS} ids.'}
+        )
+
+    return ids
+
+
+def parse_names(params, name, choices):
+    """Return the comma separated names of a query parameter, or None"""
+    value = params.get(name)
+    if value is None:
+        return None
+
+    names = [part.strip() for part in value.split(',') if part.strip()]
+    unknown = [part for part in names if part not in choices]
+    if unknown:
+        raise ValidationError({
+            name: f'Unknown names: {", ".join(unknown)}. '
+                  f'Expected any of: {", ".join(choices)}.'
+        })
+
+    return names
+
+
+def parse_number(params, name, convert):
+    """Return a query parameter converted to a number, or None"""
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+
+    try:
+        return convert(value)
+    except (ValueError, InvalidOperation):
+        raise ValidationError({name: 'Expected a number.'})
+
+
+def finite_decimal(value):
+    """Convert value to a Decimal, rejecting NaN and infinity"""
+    number = Decimal(value)
+    if not number.is_finite():
+        raise ValueError(f'{value} is not a finite number')
+
+    return number
+
+
+def related_exists(field_name, ids):
+    """Return an EXISTS over the through table of a recipe relation"""
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    column = field.m2m_reverse_field_name()
+
+    return Exists(through.objects.filter(
+        **{field.m2m_field_name(): OuterRef('pk'), f'{column}_id__in': ids}
+    ))
+
+
+def filter_related(queryset, params, field_name):
+    """Filter recipes related to any, or all, of the requested ids"""
+    ids = parse_ids(params, field_name)
+    if not ids:
+        return queryset
+
+    match = params.get(f'{field_name}_match', 'any')
+    if match == 'any':
+        return queryset.filter(related_exists(field_name, ids))
+    if match == 'all':
+        for pk in set(ids):
+            queryset = queryset.filter(related_exists(field_name, [pk]))
+        return queryset
+
+    raise ValidationError({f'{field_name}_match': 'Expected any or all.'})
+
+
+def filter_recipes(queryset, params):
+    """
+    Filter recipes from the query parameters of a list request.
+
+    Supports ``tags`` and ``ingredients`` id lists (with ``*_match`` set to
+    ``any`` or ``all``), ``min_time``/``max_time``, ``min_price``/
+    ``max_price`` and a ``title`` prefix. Relation filters use EXISTS on
+    the through tables so rows are never duplicated and no DISTINCT is
+    needed.
+    """
+    queryset = filter_related(queryset, params, 'tags')
+    queryset = filter_related(queryset, params, 'ingredients')
+
+    ranges = (
+        ('min_time', 'time_minutes__gte', int),
+        ('max_time', 'time_minutes__lte', int),
+        ('min_price', 'price__gte', finite_decimal),
+        ('max_price', 'price__lte', finite_decimal),
+    )
+    for name, lookup, convert in ranges:
+        value = parse_number(params, name, convert)
+        if value is not None:
+            queryset = queryset.filter(**{lookup: value})
+
+    title = params.get('title')
+    if title:
+        queryset = queryset.filter(title__startswith=title)
+
+    return queryset
+
+
+def filter_assigned(queryset, field_name):
+    """Keep only tags or ingredients used by at least one recipe"""
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    column = field.m2m_reverse_field_name()
+
+    return queryset.filter(
+        Exists(through.objects.filter(**{column: OuterRef('pk')}))
+    )
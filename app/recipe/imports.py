@@ -0,0 +1,244 @@
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+
+from core.models import Recipe
+from recipe.attributes import unique_names, upsert_names
+from recipe.search import is_postgresql, update_search_vectors
+from recipe.stats import deferred_summary_updates, \
+    record_created_values, summary_write
+from recipe.usage import record_added_relations
+from recipe.versions import bump_collection_versions, RECIPES, TAGS, \
+    INGREDIENTS
+
+RECIPE_COLUMNS = ('title', 'time_minutes', 'price', 'link')
+RELATION_FIELDS = ('tags', 'ingredients')
+COLLECTIONS = {'tags': TAGS, 'ingredients': INGREDIENTS}
+CSV_LIST_SEPARATOR = '|'
+
+
+def read_ndjson(stream):
+    """Yield one decoded object per non blank line of stream"""
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ValidationError(f'Invalid JSON: {exc}')
+
+
+def read_csv(stream):
+    """Yield one object per CSV row, splitting the relation columns"""
+    for row in csv.DictReader(stream):
+        for name in RELATION_FIELDS:
+            value = row.get(name) or ''
+            row[name] = [
+                part for part in value.split(CSV_LIST_SEPARATOR) if part
+            ]
+        yield row
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def clean_name(value, max_length):
+    """Return a tag or ingredient name from a string or exported object"""
+    if isinstance(value, dict):
+        value = value.get('name')
+    if not isinstance(value, str) or not value.strip():
+        raise ValidationError(f'Invalid name {value!r}.')
+
+    value = value.strip()
+    if len(value) > max_length:
+        raise ValidationError(
+            f'Name has more than {max_length} characters: {value[:20]!r}...'
+        )
+
+    return value
+
+
+def clean_record(data):
+    """
+    Validate one input record against the recipe model fields.
+
+    Returns a dict of column values plus the tag and ingredient names.
+    Raises ValidationError describing the first invalid value.
+    """
+    if isinstance(data, ValidationError):
+        raise data
+    if not isinstance(data, dict):
+        raise ValidationError('Expected an object.')
+
+    record = {}
+    for name in RECIPE_COLUMNS:
+        field = Recipe._meta.get_field(name)
+        value = data.get(name)
+        if value is None and field.blank:
+            value = ''
+        try:
+            record[name] = field.clean(value, None)
+        except ValidationError as exc:
+            raise ValidationError(f'{name}: {" ".join(exc.messages)}')
+
+    for name in RELATION_FIELDS:
+        values = data.get(name) or []
+        if not isinstance(values, list):
+            raise ValidationError(f'{name}: Expected a list of names.')
+        max_length = Recipe._meta.get_field(
+            name
+        ).related_model._meta.get_field('name').max_length
+        try:
+            record[name] = unique_names(
+                clean_name(value, max_length) for value in values
+            )
+        except ValidationError as exc:
+            raise ValidationError(f'{name}: {" ".join(exc.messages)}')
+
+    return record
+
+
+class RecipeImporter:
+    """
+    Write batches of cleaned records as recipes of one user.
+
+    Tag and ingredient names are resolved, ignoring case, through an
+    in-memory name to id map loaded once, so each name costs at most one
+    upsert for the whole import. Rows are written with bulk_create, or
+    with COPY on PostgreSQL when ``use_copy`` is set.
+    """
+
+    def __init__(self, user, use_copy=False):
+        self.user = user
+        self.use_copy = use_copy and is_postgresql()
+        self.names = {}
+        for name in RELATION_FIELDS:
+            model = Recipe._meta.get_field(name).related_model
+            names = {}
+            rows = model.objects.filter(
+                user=user
+            ).order_by('id').values_list('name', 'id')
+            for related_name, pk in rows.iterator():
+                names.setdefault(related_name.lower(), pk)
+            self.names[name] = names
+
+    def import_records(self, records):
+        """Save records in one transaction and return the rows written"""
+        if not records:
+            return 0
+
+        with summary_write(self.user.id):
+            for name in RELATION_FIELDS:
+                self.create_missing_names(name, records)
+            recipe_ids = self.insert_recipes(records)
+            rows = len(recipe_ids)
+            for name in RELATION_FIELDS:
+                rows += self.insert_relations(name, recipe_ids, records)
+
+            update_search_vectors(Recipe.objects.filter(id__in=recipe_ids))
+            bump_collection_versions(
+                self.user.id, RECIPES, TAGS, INGREDIENTS
+            )
+
+        return rows
+
+    def create_missing_names(self, field_name, records):
+        """Upsert the names of records missing from the name map"""
+        names = self.names[field_name]
+        missing = [
+            value for record in records for value in record[field_name]
+            if value.lower() not in names
+        ]
+        if not missing:
+            return
+
+        model = Recipe._meta.get_field(field_name).related_model
+        collection = COLLECTIONS[field_name]
+        for pk, name in upsert_names(model, self.user, missing, collection):
+            names[name.lower()] = pk
+
+    def insert_recipes(self, records):
+        """Insert the recipe rows and return their ids in record order"""
+        if self.use_copy:
+            recipe_ids = self.allocate_ids(Recipe, len(records))
+            self.copy_rows(Recipe, ('id', 'user_id') + RECIPE_COLUMNS, (
+                [pk, self.user.id] + [record[c] for c in RECIPE_COLUMNS]
+                for pk, record in zip(recipe_ids, records)
+            ))
+            self.record_stats(records)
+            return recipe_ids
+
+        recipes = [
+            Recipe(user=self.user, **{c: record[c] for c in RECIPE_COLUMNS})
+            for record in records
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+            self.record_stats(records)
+        else:
+            # Primary keys are needed to link the through table rows
+            with deferred_summary_updates():
+                for recipe in recipes:
+                    recipe.save()
+
+        return [recipe.id for recipe in recipes]
+
+    def record_stats(self, records):
+        """Add recipes written without signals to the stats summary"""
+        record_created_values(self.user.id, (
+            (record['price'], record['time_minutes']) for record in records
+        ))
+
+    def insert_relations(self, field_name, recipe_ids, records):
+        """Insert the through table rows of one relation"""
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        source = field.m2m_field_name() + '_id'
+        target = field.m2m_reverse_field_name() + '_id'
+        names = self.names[field_name]
+
+        rows = [
+            (recipe_id, names[value.lower()])
+            for recipe_id, record in zip(recipe_ids, records)
+            for value in record[field_name]
+        ]
+        if self.use_copy:
+            self.copy_rows(through, (source, target), rows)
+        else:
+            through.objects.bulk_create(
+                through(**{source: recipe_id, target: pk})
+                for recipe_id, pk in rows
+            )
+        record_added_relations(field_name, [pk for _, pk in rows])
+
+        return len(rows)
+
+    def allocate_ids(self, model, count):
+        """Reserve count primary keys from the sequence of model"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+                'FROM generate_series(1, %s)',
+                [model._meta.db_table, model._meta.pk.column, count]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def copy_rows(self, model, columns, rows):
+        """Load rows into the table of model with COPY ... FROM STDIN"""
+        # Strings are always quoted so COPY keeps empty ones apart from NULL
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(column) for column in columns)
+        )
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(sql, buffer)
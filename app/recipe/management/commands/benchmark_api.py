@@ -0,0 +1,268 @@
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.benchmarks import compare_results, router_endpoints, summarize
+from recipe.cache import get_response_cache
+from recipe.urls import app_name, router
+
+READ_METHODS = ('get', 'head', 'options')
+
+
+class Command(BaseCommand):
+    """Django command to measure every recipe API endpoint"""
+    help = (
+        'Send requests to every endpoint of the recipe router through '
+        "DRF's APIClient as a seeded user (see seed_benchmark) and report "
+        'p50/p95/p99 latency, queries per request and peak memory. Writes '
+        'are rolled back. Results can be saved as JSON and compared with '
+        'an earlier run to flag regressions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email', default='benchmark-0@example.com',
+            help='User sending the requests'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Timed requests per endpoint'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Untimed requests per endpoint before measuring'
+        )
+        parser.add_argument(
+            '--memory-requests', type=int, default=3,
+            help='Requests per endpoint traced for peak memory, separately '
+                 'from the timed ones as tracing slows them down'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Clear the response cache before every request'
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Host header of the requests, must be allowed'
+        )
+        parser.add_argument('--output', help='File to write results to')
+        parser.add_argument(
+            '--compare', help='Results of an earlier run to compare with'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Growth of p95 latency or peak memory, as a fraction, '
+                 'counted as a regression'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when a regression is found'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('Requests must be positive.')
+
+        try:
+            self.user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(
+                f'No user with email {options["email"]}, '
+                f'run seed_benchmark first.'
+            )
+
+        self.recipe = Recipe.objects.filter(user=self.user).first()
+        self.tag = Tag.objects.filter(user=self.user).first()
+        self.ingredient = Ingredient.objects.filter(user=self.user).first()
+        if not (self.recipe and self.tag and self.ingredient):
+            raise CommandError(
+                f'{options["email"]} needs recipes, tags and ingredients.'
+            )
+
+        token, _ = Token.objects.get_or_create(user=self.user)
+        self.client = APIClient(SERVER_NAME=options['host'])
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.names = count()
+        self.cold = options['cold']
+
+        results = {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'user': self.user.email,
+            'recipes': Recipe.objects.filter(user=self.user).count(),
+            'options': {
+                name: options[name]
+                for name in ('requests', 'warmup', 'memory_requests', 'cold')
+            },
+            'endpoints': {},
+        }
+
+        self.stdout.write(
+            f'{"endpoint":<40} {"p50":>9} {"p95":>9} {"p99":>9} '
+            f'{"queries":>8} {"memory":>10}'
+        )
+        # The benchmark would otherwise mostly measure the throttles
+        with override_settings(THROTTLE_RATES={}):
+            for endpoint in router_endpoints(router):
+                name, result = self.benchmark(endpoint, options)
+                results['endpoints'][name] = result
+                self.stdout.write(
+                    f'{name:<40} {result["p50_ms"]:>7.2f}ms '
+                    f'{result["p95_ms"]:>7.2f}ms {result["p99_ms"]:>7.2f}ms '
+                    f'{result["queries_max"]:>8} '
+                    f'{result["peak_memory_kb"] or 0:>8.0f}kB'
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
+
+        if options['compare']:
+            self.compare(results, options)
+
+    def benchmark(self, endpoint, options):
+        """Measure one endpoint and return its name and result"""
+        url_name, method, action, detail = endpoint
+        name = f'{method.upper()} {url_name} {action}'
+
+        for _ in range(options['warmup']):
+            self.request(endpoint)
+
+        latencies, queries, statuses = [], [], []
+        for _ in range(options['requests']):
+            latency, executed, status_code = self.request(endpoint)
+            latencies.append(latency)
+            queries.append(executed)
+            statuses.append(status_code)
+
+        peaks = []
+        for _ in range(options['memory_requests']):
+            tracemalloc.start()
+            try:
+                self.request(endpoint)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        return name, summarize(latencies, queries, peaks, statuses)
+
+    def request(self, endpoint):
+        """Send one request, return its duration, queries and status"""
+        url_name, method, action, detail = endpoint
+        kwargs, data = self.get_request_data(url_name, action)
+        url = reverse(f'{app_name}:{url_name}', kwargs=kwargs)
+        if self.cold:
+            get_response_cache().clear()
+
+        send = getattr(self.client, method)
+        with transaction.atomic(), \
+                CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if method in READ_METHODS:
+                response = send(url, data)
+            else:
+                response = send(url, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            duration = time.perf_counter() - started
+            # Writes leave the seeded data as it was
+            transaction.set_rollback(True)
+
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method.upper()} {url} answered {response.status_code}: '
+                f'{response.content[:200]}'
+            )
+
+        return duration, len(queries), response.status_code
+
+    def get_request_data(self, url_name, action):
+        """Return the URL kwargs and data of a request to an endpoint"""
+        basename = url_name.split('-')[0]
+        handler = getattr(self, f'data_{basename}_{action}', None)
+        if handler is not None:
+            return handler()
+
+        if action in ('list', 'export', 'stats'):
+            return {}, {}
+        if action == 'retrieve':
+            instance = getattr(self, basename)
+            return {'pk': instance.pk}, {}
+
+        raise CommandError(
+            f'No request data for {url_name} {action}, add a data_'
+            f'{basename}_{action} method to the benchmark.'
+        )
+
+    def recipe_payload(self):
+        """Return the data of a new recipe"""
+        return {
+            'title': f'Benchmark Recipe {next(self.names)}',
+            'time_minutes': 30,
+            'price': '12.50',
+            'tags': [self.tag.pk],
+            'ingredients': [self.ingredient.pk],
+        }
+
+    def data_tag_create(self):
+        return {}, {'name': f'Benchmark Tag {next(self.names)}'}
+
+    def data_ingredient_create(self):
+        return {}, {'name': f'Benchmark Ingredient {next(self.names)}'}
+
+    def data_recipe_create(self):
+        return {}, self.recipe_payload()
+
+    def data_recipe_update(self):
+        return {'pk': self.recipe.pk}, self.recipe_payload()
+
+    def data_recipe_partial_update(self):
+        return {'pk': self.recipe.pk}, {'title': 'Benchmark Title'}
+
+    def data_recipe_destroy(self):
+        return {'pk': self.recipe.pk}, {}
+
+    def data_recipe_search(self):
+        return {}, {'q': 'chicken'}
+
+    def data_recipe_bulk_create(self):
+        return {}, [self.recipe_payload() for _ in range(10)]
+
+    def data_recipe_bulk_update(self):
+        return {}, [{'id': self.recipe.pk, 'title': 'Benchmark Title'}]
+
+    def data_recipe_bulk_destroy(self):
+        return {}, {'ids': [self.recipe.pk]}
+
+    def compare(self, results, options):
+        """Report the regressions against the results of an earlier run"""
+        with open(options['compare']) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare_results(
+            baseline, results, options['threshold']
+        )
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(
+                f'No regressions against {options["compare"]}.'
+            ))
+            return
+
+        for name, metric, old, new in regressions:
+            self.stdout.write(self.style.WARNING(
+                f'{name}: {metric} {old} -> {new}'
+            ))
+        if options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regressions found.')
@@ -0,0 +1,136 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.representations import recipe_rows, represent_recipes
+from recipe.serializers import RecipeSerializer
+from recipe.views import relation_prefetches
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    """Compare the serializer and plain row paths of the recipe list"""
+    help = (
+        'Render recipe lists through RecipeSerializer and from plain rows '
+        'and report the time of both. Benchmark data is created inside a '
+        'transaction that is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+            help='Numbers of recipes to render'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per size, the fastest one is reported'
+        )
+        parser.add_argument(
+            '--relations', type=int, default=3,
+            help='Tags and ingredients assigned to every recipe'
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        if not sizes or sizes[0] < 1 or options['repeat'] < 1:
+            raise CommandError('Sizes and repeat must be positive.')
+
+        with transaction.atomic():
+            user = self.create_recipes(sizes[-1], options['relations'])
+            self.stdout.write(
+                f'{"recipes":>10} {"serializer":>12} {"rows":>12} '
+                f'{"speedup":>8}'
+            )
+            for size in sizes:
+                self.benchmark(user, size, options['repeat'])
+            transaction.set_rollback(True)
+
+    def create_recipes(self, count, relations):
+        """Create a throwaway user owning count recipes"""
+        user = get_user_model().objects.create_user(
+            f'benchmark-{uuid.uuid4().hex}@example.com', uuid.uuid4().hex
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag {i}') for i in range(relations * 4)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'Ingredient {i}')
+            for i in range(relations * 4)
+        )
+        if tags[0].pk is None:
+            tags = list(Tag.objects.filter(user=user))
+            ingredients = list(Ingredient.objects.filter(user=user))
+
+        for start in range(0, count, BATCH_SIZE):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    user=user,
+                    title=f'Recipe {i}',
+                    time_minutes=i % 120 + 1,
+                    price=f'{i % 100}.{i % 100:02d}'
+                )
+                for i in range(start, min(start + BATCH_SIZE, count))
+            )
+
+        for name, targets in (('tags', tags), ('ingredients', ingredients)):
+            field = Recipe._meta.get_field(name)
+            through = field.remote_field.through
+            target_column = field.m2m_reverse_field_name() + '_id'
+            recipe_ids = Recipe.objects.filter(
+                user=user
+            ).values_list('id', flat=True)
+            rows = []
+            for recipe_id in recipe_ids.iterator():
+                for offset in range(relations):
+                    target = targets[(recipe_id + offset) % len(targets)]
+                    rows.append(through(
+                        recipe_id=recipe_id, **{target_column: target.pk}
+                    ))
+                if len(rows) >= BATCH_SIZE:
+                    through.objects.bulk_create(rows)
+                    rows = []
+            through.objects.bulk_create(rows)
+
+        return user
+
+    def benchmark(self, user, size, repeat):
+        """Time both paths on the newest size recipes of user"""
+        renderer = JSONRenderer()
+        recipes = Recipe.objects.filter(user=user).order_by('-id')[:size]
+
+        def render_serializer():
+            queryset = recipes.prefetch_related(*relation_prefetches())
+            return renderer.render(
+                RecipeSerializer(queryset, many=True).data
+            )
+
+        def render_rows():
+            return renderer.render(represent_recipes(recipe_rows(recipes)))
+
+        slow, slow_content = self.best_of(render_serializer, repeat)
+        fast, fast_content = self.best_of(render_rows, repeat)
+        if slow_content != fast_content:
+            raise CommandError(f'Outputs differ for {size} recipes.')
+
+        self.stdout.write(
+            f'{size:>10} {slow * 1000:>10.1f}ms {fast * 1000:>10.1f}ms '
+            f'{slow / fast:>7.1f}x'
+        )
+
+    def best_of(self, render, repeat):
+        """Return the fastest duration of render and its output"""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = render()
+            duration = time.perf_counter() - start
+            if best is None or duration < best:
+                best = duration
+
+        return best, content
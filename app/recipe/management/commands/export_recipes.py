@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Recipe
+from recipe.export import export_json, export_ndjson
+
+EXPORTERS = {
+    'ndjson': export_ndjson,
+    'json': export_json,
+}
+
+
+class Command(BaseCommand):
+    """Django command to dump every recipe of a user"""
+    help = (
+        'Write all recipes of the user with the given email, with their '
+        'tags and ingredients nested, as NDJSON or a JSON array.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the recipe owner')
+        parser.add_argument(
+            '--format', choices=sorted(EXPORTERS), default='ndjson',
+            help='Output format, defaults to ndjson'
+        )
+        parser.add_argument(
+            '--output', help='File to write to, defaults to stdout'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Recipes read from the database at a time'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        recipes = Recipe.objects.filter(user=user).order_by('id')
+        content = EXPORTERS[options['format']](
+            recipes, options['chunk_size']
+        )
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for part in content:
+                    output.write(part)
+        else:
+            for part in content:
+                self.stdout.write(part.decode('utf-8'), ending='')
@@ -0,0 +1,144 @@
+import sys
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import ImportCheckpoint
+from recipe.imports import READERS, RecipeImporter, clean_record
+
+
+def load_checkpoint(user, name, source):
+    """Return the progress saved under a checkpoint name, if any"""
+    state = {'records': 0, 'rows': 0, 'errors': 0}
+    if not name:
+        return state
+
+    checkpoint = ImportCheckpoint.objects.filter(user=user, name=name).first()
+    if checkpoint is None:
+        return state
+    if checkpoint.source != source:
+        raise CommandError(
+            f'Checkpoint {name} belongs to {checkpoint.source}.'
+        )
+
+    return {field: getattr(checkpoint, field) for field in state}
+
+
+def save_checkpoint(user, name, source, state):
+    """Save the progress of an import under a checkpoint name"""
+    ImportCheckpoint.objects.update_or_create(
+        user=user, name=name, defaults={'source': source, **state}
+    )
+
+
+class Command(BaseCommand):
+    """Django command to load recipes of a user from NDJSON or CSV"""
+    help = (
+        'Import recipes with their tag and ingredient names for the user '
+        'with the given email. Input is read and written in chunks, one '
+        'transaction each. With --checkpoint the progress is saved in the '
+        'transaction of every chunk and an interrupted import resumes '
+        'where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the recipe owner')
+        parser.add_argument(
+            'source', help='NDJSON or CSV file to read, - for stdin'
+        )
+        parser.add_argument(
+            '--format', choices=sorted(READERS), default=None,
+            help='Input format, guessed from the file extension by default'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Records written per transaction'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Name under which the progress of the import is kept'
+        )
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Load rows with COPY when the database is PostgreSQL'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        source = options['source']
+        input_format = options['format']
+        if input_format is None:
+            input_format = 'csv' if source.endswith('.csv') else 'ndjson'
+        chunk_size = (
+            options['chunk_size'] or settings.RECIPE_IMPORT_CHUNK_SIZE
+        )
+        checkpoint = options['checkpoint']
+        state = load_checkpoint(user, checkpoint, source)
+
+        importer = RecipeImporter(user, use_copy=options['copy'])
+
+        if source == '-':
+            stream = sys.stdin
+        else:
+            stream = open(source, newline='', encoding='utf-8')
+
+        started = time.monotonic()
+        rows = 0
+        try:
+            records = READERS[input_format](stream)
+            skipped = state['records']
+            if skipped:
+                self.stdout.write(f'Resuming after {skipped} records.')
+                for _ in islice(records, skipped):
+                    pass
+
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+
+                valid = []
+                for number, data in enumerate(chunk, state['records'] + 1):
+                    try:
+                        valid.append(clean_record(data))
+                    except ValidationError as exc:
+                        state['errors'] += 1
+                        self.stderr.write(
+                            f'Record {number}: {" ".join(exc.messages)}'
+                        )
+
+                # The progress commits with the rows, so a resumed import
+                # never writes a chunk twice
+                with transaction.atomic():
+                    written = importer.import_records(valid)
+                    state['records'] += len(chunk)
+                    state['rows'] += written
+                    if checkpoint:
+                        save_checkpoint(user, checkpoint, source, state)
+                rows += written
+
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'{state["records"]} records read, {state["rows"]} '
+                    f'rows written ({rows / elapsed:.0f} rows/sec)'
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        rate = rows / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {state["rows"]} rows from {state["records"]} records '
+            f'with {state["errors"]} errors in {elapsed:.1f}s '
+            f'({rate:.0f} rows/sec).'
+        ))
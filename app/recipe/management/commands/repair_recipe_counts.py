@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from core.models import Ingredient, Tag
+from recipe.usage import recount_recipe_counts
+from recipe.versions import bump_collection_versions, RECIPES, TAGS, \
+    INGREDIENTS
+
+COLLECTIONS = ((Tag, TAGS), (Ingredient, INGREDIENTS))
+
+
+class Command(BaseCommand):
+    """Django command to fix drifted tag and ingredient recipe counts"""
+    help = (
+        'Compare the recipe_count of every tag and ingredient with its '
+        'rows in the recipe through tables, in batches by id, and recount '
+        'the ones that drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Tags or ingredients checked per query'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the drifted counts'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be positive.')
+
+        for model, collection in COLLECTIONS:
+            checked, drifted = self.repair(model, collection, options)
+            label = model._meta.verbose_name_plural
+            action = 'drifted' if options['dry_run'] else 'repaired'
+            self.stdout.write(
+                f'{label}: {checked} checked, {drifted} {action}.'
+            )
+
+    def repair(self, model, collection, options):
+        """Check every object of model, return the checked and drifted"""
+        checked = drifted = 0
+        last_id = 0
+        while True:
+            rows = list(model.objects.filter(id__gt=last_id).annotate(
+                actual=Count('recipe')
+            ).order_by('id').values_list(
+                'id', 'user_id', 'recipe_count', 'actual'
+            )[:options['batch_size']])
+            if not rows:
+                return checked, drifted
+
+            last_id = rows[-1][0]
+            checked += len(rows)
+            wrong = [row for row in rows if row[2] != row[3]]
+            drifted += len(wrong)
+            if wrong and not options['dry_run']:
+                with transaction.atomic():
+                    recount_recipe_counts(model.objects.filter(
+                        id__in=[row[0] for row in wrong]
+                    ))
+                    # Lists ordered by popularity may have changed, and
+                    # the top tags and ingredients of the recipe stats,
+                    # which are cached under the recipes version
+                    for user_id in sorted({row[1] for row in wrong}):
+                        bump_collection_versions(
+                            user_id, collection, RECIPES
+                        )
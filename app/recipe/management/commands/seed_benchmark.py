@@ -0,0 +1,216 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.search import update_search_vectors
+from recipe.usage import bulk_deleted_recipes, recount_recipe_counts
+
+ADJECTIVES = [
+    'Spicy', 'Creamy', 'Roasted', 'Grilled', 'Crispy', 'Smoky', 'Quick',
+    'Slow Cooked', 'Lemony', 'Garlic', 'Herbed', 'Sticky', 'Classic',
+]
+DISHES = [
+    'Chicken Curry', 'Tomato Soup', 'Beef Stew', 'Mushroom Risotto',
+    'Fish Tacos', 'Lentil Dahl', 'Pork Ramen', 'Veggie Lasagne',
+    'Salmon Bowl', 'Chocolate Cake', 'Apple Pie', 'Pad Thai',
+    'Caesar Salad', 'Banana Bread', 'Shakshuka', 'Paella',
+]
+TAGS = [
+    'Dinner', 'Lunch', 'Breakfast', 'Dessert', 'Vegan', 'Vegetarian',
+    'Gluten Free', 'Quick', 'Comfort Food', 'Healthy', 'Spicy', 'Baking',
+    'Budget', 'Party', 'Kids', 'One Pot',
+]
+INGREDIENTS = [
+    'Salt', 'Olive Oil', 'Garlic', 'Onion', 'Black Pepper', 'Butter',
+    'Egg', 'Flour', 'Sugar', 'Tomato', 'Lemon', 'Chicken', 'Rice',
+    'Milk', 'Ginger', 'Chilli', 'Carrot', 'Potato', 'Cheese', 'Basil',
+]
+
+
+def make_names(base, count):
+    """Return count distinct names, numbering them past the base list"""
+    return [
+        base[i] if i < len(base) else f'{base[i % len(base)]} {i}'
+        for i in range(count)
+    ]
+
+
+def pick(rng, items, weights, mean):
+    """Pick about mean distinct items, favouring the heavy ones"""
+    count = min(len(items), max(1, round(rng.expovariate(1 / mean))))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(items, weights, k=count - len(chosen)))
+
+    return chosen
+
+
+class Command(BaseCommand):
+    """Django command to fill the database with benchmark data"""
+    help = (
+        'Create users owning tags, ingredients and recipes for the API '
+        'benchmarks. Rows are written with bulk inserts. Recipes get a '
+        'varying number of tags and ingredients and a few popular ones '
+        'are used by most recipes, like salt in a real cookbook.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=10, help='Users to create'
+        )
+        parser.add_argument(
+            '--recipes', type=int, default=1000,
+            help='Recipes per user'
+        )
+        parser.add_argument(
+            '--tags', type=int, default=30, help='Tags per user'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=200,
+            help='Ingredients per user'
+        )
+        parser.add_argument(
+            '--tags-per-recipe', type=float, default=3,
+            help='Average number of tags of a recipe'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=float, default=8,
+            help='Average number of ingredients of a recipe'
+        )
+        parser.add_argument(
+            '--email-prefix', default='benchmark',
+            help='Users are called <prefix>-<n>@example.com'
+        )
+        parser.add_argument(
+            '--password', default='Benchmark123',
+            help='Password of every benchmark user'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows per INSERT, at most 500 on SQLite'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed, the same seed creates the same data'
+        )
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete the users of a previous run with the same prefix'
+        )
+
+    def handle(self, *args, **options):
+        counts = ('users', 'recipes', 'tags', 'ingredients')
+        if any(options[name] < 1 for name in counts):
+            raise CommandError(
+                'Users, recipes, tags and ingredients must be positive.'
+            )
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = options['email_prefix']
+        emails = [
+            f'{prefix}-{number}@example.com'
+            for number in range(options['users'])
+        ]
+        users = get_user_model().objects.filter(email__in=emails)
+        if options['clear']:
+            with transaction.atomic(), bulk_deleted_recipes(
+                Recipe.objects.filter(user__in=users)
+            ):
+                users.delete()
+        elif users.exists():
+            raise CommandError(
+                f'Benchmark users {prefix}-*@example.com exist, '
+                f'use --clear to replace them.'
+            )
+
+        started = time.monotonic()
+        # Hashing once keeps seeding fast with any hasher
+        password = make_password(options['password'])
+        for email in emails:
+            with transaction.atomic():
+                self.seed_user(email, password, options)
+            self.stdout.write(f'Seeded {email}')
+
+        rows = options['users'] * options['recipes']
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {options["users"]} users with {rows} recipes '
+            f'in {elapsed:.1f}s.'
+        ))
+
+    def seed_user(self, email, password, options):
+        """Create one user with its tags, ingredients and recipes"""
+        user = get_user_model().objects.create(
+            email=email, name=email.split('@')[0], password=password
+        )
+        tag_ids = self.create_names(
+            Tag, user, make_names(TAGS, options['tags'])
+        )
+        ingredient_ids = self.create_names(
+            Ingredient, user, make_names(INGREDIENTS, options['ingredients'])
+        )
+
+        rng = self.rng
+        recipes = [
+            Recipe(
+                user=user,
+                title=f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}',
+                time_minutes=rng.randint(5, 240),
+                price=f'{rng.uniform(1, 60):.2f}',
+            )
+            for _ in range(options['recipes'])
+        ]
+        Recipe.objects.bulk_create(recipes, batch_size=self.batch_size)
+        recipe_ids = list(
+            Recipe.objects.filter(user=user).values_list('id', flat=True)
+        )
+
+        for name, target_ids, mean in (
+            ('tags', tag_ids, options['tags_per_recipe']),
+            ('ingredients', ingredient_ids,
+             options['ingredients_per_recipe']),
+        ):
+            self.create_relations(name, recipe_ids, target_ids, mean)
+        for model in (Tag, Ingredient):
+            recount_recipe_counts(model.objects.filter(user=user))
+
+        # The user is new, so no cached response or validator is stale
+        update_search_vectors(Recipe.objects.filter(user=user))
+
+    def create_names(self, model, user, names):
+        """Bulk create the tags or ingredients of user and return their ids"""
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in names],
+            batch_size=self.batch_size
+        )
+
+        return list(
+            model.objects.filter(user=user).order_by('id').values_list(
+                'id', flat=True
+            )
+        )
+
+    def create_relations(self, field_name, recipe_ids, target_ids, mean):
+        """Link every recipe to about mean targets, skewed to the first"""
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        target_column = field.m2m_reverse_field_name() + '_id'
+        # Zipf like popularity, the first names are used the most
+        weights = [1 / rank for rank in range(1, len(target_ids) + 1)]
+
+        rows = []
+        for recipe_id in recipe_ids:
+            for target_id in pick(self.rng, target_ids, weights, mean):
+                rows.append(through(
+                    recipe_id=recipe_id, **{target_column: target_id}
+                ))
+            if len(rows) >= self.batch_size:
+                through.objects.bulk_create(rows)
+                rows = []
+        through.objects.bulk_create(rows)
@@ -0,0 +1,175 @@
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from core.profiling import measure
+from recipe.cache import get_response_cache, response_cache_key
+from recipe.versions import get_collection_version
+
+
+class ConditionalGetMixin:
+    """
+    Answer conditional list and detail requests from version counters.
+
+    The strong ETag is derived from the version of the viewset's
+    ``version_collection`` for the user plus the request path, query and
+    negotiated media type. A matching If-None-Match is answered with 304
+    before the queryset is built. Last-Modified is sent for information
+    only: it has whole second precision, so a change within the second of
+    an earlier response would pass an If-Modified-Since check.
+    """
+    version_collection = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_etag(self, version):
+        """Return the strong ETag of the current request"""
+        parts = [
+            str(version.user_id),
+            version.collection,
+            str(version.version),
+            self.request.get_full_path(),
+            self.request.accepted_media_type or '',
+        ]
+        digest = hashlib.sha1('\n'.join(parts).encode()).hexdigest()
+
+        return quote_etag(digest)
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        """Return 304 when the client copy is current, else call handler"""
+        version = get_collection_version(
+            request.user, self.version_collection
+        )
+        etag = self.get_etag(version)
+        last_modified = timegm(version.updated_at.utctimetuple())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.get_fresh_response(
+                version, handler, request, *args, **kwargs
+            )
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+
+        return response
+
+    def get_fresh_response(self, version, handler, request, *args, **kwargs):
+        """Return the full response when the client copy is stale"""
+        return handler(request, *args, **kwargs)
+
+
+class CachedResponseMixin(ConditionalGetMixin):
+    """
+    Serve list and detail responses from a per-process LRU cache.
+
+    Rendered JSON bodies are keyed by user, collection version, action,
+    request path with query and media type. Only successful responses up
+    to RECIPE_RESPONSE_CACHE_MAX_ENTRY_BYTES are stored, and the bodies
+    held by a process never total more than RECIPE_RESPONSE_CACHE_MAX_BYTES.
+    """
+
+    def get_fresh_response(self, version, handler, request, *args, **kwargs):
+        # Browsable API pages embed per request state such as CSRF tokens
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        cache = get_response_cache()
+        key = response_cache_key(
+            version,
+            self.action,
+            request.get_full_path(),
+            request.accepted_media_type
+        )
+
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        with measure('render'):
+            response.render()
+
+        max_bytes = settings.RECIPE_RESPONSE_CACHE_MAX_ENTRY_BYTES
+        if len(response.content) <= max_bytes:
+            cache.set(
+                key,
+                (response.content, response['Content-Type']),
+                len(response.content)
+            )
+
+        return response
+
+
+class FastReadMixin:
+    """
+    List and retrieve from plain rows instead of model instances.
+
+    Viewsets provide ``get_rows`` to turn their queryset into a values
+    queryset and ``represent_rows`` to build the output the serializer
+    would have produced. RECIPE_API_FAST_READS switches back to the
+    serializer path.
+    """
+
+    def use_fast_reads(self):
+        """Return True when responses are built from plain rows"""
+        return settings.RECIPE_API_FAST_READS
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_reads():
+            return super().list(request, *args, **kwargs)
+
+        rows = self.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.timed_represent(page))
+
+        return Response(self.timed_represent(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_reads():
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = self.get_rows(self.filter_queryset(self.get_queryset()))
+        row = get_object_or_404(
+            rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+        return Response(self.timed_represent([row])[0])
+
+    def get_rows(self, queryset):
+        """Return queryset as a values queryset"""
+        raise NotImplementedError('get_rows() must be implemented.')
+
+    def represent_rows(self, rows):
+        """Return the representation of every row"""
+        raise NotImplementedError('represent_rows() must be implemented.')
+
+    def timed_represent(self, rows):
+        """Return represent_rows(rows), timed as serialization"""
+        with measure('serialize'):
+            return self.represent_rows(rows)
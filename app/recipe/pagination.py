@@ -0,0 +1,145 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """Keyset pagination with page size limits taken from settings"""
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = settings.RECIPE_API_PAGE_SIZE
+        self.max_page_size = settings.RECIPE_API_MAX_PAGE_SIZE
+
+
+class KeysetCursorPagination(BaseCursorPagination):
+    """
+    Cursor pagination positioned on every field of the ordering.
+
+    CursorPagination positions its cursor on the first ordering field and
+    steps over rows sharing that value with an offset capped at
+    offset_cutoff, so a long run of ties, such as unused tags all with a
+    recipe_count of 0, could never be paged past. Here the cursor holds
+    the value of each ordering field and a page starts strictly after
+    that row, so the ordering must end with a unique field.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_after(ordering, position))
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_after(self, ordering, position):
+        """Return a filter of the rows following position in ordering"""
+        values = json.loads(position)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise ValueError('Cursor does not match the ordering.')
+
+        conditions = []
+        for index, name in enumerate(ordering):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            equal = {
+                other.lstrip('-'): value
+                for other, value in zip(ordering[:index], values)
+            }
+            conditions.append(
+                Q(**equal, **{f'{field}__{lookup}': values[index]})
+            )
+
+        return reduce(or_, conditions)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(
+                self.page[-1], self.ordering
+            )
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(
+                self.page[0], self.ordering
+            )
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=position)
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for name in ordering:
+            field = name.lstrip('-')
+            if isinstance(instance, dict):
+                values.append(instance[field])
+            else:
+                values.append(getattr(instance, field))
+
+        return json.dumps(values)
+
+
+class RecipeAttributeCursorPagination(KeysetCursorPagination):
+    """Paginate tags and ingredients in the ordering of their view"""
+    ordering = ('-name', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        if hasattr(view, 'get_ordering'):
+            return view.get_ordering()
+
+        return super().get_ordering(request, queryset, view)
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginate recipes by id, most recently created first"""
+    ordering = ('-id',)
@@ -0,0 +1,27 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+
+def encode_item(item):
+    """Return the compact UTF-8 JSON encoding of one item"""
+    return json.dumps(
+        item,
+        cls=encoders.JSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':')
+    ).encode('utf-8')
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render data as newline delimited JSON, one object per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return encode_item(data) + b'\n'
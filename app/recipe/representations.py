@@ -0,0 +1,116 @@
+from decimal import Decimal, getcontext
+
+from rest_framework.settings import api_settings
+
+from core.models import Recipe
+
+RECIPE_COLUMNS = ('id', 'title', 'time_minutes', 'price', 'link')
+RELATION_FIELDS = ('ingredients', 'tags')
+# Output order of RecipeSerializer
+RECIPE_FIELDS = (
+    'id', 'title', 'ingredients', 'tags', 'time_minutes', 'price', 'link'
+)
+
+
+def price_formatter():
+    """Return a function rendering prices like DRF's DecimalField"""
+    field = Recipe._meta.get_field('price')
+    quantum = Decimal('.1') ** field.decimal_places
+    context = getcontext().copy()
+    context.prec = field.max_digits
+    coerce_to_string = api_settings.COERCE_DECIMAL_TO_STRING
+
+    def format_price(value):
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value).strip())
+        quantized = value.quantize(quantum, context=context)
+        if not coerce_to_string:
+            return quantized
+        return '{:f}'.format(quantized)
+
+    return format_price
+
+
+def recipe_rows(queryset, fields=None):
+    """Return a queryset of the plain column values of recipes"""
+    columns = [
+        column for column in RECIPE_COLUMNS
+        if fields is None or column in fields
+    ]
+    return queryset.prefetch_related(None).values(*columns)
+
+
+def related_values(field_name, recipe_ids, detail=False):
+    """
+    Return the related values of every recipe from one through query.
+
+    Values are grouped by recipe id and ordered by related id, matching
+    the prefetches of the model serializer path. With detail set each
+    value is an ``{'id', 'name'}`` dict instead of a bare id.
+    """
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name() + '_id'
+    target = field.m2m_reverse_field_name()
+
+    columns = [source, target + '_id']
+    if detail:
+        columns.append(target + '__name')
+
+    rows = through.objects.filter(
+        **{source + '__in': recipe_ids}
+    ).order_by(source, target + '_id').values_list(*columns)
+
+    grouped = {}
+    for row in rows:
+        if detail:
+            value = {'id': row[1], 'name': row[2]}
+        else:
+            value = row[1]
+        grouped.setdefault(row[0], []).append(value)
+
+    return grouped
+
+
+def represent_recipes(rows, detail=False, fields=None, expand=None):
+    """
+    Build recipe representations straight from database rows.
+
+    The output is identical to ``RecipeSerializer`` (or to
+    ``RecipeDetailSerializer`` with detail set) for the same recipes, but
+    skips field introspection and per field method calls. ``fields`` and
+    ``expand`` narrow it like the ones in the serializer context: only
+    the named fields are built, and only expanded relations are nested.
+    """
+    if expand is None:
+        expand = RELATION_FIELDS if detail else ()
+    selected = [
+        name for name in RECIPE_FIELDS if fields is None or name in fields
+    ]
+
+    rows = list(rows)
+    recipe_ids = [row['id'] for row in rows]
+    relations = {
+        name: related_values(name, recipe_ids, name in expand) if rows else {}
+        for name in RELATION_FIELDS if name in selected
+    }
+    format_price = price_formatter()
+
+    results = []
+    for row in rows:
+        recipe = {}
+        for name in selected:
+            if name in relations:
+                recipe[name] = relations[name].get(row['id'], [])
+            elif name == 'price':
+                recipe[name] = format_price(row[name])
+            else:
+                recipe[name] = row[name]
+        results.append(recipe)
+
+    return results
+
+
+def represent_attributes(rows):
+    """Build tag or ingredient representations from database rows"""
+    return [{'id': row['id'], 'name': row['name']} for row in rows]
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+    SearchVector, TrigramSimilarity
+from django.db import connection
+from django.db.models import BooleanField, Exists, F, Func, OuterRef, Q, \
+    Subquery, TextField, Value
+
+from core.models import Recipe
+
+SEARCH_CONFIG = 'english'
+
+
+class StringAgg(Func):
+    """Concatenate the values of a column separated by spaces"""
+    function = 'STRING_AGG'
+    template = "%(function)s(%(expressions)s, ' ')"
+    output_field = TextField()
+
+
+class TrigramSimilar(Func):
+    """Test a column against text with pg_trgm's % operator"""
+    arg_joiner = ' %% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def is_postgresql():
+    """Return True when the default database is PostgreSQL"""
+    return connection.vendor == 'postgresql'
+
+
+def trigram_available():
+    """Return True when the pg_trgm extension is installed"""
+    if not is_postgresql():
+        return False
+
+    if not hasattr(connection, '_pg_trgm_installed'):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            connection._pg_trgm_installed = cursor.fetchone() is not None
+
+    return connection._pg_trgm_installed
+
+
+def related_names(field_name):
+    """Return a subquery joining the names related to the outer recipe"""
+    field = Recipe._meta.get_field(field_name)
+    model = field.related_model
+    names = model.objects.filter(
+        **{field.related_query_name(): OuterRef('pk')}
+    ).order_by().values(field.related_query_name()).annotate(
+        names=StringAgg('name')
+    ).values('names')
+
+    return Subquery(names, output_field=TextField())
+
+
+def search_vector():
+    """Return the expression computing a recipe search vector"""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector(related_names('tags'), weight='B',
+                     config=SEARCH_CONFIG) +
+        SearchVector(related_names('ingredients'), weight='B',
+                     config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(recipes):
+    """Recompute the search vector of a queryset of recipes in one UPDATE"""
+    if is_postgresql():
+        recipes.update(search_vector=search_vector())
+
+
+def search_recipes(queryset, text):
+    """
+    Return recipes matching text, best matches first.
+
+    On PostgreSQL recipes are ranked against the maintained search vector,
+    falling back to trigram similarity on the title to catch typos when
+    nothing matches. Other databases get a case insensitive substring
+    search over the title, tag and ingredient names.
+    """
+    limit = settings.RECIPE_SEARCH_MAX_RESULTS
+
+    if not is_postgresql():
+        return queryset.annotate(
+            tag_match=Exists(Recipe.tags.through.objects.filter(
+                recipe_id=OuterRef('pk'), tag__name__icontains=text
+            )),
+            ingredient_match=Exists(Recipe.ingredients.through.objects.filter(
+                recipe_id=OuterRef('pk'), ingredient__name__icontains=text
+            ))
+        ).filter(
+            Q(title__icontains=text) | Q(tag_match=True) |
+            Q(ingredient_match=True)
+        ).order_by('-id')[:limit]
+
+    query = SearchQuery(text, config=SEARCH_CONFIG)
+    results = queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-id')[:limit]
+
+    if trigram_available() and not results.exists():
+        results = queryset.filter(
+            TrigramSimilar(F('title'), Value(text))
+        ).annotate(
+            similarity=TrigramSimilarity('title', Value(text))
+        ).order_by('-similarity', '-id')[:limit]
+
+    return results
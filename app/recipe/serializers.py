@@ -1,9 +1,69 @@
+from django.conf import settings
+from django.db import connection
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
 from core.models import Tag, Ingredient, Recipe
+from core.profiling import TimedSerializerMixin
+from recipe.fields import UserPrimaryKeyRelatedField
+from recipe.search import update_search_vectors
+from recipe.stats import deferred_summary_updates, record_saved_recipes
+from recipe.usage import record_added_relations, record_removed_relations
+from recipe.versions import bump_collection_versions, RECIPES, TAGS, \
+    INGREDIENTS
 
 
-class TagSerializer(serializers.ModelSerializer):
+class RecipeAttributeSerializer(TimedSerializerMixin,
+                                serializers.ModelSerializer):
+    """Base serializer for tags and ingredients, unique by name per user"""
+    default_error_messages = {
+        'duplicate_name': '{model_name} with this name already exists.',
+    }
+
+    def validate_name(self, value):
+        """Check that the user has no other object with this name"""
+        request = self.context.get('request')
+        if request is None:
+            return value
+
+        queryset = self.Meta.model.objects.filter(
+            user=request.user, name__iexact=value
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise serializers.ValidationError(
+                self.duplicate_name_message(), code='duplicate_name'
+            )
+
+        return value
+
+    def duplicate_name_message(self):
+        """Return the error message reported for a taken name"""
+        return self.error_messages['duplicate_name'].format(
+            model_name=self.Meta.model._meta.verbose_name
+        )
+
+
+class RecipeAttributeUpsertSerializer(serializers.Serializer):
+    """Serializer for a batch of tag or ingredient names to upsert"""
+    names = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False
+    )
+
+    def validate_names(self, value):
+        """Check that the batch is within the configured size"""
+        if len(value) > settings.RECIPE_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f'Ensure this list has no more than '
+                f'{settings.RECIPE_BULK_MAX_ITEMS} items.'
+            )
+
+        return value
+
+
+class TagSerializer(RecipeAttributeSerializer):
     """Serializer to manage tag object"""
 
     class Meta:
@@ -12,7 +72,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(RecipeAttributeSerializer):
     """Serializer for ingredient object"""
 
     class Meta:
@@ -21,13 +81,201 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeListSerializer(serializers.ListSerializer):
+    """
+    Serializer to write batches of recipes with bulk queries.
+
+    Items are validated one at a time. Unless the ``atomic`` context flag
+    is set, invalid items are collected in ``item_errors`` and left out of
+    ``validated_data`` so the valid ones can still be saved.
+    """
+    relation_fields = ('ingredients', 'tags')
+
+    default_error_messages = {
+        'max_length': 'Ensure this list has no more than {max_length} items.',
+        'not_found': 'Recipe not found.',
+        'duplicate': 'Recipe is listed more than once.',
+    }
+
+    def to_internal_value(self, data):
+        """Validate every item, reporting failures by list index"""
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        max_length = settings.RECIPE_BULK_MAX_ITEMS
+        if len(data) > max_length:
+            message = self.error_messages['max_length'].format(
+                max_length=max_length
+            )
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [message]
+            }, code='max_length')
+
+        instances = {}
+        if self.instance is not None:
+            instances = {recipe.id: recipe for recipe in self.instance}
+
+        self.preload_relations(data)
+
+        validated = []
+        errors = []
+        seen_ids = set()
+        for item in data:
+            try:
+                recipe_id = None
+                if self.instance is not None:
+                    recipe_id = self.get_item_id(item, instances, seen_ids)
+                attrs = self.child.run_validation(item)
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+                continue
+
+            if recipe_id is not None:
+                attrs['id'] = recipe_id
+            validated.append(attrs)
+            errors.append({})
+
+        if any(errors) and self.context.get('atomic', False):
+            raise serializers.ValidationError(errors)
+
+        self.item_errors = [
+            {'index': index, 'errors': error}
+            for index, error in enumerate(errors) if error
+        ]
+        return validated
+
+    def preload_relations(self, data):
+        """Resolve the related keys of every item with one query each"""
+        for name in self.relation_fields:
+            relation = getattr(self.child.fields[name], 'child_relation', None)
+            if not hasattr(relation, 'preload'):
+                continue
+
+            values = []
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                if isinstance(value, list):
+                    values.extend(value)
+            relation.preload(values)
+
+    def get_item_id(self, item, instances, seen_ids):
+        """Return the id of the recipe an update item refers to"""
+        try:
+            recipe_id = int(item.get('id'))
+        except (AttributeError, TypeError, ValueError):
+            recipe_id = None
+
+        if recipe_id not in instances:
+            raise serializers.ValidationError(
+                {'id': [self.error_messages['not_found']]}, code='not_found'
+            )
+        if recipe_id in seen_ids:
+            raise serializers.ValidationError(
+                {'id': [self.error_messages['duplicate']]}, code='duplicate'
+            )
+
+        seen_ids.add(recipe_id)
+        return recipe_id
+
+    def create(self, validated_data):
+        """Create all recipes and their relations with bulk inserts"""
+        relations = [
+            self.pop_relations(attrs) for attrs in validated_data
+        ]
+        recipes = [Recipe(**attrs) for attrs in validated_data]
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(
+                recipes, batch_size=settings.RECIPE_BULK_BATCH_SIZE
+            )
+            record_saved_recipes(recipes, created=True)
+        else:
+            # Without RETURNING support bulk_create can't set primary keys,
+            # which are needed to link the through table rows
+            with deferred_summary_updates():
+                for recipe in recipes:
+                    recipe.save()
+
+        self.set_relations(recipes, relations)
+        self.after_bulk_write(recipes)
+        return recipes
+
+    def update(self, instances, validated_data):
+        """Partially update recipes with one UPDATE per batch"""
+        instances = {recipe.id: recipe for recipe in instances}
+        recipes = []
+        relations = []
+        fields = set()
+
+        for attrs in validated_data:
+            recipe = instances[attrs.pop('id')]
+            relations.append(self.pop_relations(attrs))
+            for attr, value in attrs.items():
+                setattr(recipe, attr, value)
+            fields.update(attrs)
+            recipes.append(recipe)
+
+        if fields:
+            Recipe.objects.bulk_update(
+                recipes, fields, batch_size=settings.RECIPE_BULK_BATCH_SIZE
+            )
+            record_saved_recipes(recipes, created=False)
+
+        self.set_relations(recipes, relations, replace=True)
+        self.after_bulk_write(recipes)
+        return recipes
+
+    def after_bulk_write(self, recipes):
+        """Do the work signals would have done for single saves"""
+        update_search_vectors(
+            Recipe.objects.filter(id__in=[recipe.id for recipe in recipes])
+        )
+        for user_id in {recipe.user_id for recipe in recipes}:
+            bump_collection_versions(user_id, RECIPES, TAGS, INGREDIENTS)
+
+    def pop_relations(self, attrs):
+        """Remove and return the many to many values of an item"""
+        return {
+            name: attrs.pop(name)
+            for name in self.relation_fields if name in attrs
+        }
+
+    def set_relations(self, recipes, relations, replace=False):
+        """Write the through table rows for every recipe in one batch"""
+        for name in self.relation_fields:
+            field = Recipe._meta.get_field(name)
+            through = field.remote_field.through
+            target_column = field.m2m_reverse_field_name() + '_id'
+
+            recipe_ids = []
+            rows = []
+            for recipe, values in zip(recipes, relations):
+                if name not in values:
+                    continue
+                recipe_ids.append(recipe.id)
+                rows.extend(
+                    through(recipe_id=recipe.id, **{target_column: pk})
+                    for pk in {obj.pk for obj in values[name]}
+                )
+
+            if replace and recipe_ids:
+                record_removed_relations(name, recipe_ids)
+                through.objects.filter(recipe_id__in=recipe_ids).delete()
+            through.objects.bulk_create(
+                rows, batch_size=settings.RECIPE_BULK_BATCH_SIZE
+            )
+            record_added_relations(
+                name, [getattr(row, target_column) for row in rows]
+            )
+
+
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for recipe object"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -39,8 +287,53 @@ class RecipeSerializer(serializers.ModelSerializer):
             'price', 'link'
         ]
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
+
+    def get_fields(self):
+        """
+        Narrow the fields to the ``fields`` of the context and nest the
+        relations named in its ``expand``, sending ids for the others.
+        """
+        fields = super().get_fields()
+
+        expand = self.context.get('expand')
+        if expand is not None:
+            for name, nested in (('ingredients', IngredientSerializer),
+                                 ('tags', TagSerializer)):
+                if name in expand:
+                    fields[name] = nested(many=True, read_only=True)
+                else:
+                    fields[name] = serializers.PrimaryKeyRelatedField(
+                        many=True, read_only=True
+                    )
+
+        selected = self.context.get('fields')
+        if selected is not None:
+            for name in list(fields):
+                if name not in selected:
+                    del fields[name]
+
+        return fields
 
 
 class RecipeDetailSerializer(RecipeSerializer):
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+
+
+class RecipeBulkDeleteSerializer(serializers.Serializer):
+    """Serializer for the ids of recipes to delete in one request"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False
+    )
+
+    def validate_ids(self, value):
+        """Check that the batch is within the configured size"""
+        if len(value) > settings.RECIPE_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f'Ensure this list has no more than '
+                f'{settings.RECIPE_BULK_MAX_ITEMS} items.'
+            )
+
+        return value
@@ -0,0 +1,132 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+    pre_delete
+from django.conf import settings
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.search import update_search_vectors
+from recipe.stats import record_deleted_recipes, record_saved_recipes
+from recipe.usage import deleting_recipes_individually, record_m2m_change, \
+    uncount_linked
+from recipe.versions import bump_collection_versions, \
+    create_collection_versions, RECIPES, TAGS, INGREDIENTS
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_related_search_vectors(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """Refresh search vectors of recipes whose tags or ingredients change"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+        return
+
+    # From the tag or ingredient side the affected recipes are in pk_set,
+    # except for clear() where they have to be collected beforehand
+    if action == 'pre_clear':
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True)
+        )
+    elif action == 'post_clear':
+        recipe_ids = getattr(instance, '_search_recipe_ids', [])
+        update_search_vectors(Recipe.objects.filter(id__in=recipe_ids))
+    elif action in ('post_add', 'post_remove'):
+        update_search_vectors(Recipe.objects.filter(id__in=pk_set))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_renamed_search_vectors(sender, instance, created, **kwargs):
+    """Refresh search vectors of recipes using a renamed tag or ingredient"""
+    if not created:
+        update_search_vectors(
+            Recipe.objects.filter(id__in=instance.recipe_set.values('id'))
+        )
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def collect_deleted_search_recipes(sender, instance, **kwargs):
+    """Remember the recipes of a tag or ingredient about to be deleted"""
+    instance._search_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def update_deleted_search_vectors(sender, instance, **kwargs):
+    """Refresh search vectors of recipes that lost a tag or ingredient"""
+    recipe_ids = getattr(instance, '_search_recipe_ids', [])
+    if recipe_ids:
+        update_search_vectors(Recipe.objects.filter(id__in=recipe_ids))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_user_collection_versions(sender, instance, created, **kwargs):
+    """Start the collection versions of a new user"""
+    if created:
+        create_collection_versions(instance)
+
+
+@receiver(post_save, sender=Recipe)
+def bump_saved_recipe_version(sender, instance, **kwargs):
+    """Invalidate cached recipe lists when a recipe is saved"""
+    bump_collection_versions(instance.user_id, RECIPES)
+
+
+@receiver(post_delete, sender=Recipe)
+def bump_deleted_recipe_version(sender, instance, **kwargs):
+    """Invalidate recipe and attribute lists when a recipe is deleted"""
+    bump_collection_versions(instance.user_id, RECIPES, TAGS, INGREDIENTS)
+
+
+@receiver(post_save, sender=Recipe)
+def update_saved_recipe_summary(sender, instance, created, **kwargs):
+    """Apply a new or changed recipe to the stats summary of its owner"""
+    record_saved_recipes([instance], created)
+
+
+@receiver(post_delete, sender=Recipe)
+def update_deleted_recipe_summary(sender, instance, **kwargs):
+    """Take a deleted recipe out of the stats summary of its owner"""
+    record_deleted_recipes([instance])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_relation_recipe_counts(sender, instance, action, reverse,
+                                  pk_set, **kwargs):
+    """Keep recipe_count of tags and ingredients in step with M2M changes"""
+    field_name = 'tags' if sender is Recipe.tags.through else 'ingredients'
+    record_m2m_change(field_name, instance, action, reverse, pk_set)
+
+
+@receiver(pre_delete, sender=Recipe)
+def uncount_deleted_recipe_relations(sender, instance, **kwargs):
+    """Decrement recipe_count of the tags and ingredients of a recipe"""
+    if deleting_recipes_individually():
+        for field_name in ('tags', 'ingredients'):
+            uncount_linked(field_name, instance.pk)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_relation_versions(sender, instance, action, **kwargs):
+    """Invalidate recipes and the changed attribute list on M2M changes"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        attribute = TAGS if sender is Recipe.tags.through else INGREDIENTS
+        bump_collection_versions(instance.user_id, RECIPES, attribute)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def bump_tag_versions(sender, instance, **kwargs):
+    """Invalidate tag lists and recipes that may show the tag name"""
+    bump_collection_versions(instance.user_id, TAGS, RECIPES)
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def bump_ingredient_versions(sender, instance, **kwargs):
+    """Invalidate ingredient lists and recipes that may show the name"""
+    bump_collection_versions(instance.user_id, INGREDIENTS, RECIPES)
@@ -0,0 +1,310 @@
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DEFERRED, Case, Count, F, Max, Min, Q, Sum, \
+    Value, When
+
+from core.models import Recipe, RecipeSummary
+from recipe.representations import RELATION_FIELDS, price_formatter
+
+SUMMARY_FIELDS = [
+    'recipe_count', 'price_total', 'price_min', 'price_max',
+    'time_total', 'time_min', 'time_max',
+]
+
+_pending = threading.local()
+
+
+def recipe_aggregates(user):
+    """Return the summary figures of a user's recipes in one query"""
+    return Recipe.objects.filter(user=user).aggregate(
+        recipe_count=Count('id'),
+        price_total=Sum('price'),
+        price_min=Min('price'),
+        price_max=Max('price'),
+        time_total=Sum('time_minutes'),
+        time_min=Min('time_minutes'),
+        time_max=Max('time_minutes'),
+    )
+
+
+def top_attributes(field_name, user, limit):
+    """Return the tags or ingredients of user on the most recipes"""
+    model = Recipe._meta.get_field(field_name).related_model
+    rows = model.objects.filter(user=user, recipe_count__gt=0).order_by(
+        '-recipe_count', 'name'
+    ).values_list('id', 'name', 'recipe_count')[:limit]
+
+    return [
+        {'id': pk, 'name': name, 'recipes': count}
+        for pk, name, count in rows
+    ]
+
+
+def refresh_summary(user, exists):
+    """
+    Recompute the figures of user, keeping a summary when large.
+
+    A new summary row is inserted stale before the totals are taken, so a
+    recipe written meanwhile either commits before the locked aggregate
+    below or updates the row after it, and is never left out. Writers
+    apply their change in the transaction of the write (summary_write),
+    so one committed before the aggregate is not added again after it.
+    """
+    threshold = settings.RECIPE_STATS_SUMMARY_THRESHOLD
+    if not exists:
+        values = recipe_aggregates(user)
+        if values['recipe_count'] < threshold:
+            return values
+        RecipeSummary.objects.bulk_create(
+            [RecipeSummary(user=user, stale=True)], ignore_conflicts=True
+        )
+
+    with transaction.atomic():
+        # Writers wait on the row until the new totals are committed
+        summary = RecipeSummary.objects.select_for_update().filter(user=user)
+        summary.exists()
+        values = recipe_aggregates(user)
+        if values['recipe_count'] >= threshold:
+            summary.update(**values, stale=False)
+        else:
+            summary.delete()
+
+    return values
+
+
+def get_summary_values(user):
+    """
+    Return the summary figures of a user's recipes.
+
+    Accounts with at least RECIPE_STATS_SUMMARY_THRESHOLD recipes keep
+    them in a RecipeSummary row, updated from the recipe write signals and
+    the bulk write paths, so reading them does not scan the recipes.
+    Smaller accounts and stale summaries are aggregated from the recipes,
+    and the summary of an account back under the threshold is dropped.
+    """
+    summary = RecipeSummary.objects.filter(user=user).values(
+        *SUMMARY_FIELDS, 'stale'
+    ).first()
+    threshold = settings.RECIPE_STATS_SUMMARY_THRESHOLD
+    if summary is None or summary['stale'] or \
+            summary['recipe_count'] < threshold:
+        return refresh_summary(user, exists=summary is not None)
+
+    return summary
+
+
+def get_recipe_stats(user):
+    """Return the stats of a user's recipes as sent by the API"""
+    values = get_summary_values(user)
+    count = values['recipe_count']
+    format_price = price_formatter()
+
+    def price(value):
+        return None if value is None else format_price(value)
+
+    limit = settings.RECIPE_STATS_TOP
+    return {
+        'recipes': count,
+        'price': {
+            'avg': price(values['price_total'] / count) if count else None,
+            'min': price(values['price_min']),
+            'max': price(values['price_max']),
+        },
+        'time_minutes': {
+            'avg': round(values['time_total'] / count, 2) if count else None,
+            'min': values['time_min'],
+            'max': values['time_max'],
+        },
+        **{
+            f'top_{name}': top_attributes(name, user, limit)
+            for name in RELATION_FIELDS
+        },
+    }
+
+
+class SummaryChange:
+    """Recipes added to and removed from the summary of one user"""
+
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.stale = False
+
+    def merge(self, other):
+        self.added.extend(other.added)
+        self.removed.extend(other.removed)
+        self.stale = self.stale or other.stale
+
+    def get_updates(self):
+        """Return the update() arguments applying the change to a summary"""
+        updates = {}
+        if self.added or self.removed:
+            added_prices = [price for price, _ in self.added]
+            removed_prices = [price for price, _ in self.removed]
+            added_times = [time for _, time in self.added]
+            removed_times = [time for _, time in self.removed]
+            updates = {
+                'recipe_count': (
+                    F('recipe_count') + len(self.added) - len(self.removed)
+                ),
+                'price_total': (
+                    F('price_total') + sum(added_prices) - sum(removed_prices)
+                ),
+                'time_total': (
+                    F('time_total') + sum(added_times) - sum(removed_times)
+                ),
+            }
+
+        if self.added:
+            for name, lookup, value in (
+                ('price_min', 'gt', min(added_prices)),
+                ('price_max', 'lt', max(added_prices)),
+                ('time_min', 'gt', min(added_times)),
+                ('time_max', 'lt', max(added_times)),
+            ):
+                # Compared through lookups rather than LEAST and GREATEST,
+                # so SQLite compares decimals as numbers and not as text
+                updates[name] = Case(
+                    When(
+                        Q(**{f'{name}__isnull': True})
+                        | Q(**{f'{name}__{lookup}': value}),
+                        then=Value(value)
+                    ),
+                    default=F(name)
+                )
+
+        if self.stale:
+            updates['stale'] = True
+        elif self.removed:
+            # Removing a minimum or maximum leaves no way to know the next
+            # one, the summary is rebuilt the next time it is read
+            updates['stale'] = Case(
+                When(
+                    Q(price_min__gte=min(removed_prices))
+                    | Q(price_max__lte=max(removed_prices))
+                    | Q(time_min__gte=min(removed_times))
+                    | Q(time_max__lte=max(removed_times)),
+                    then=Value(True)
+                ),
+                default=F('stale')
+            )
+
+        return updates
+
+
+@contextmanager
+def summary_write(user_id):
+    """
+    Run recipe writes of user in one transaction with their summary change.
+
+    The summary row is locked before anything is written, so a refresh
+    either takes its totals before the writes or waits for them to commit
+    along with their change, and no recipe is counted twice.
+    """
+    with transaction.atomic():
+        RecipeSummary.objects.select_for_update().filter(
+            user_id=user_id
+        ).exists()
+        yield
+
+
+def apply_summary_change(user_id, change):
+    """Update the summary of user with change, deferred in a block"""
+    pending = getattr(_pending, 'changes', None)
+    if pending is not None:
+        pending.setdefault(user_id, SummaryChange()).merge(change)
+        return
+
+    if transaction.get_connection().in_atomic_block:
+        updates = change.get_updates()
+    else:
+        # The write already committed on its own, so a refresh running
+        # meanwhile may have counted it; the summary is rebuilt instead
+        updates = {'stale': True}
+    if updates:
+        # Accounts under the threshold have no summary to update
+        RecipeSummary.objects.filter(user_id=user_id).update(**updates)
+
+
+@contextmanager
+def deferred_summary_updates():
+    """Apply the summary changes made inside the block once, at its end"""
+    if getattr(_pending, 'changes', None) is not None:
+        yield
+        return
+
+    _pending.changes = {}
+    try:
+        yield
+        changes = _pending.changes
+    finally:
+        _pending.changes = None
+
+    for user_id, change in changes.items():
+        apply_summary_change(user_id, change)
+
+
+def summary_values(price, time_minutes):
+    """Return a recipe price and time as the summary adds them up"""
+    return Decimal(str(price)), int(time_minutes)
+
+
+def loaded_values_known(loaded):
+    """Return True when the loaded price and time of a recipe are known"""
+    return all(
+        name in loaded and loaded[name] is not DEFERRED
+        for name in ('price', 'time_minutes')
+    )
+
+
+def record_saved_recipes(recipes, created):
+    """Apply new or updated recipes to the summaries of their owners"""
+    changes = {}
+    for recipe in recipes:
+        change = changes.setdefault(recipe.user_id, SummaryChange())
+        loaded = getattr(recipe, '_loaded_values', {})
+        new = summary_values(recipe.price, recipe.time_minutes)
+        if created:
+            change.added.append(new)
+        elif loaded_values_known(loaded):
+            old = summary_values(loaded['price'], loaded['time_minutes'])
+            if old != new:
+                change.removed.append(old)
+                change.added.append(new)
+        else:
+            change.stale = True
+        recipe._loaded_values = {
+            **loaded,
+            'price': recipe.price,
+            'time_minutes': recipe.time_minutes,
+        }
+
+    for user_id, change in changes.items():
+        apply_summary_change(user_id, change)
+
+
+def record_created_values(user_id, values):
+    """Add the (price, time) values of new recipes to a user's summary"""
+    change = SummaryChange()
+    change.added.extend(
+        summary_values(price, time_minutes) for price, time_minutes in values
+    )
+    if change.added:
+        apply_summary_change(user_id, change)
+
+
+def record_deleted_recipes(recipes):
+    """Take deleted recipes out of the summaries of their owners"""
+    changes = {}
+    for recipe in recipes:
+        change = changes.setdefault(recipe.user_id, SummaryChange())
+        change.removed.append(
+            summary_values(recipe.price, recipe.time_minutes)
+        )
+
+    for user_id, change in changes.items():
+        apply_summary_change(user_id, change)
@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from recipe.benchmarks import compare_results, percentile, router_endpoints
+from recipe.urls import router
+
+
+def results(**endpoint):
+    """Return benchmark results of a single endpoint"""
+    result = {'p95_ms': 10.0, 'queries_max': 3, 'peak_memory_kb': 100.0}
+    result.update(endpoint)
+    return {'endpoints': {'GET recipe-list list': result}}
+
+
+class BenchmarkTests(SimpleTestCase):
+    """Test the helpers of the API benchmark"""
+
+    def test_percentile(self):
+        """Test percentiles of unsorted values"""
+        values = list(range(100, 0, -1))
+
+        self.assertEqual(percentile(values, 0.5), 51)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_router_endpoints(self):
+        """Test that each route and method is listed once"""
+        endpoints = router_endpoints(router)
+
+        self.assertIn(('recipe-detail', 'put', 'update', True), endpoints)
+        self.assertIn(('tag-list', 'get', 'list', False), endpoints)
+        self.assertEqual(len(endpoints), len(set(endpoints)))
+
+    def test_compare_within_threshold(self):
+        """Test that small changes are not regressions"""
+        baseline = results()
+        current = results(p95_ms=11.5, peak_memory_kb=110.0)
+
+        self.assertEqual(compare_results(baseline, current, 0.2), [])
+
+    def test_compare_regressions(self):
+        """Test that slower, busier or bigger endpoints are reported"""
+        baseline = results()
+        current = results(p95_ms=20.0, queries_max=4, peak_memory_kb=400.0)
+
+        regressions = compare_results(baseline, current, 0.2)
+
+        self.assertEqual([metric for _, metric, _, _ in regressions], [
+            'p95_ms', 'queries_max', 'peak_memory_kb'
+        ])
+
+    def test_compare_ignores_new_endpoints(self):
+        """Test that endpoints missing from the baseline are skipped"""
+        self.assertEqual(
+            compare_results({'endpoints': {}}, results(), 0.2), []
+        )
@@ -0,0 +1,350 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from core.models import ImportCheckpoint, Recipe, Ingredient, Tag
+from recipe.versions import get_collection_version, RECIPES
+
+
+class ExportRecipesCommandTests(TestCase):
+    """Test the export_recipes management command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'TestPass123'
+        )
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        for title in ('Soup', 'Stew', 'Curry'):
+            recipe = Recipe.objects.create(
+                user=self.user, title=title, time_minutes=10, price=5.00
+            )
+            recipe.tags.add(tag)
+
+    def test_export_ndjson_to_stdout(self):
+        """Test dumping recipes as NDJSON to stdout"""
+        out = StringIO()
+
+        call_command('export_recipes', 'test@gmail.com', chunk_size=2,
+                     stdout=out)
+
+        items = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            [item['title'] for item in items], ['Soup', 'Stew', 'Curry']
+        )
+        self.assertEqual(items[0]['tags'][0]['name'], 'Dinner')
+
+    def test_export_json_to_file(self):
+        """Test dumping recipes as a JSON array to a file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipes.json')
+            call_command('export_recipes', 'test@gmail.com', format='json',
+                         output=path)
+
+            with open(path, 'rb') as output:
+                items = json.loads(output.read())
+
+        self.assertEqual(len(items), 3)
+
+    def test_export_unknown_user(self):
+        """Test that an unknown email is reported"""
+        with self.assertRaises(CommandError):
+            call_command('export_recipes', 'missing@gmail.com')
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes management command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'TestPass123'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_file(self, name, content):
+        """Write content to a file in the temporary directory"""
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as source:
+            source.write(content)
+
+        return path
+
+    def write_ndjson(self, items):
+        """Write items as an NDJSON file and return its path"""
+        content = ''.join(json.dumps(item) + '\n' for item in items)
+
+        return self.write_file('recipes.ndjson', content)
+
+    def import_recipes(self, *args, **options):
+        """Run the command quietly and return its stderr"""
+        err = StringIO()
+        call_command('import_recipes', 'test@gmail.com', *args,
+                     stdout=StringIO(), stderr=err, **options)
+
+        return err.getvalue()
+
+    def test_import_ndjson(self):
+        """Test importing recipes with their tag and ingredient names"""
+        existing = Tag.objects.create(user=self.user, name='Dinner')
+        path = self.write_ndjson([
+            {'title': 'Soup', 'time_minutes': 20, 'price': '4.50',
+             'tags': ['Dinner', 'Vegan'], 'ingredients': ['Leek']},
+            {'title': 'Stew', 'time_minutes': 90, 'price': 7,
+             'tags': [{'id': 99, 'name': 'Vegan'}], 'ingredients': ['Leek']},
+        ])
+        version = get_collection_version(self.user, RECIPES).version
+
+        self.import_recipes(path, chunk_size=1)
+
+        soup = Recipe.objects.get(user=self.user, title='Soup')
+        self.assertEqual(soup.link, '')
+        self.assertEqual(
+            sorted(soup.tags.values_list('name', flat=True)),
+            ['Dinner', 'Vegan']
+        )
+        self.assertIn(existing, soup.tags.all())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 1
+        )
+        self.assertGreater(
+            get_collection_version(self.user, RECIPES).version, version
+        )
+
+    def test_import_csv(self):
+        """Test importing recipes from CSV with | separated names"""
+        path = self.write_file(
+            'recipes.csv',
+            'title,time_minutes,price,link,tags,ingredients\n'
+            'Toast,5,1.20,,Breakfast,Bread|Butter\n'
+        )
+
+        self.import_recipes(path)
+
+        toast = Recipe.objects.get(user=self.user)
+        self.assertEqual(
+            sorted(toast.ingredients.values_list('name', flat=True)),
+            ['Bread', 'Butter']
+        )
+
+    def test_invalid_records_skipped(self):
+        """Test that invalid records are reported and the rest imported"""
+        path = self.write_file(
+            'recipes.ndjson',
+            '{"title": "Soup", "time_minutes": 20, "price": "4.50"}\n'
+            '{"title": "Bad", "time_minutes": "long", "price": "4.50"}\n'
+            'not json\n' + json.dumps({
+                'title': 'Long', 'time_minutes': 5, 'price': '1.00',
+                'tags': ['x' * 256],
+            }) + '\n'
+        )
+
+        errors = self.import_recipes(path)
+
+        self.assertIn('Record 2: time_minutes', errors)
+        self.assertIn('Record 3: Invalid JSON', errors)
+        self.assertIn('Record 4: tags: Name has more than 255', errors)
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)), ['Soup']
+        )
+
+    def test_resume_from_checkpoint(self):
+        """Test that an import continues after the saved records"""
+        path = self.write_ndjson([
+            {'title': title, 'time_minutes': 5, 'price': '1.00'}
+            for title in ('One', 'Two', 'Three')
+        ])
+        ImportCheckpoint.objects.create(
+            user=self.user, name='nightly', source=path, records=2, rows=2
+        )
+
+        self.import_recipes(path, checkpoint='nightly')
+
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)), ['Three']
+        )
+        checkpoint = ImportCheckpoint.objects.get(user=self.user)
+        self.assertEqual(checkpoint.records, 3)
+        self.assertEqual(checkpoint.rows, 3)
+
+    def test_checkpoint_of_other_source(self):
+        """Test that a checkpoint of another file is refused"""
+        path = self.write_ndjson([])
+        ImportCheckpoint.objects.create(
+            user=self.user, name='nightly', source='other.ndjson'
+        )
+
+        with self.assertRaises(CommandError):
+            self.import_recipes(path, checkpoint='nightly')
+
+    def test_checkpoint_saved_with_chunk(self):
+        """Test that a chunk is not kept when its progress is not saved"""
+        path = self.write_ndjson([
+            {'title': title, 'time_minutes': 5, 'price': '1.00'}
+            for title in ('One', 'Two', 'Three')
+        ])
+        save = 'recipe.management.commands.import_recipes.save_checkpoint'
+
+        with patch(save, side_effect=[None, RuntimeError('crash')]):
+            with self.assertRaises(RuntimeError):
+                self.import_recipes(path, chunk_size=2, checkpoint='nightly')
+
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)),
+            ['One', 'Two']
+        )
+
+    def test_import_exported_recipes(self):
+        """Test that an export can be imported for another user"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com', 'TestPass123'
+        )
+        recipe = Recipe.objects.create(
+            user=other, title='Curry', time_minutes=30, price='6.00'
+        )
+        recipe.tags.add(Tag.objects.create(user=other, name='Spicy'))
+        path = os.path.join(self.directory.name, 'export.ndjson')
+        call_command('export_recipes', 'other@gmail.com', output=path)
+
+        self.import_recipes(path)
+
+        imported = Recipe.objects.get(user=self.user)
+        self.assertEqual(imported.title, 'Curry')
+        self.assertEqual(imported.tags.get().name, 'Spicy')
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+    def test_import_with_copy(self):
+        """Test loading rows with COPY on PostgreSQL"""
+        path = self.write_ndjson([
+            {'title': 'Soup', 'time_minutes': 20, 'price': '4.50',
+             'link': '', 'tags': ['Dinner'], 'ingredients': ['Leek']},
+        ])
+
+        self.import_recipes(path, copy=True)
+
+        soup = Recipe.objects.get(user=self.user)
+        self.assertEqual(soup.link, '')
+        self.assertEqual(soup.tags.get().name, 'Dinner')
+        self.assertIsNotNone(soup.search_vector)
+
+
+class SeedBenchmarkCommandTests(TestCase):
+    """Test the seed_benchmark management command"""
+
+    def seed(self, **options):
+        """Run seed_benchmark with small volumes"""
+        defaults = {
+            'users': 2, 'recipes': 20, 'tags': 5, 'ingredients': 10,
+            'stdout': StringIO(),
+        }
+        defaults.update(options)
+        call_command('seed_benchmark', **defaults)
+
+    def test_seed_volumes(self):
+        """Test that the requested rows are created for every user"""
+        self.seed()
+
+        users = get_user_model().objects.filter(
+            email__startswith='benchmark-'
+        )
+        self.assertEqual(users.count(), 2)
+        for user in users:
+            self.assertTrue(user.check_password('Benchmark123'))
+            self.assertEqual(Recipe.objects.filter(user=user).count(), 20)
+            self.assertEqual(Tag.objects.filter(user=user).count(), 5)
+            self.assertEqual(
+                Ingredient.objects.filter(user=user).count(), 10
+            )
+        recipes = Recipe.objects.filter(user__in=users)
+        self.assertFalse(recipes.filter(tags=None).exists())
+        self.assertFalse(recipes.filter(ingredients=None).exists())
+
+    def test_popular_ingredients_used_most(self):
+        """Test that the first ingredients are linked to most recipes"""
+        self.seed(users=1, recipes=50)
+
+        through = Recipe.ingredients.through
+        first, last = Ingredient.objects.order_by('id')[::9]
+        self.assertGreater(
+            through.objects.filter(ingredient=first).count(),
+            through.objects.filter(ingredient=last).count()
+        )
+
+    def test_existing_users_need_clear(self):
+        """Test that seeding twice needs --clear and replaces the data"""
+        self.seed(users=1)
+
+        with self.assertRaises(CommandError):
+            self.seed(users=1)
+
+        self.seed(users=1, recipes=5, clear=True)
+        self.assertEqual(Recipe.objects.count(), 5)
+
+
+class BenchmarkApiCommandTests(TestCase):
+    """Test the benchmark_api management command"""
+
+    def setUp(self):
+        call_command(
+            'seed_benchmark', users=1, recipes=10, tags=3, ingredients=5,
+            stdout=StringIO()
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def benchmark(self, **options):
+        """Run benchmark_api with few requests and return its output"""
+        out = StringIO()
+        call_command(
+            'benchmark_api', requests=2, warmup=0, memory_requests=1,
+            host='testserver', stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_results_cover_router(self):
+        """Test that every router endpoint is measured and data is kept"""
+        path = os.path.join(self.directory.name, 'results.json')
+
+        self.benchmark(output=path)
+
+        with open(path) as results_file:
+            results = json.load(results_file)
+        endpoints = results['endpoints']
+        self.assertIn('GET recipe-list list', endpoints)
+        self.assertIn('DELETE recipe-detail destroy', endpoints)
+        self.assertIn('PATCH recipe-bulk-create bulk_update', endpoints)
+        self.assertEqual(len(endpoints), 18)
+        for result in endpoints.values():
+            self.assertEqual(result['requests'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['peak_memory_kb'], 0)
+        self.assertEqual(Recipe.objects.count(), 10)
+
+    def test_compare_flags_regressions(self):
+        """Test that runs slower than the baseline fail when asked to"""
+        path = os.path.join(self.directory.name, 'baseline.json')
+        self.benchmark(output=path)
+        with open(path) as results_file:
+            baseline = json.load(results_file)
+        for result in baseline['endpoints'].values():
+            result['p95_ms'] = 0
+            result['queries_max'] = 0
+        with open(path, 'w') as results_file:
+            json.dump(baseline, results_file)
+
+        with self.assertRaises(CommandError):
+            self.benchmark(compare=path, fail_on_regression=True)
+
+    def test_unknown_user(self):
+        """Test that the benchmark needs a seeded user"""
+        with self.assertRaises(CommandError):
+            self.benchmark(email='nobody@example.com')
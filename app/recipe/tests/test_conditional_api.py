@@ -0,0 +1,150 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+BULK_URL = reverse('recipe:recipe-bulk-create')
+
+
+def detail_url(recipe_id):
+    """Create and return detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_user(email='test@gmail.com', password='TestPass123'):
+    """Helper function that creates and returns a test user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def sample_recipe(user, **params):
+    """Helper function to create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetApiTests(TestCase):
+    """Test ETag and Last-Modified handling on list and detail endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def get_etag(self, url, params=None):
+        """Request url and return its ETag"""
+        res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res['ETag']
+
+    def assertNotModified(self, url, etag):
+        """Assert that a conditional request for url returns 304"""
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def assertModified(self, url, etag):
+        """Assert that a conditional request for url returns a new body"""
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_returns_validators(self):
+        """Test that list responses carry ETag and Last-Modified"""
+        res = self.client.get(RECIPE_URL)
+
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', res)
+
+    def test_unchanged_list_not_modified_without_querying(self):
+        """Test that a matching ETag is answered with 304 early"""
+        sample_recipe(self.user)
+        etag = self.get_etag(RECIPE_URL)
+
+        with self.assertNumQueries(1):
+            self.assertNotModified(RECIPE_URL, etag)
+
+    def test_if_modified_since_alone_not_trusted(self):
+        """Test that a change in the same second is not answered with 304"""
+        last_modified = self.client.get(RECIPE_URL)['Last-Modified']
+        sample_recipe(self.user)
+
+        res = self.client.get(
+            RECIPE_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_list_modified_after_create(self):
+        """Test that creating a recipe changes the list ETag"""
+        etag = self.get_etag(RECIPE_URL)
+        sample_recipe(self.user)
+
+        self.assertModified(RECIPE_URL, etag)
+
+    def test_other_user_changes_do_not_modify(self):
+        """Test that other users' writes keep the ETag valid"""
+        etag = self.get_etag(RECIPE_URL)
+        sample_recipe(sample_user('test2@gmail.com', 'Password123'))
+
+        self.assertNotModified(RECIPE_URL, etag)
+
+    def test_etag_depends_on_query(self):
+        """Test that different query parameters get different ETags"""
+        self.assertNotEqual(
+            self.get_etag(RECIPE_URL),
+            self.get_etag(RECIPE_URL, {'page_size': 1})
+        )
+
+    def test_tag_list_modified_when_assigned(self):
+        """Test that assigning a tag to a recipe changes the tag ETag"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = sample_recipe(self.user)
+        etag = self.get_etag(TAGS_URL)
+
+        recipe.tags.add(tag)
+
+        self.assertModified(TAGS_URL, etag)
+
+    def test_detail_modified_when_tag_renamed(self):
+        """Test that renaming a tag changes the recipe detail ETag"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(tag)
+        url = detail_url(recipe.id)
+        etag = self.get_etag(url)
+
+        tag.name = 'Plant based'
+        tag.save()
+
+        self.assertModified(url, etag)
+
+    def test_bulk_writes_modify_list(self):
+        """Test that bulk create and delete change the list ETag"""
+        etag = self.get_etag(RECIPE_URL)
+        res = self.client.post(BULK_URL, [{
+            'title': 'Toast',
+            'time_minutes': 5,
+            'price': '1.00',
+            'tags': [],
+            'ingredients': [],
+        }], format='json')
+        self.assertModified(RECIPE_URL, etag)
+
+        etag = self.get_etag(RECIPE_URL)
+        self.client.delete(BULK_URL, {
+            'ids': [res.data['results'][0]['id']]
+        }, format='json')
+        self.assertModified(RECIPE_URL, etag)
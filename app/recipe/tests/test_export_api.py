@@ -0,0 +1,148 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from app import asgi
+from core.models import Recipe, Ingredient, Tag
+from core.testing import asgi_request
+from recipe.serializers import RecipeDetailSerializer
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def sample_user(email='test@gmail.com', password='TestPass123'):
+    """Helper function that creates and returns a test user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def sample_recipe(user, **params):
+    """Helper function to create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicExportApiTests(TestCase):
+    """Test unauthenticated recipe export access"""
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+class PrivateExportApiTests(TestCase):
+    """Test streaming exports of a user's recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def create_recipes(self, count):
+        """Create count recipes with a tag and an ingredient each"""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        for i in range(count):
+            recipe = sample_recipe(self.user, title=f'Recipe {i}')
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        return json.loads(json.dumps(
+            RecipeDetailSerializer(recipes, many=True).data
+        ))
+
+    def test_export_json_array(self):
+        """Test exporting recipes as one JSON array across chunks"""
+        expected = self.create_recipes(5)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        content = b''.join(res.streaming_content)
+        self.assertEqual(json.loads(content), expected)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as one JSON object per line"""
+        expected = self.create_recipes(3)
+
+        res = self.client.get(
+            EXPORT_URL, HTTP_ACCEPT='application/x-ndjson'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_export_empty(self):
+        """Test exporting an account without recipes"""
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(b''.join(res.streaming_content), b'[]')
+
+    def test_export_limited_to_user(self):
+        """Test that only recipes of the authenticated user are exported"""
+        sample_recipe(sample_user('other@gmail.com', 'TestPass123'))
+        recipe = sample_recipe(self.user, title='Mine')
+
+        res = self.client.get(EXPORT_URL)
+
+        data = json.loads(b''.join(res.streaming_content))
+        self.assertEqual([item['id'] for item in data], [recipe.id])
+
+
+@override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+class AsgiExportApiTests(TransactionTestCase):
+    """Test streaming exports served by the ASGI application"""
+
+    def setUp(self):
+        self.user = sample_user()
+        self.token = Token.objects.create(user=self.user)
+
+    def export(self, accept):
+        """Request an export through the ASGI application"""
+        return asgi_request(asgi.application, EXPORT_URL, [
+            (b'authorization', f'Token {self.token.key}'.encode('ascii')),
+            (b'accept', accept),
+        ])
+
+    def test_export_json_array(self):
+        """Test that the export body is read from the database under ASGI"""
+        for i in range(5):
+            sample_recipe(self.user, title=f'Recipe {i}')
+
+        status_code, headers, body = self.export(b'application/json')
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(headers[b'Content-Type'], b'application/json')
+        self.assertEqual(
+            [item['title'] for item in json.loads(body)],
+            [f'Recipe {i}' for i in range(5)]
+        )
+
+    def test_export_ndjson(self):
+        """Test exporting one JSON object per line under ASGI"""
+        recipe = sample_recipe(self.user, title='Mine')
+
+        status_code, headers, body = self.export(b'application/x-ndjson')
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        ids = [json.loads(line)['id'] for line in body.splitlines()]
+        self.assertEqual(ids, [recipe.id])
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeFieldsetApiTests(TestCase):
+    """Test ?fields= and ?expand= on the recipe endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Oats'
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Porridge', time_minutes=5, price='1.50'
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def get(self, url, params):
+        """Request url and return the response and the queries it ran"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query['sql'] for query in queries]
+
+    def test_list_fields(self):
+        """Test that a list only sends and selects the chosen fields"""
+        res, queries = self.get(RECIPE_URL, {'fields': 'title,price'})
+
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': 'Porridge', 'price': '1.50'}]
+        )
+        recipe_query = [sql for sql in queries if 'FROM "core_recipe"' in sql]
+        self.assertNotIn('"link"', recipe_query[0])
+        self.assertFalse(any('core_recipe_tags' in sql for sql in queries))
+
+    def test_list_fields_without_relations_saves_queries(self):
+        """Test that leaving out relations skips their queries"""
+        _, full = self.get(RECIPE_URL, {})
+        _, slim = self.get(RECIPE_URL, {'fields': 'title'})
+
+        self.assertEqual(len(slim), len(full) - 2)
+
+    def test_list_expand(self):
+        """Test that expanded relations are nested in a list"""
+        res, _ = self.get(RECIPE_URL, {'expand': 'tags'})
+
+        recipe = res.data['results'][0]
+        self.assertEqual(
+            recipe['tags'], [{'id': self.tag.id, 'name': 'Vegan'}]
+        )
+        self.assertEqual(recipe['ingredients'], [self.ingredient.id])
+
+    def test_detail_expanded_by_default(self):
+        """Test that a recipe nests its relations unless told otherwise"""
+        url = detail_url(self.recipe.id)
+
+        res, _ = self.get(url, {'fields': 'tags'})
+        self.assertEqual(res.data, {
+            'id': self.recipe.id,
+            'tags': [{'id': self.tag.id, 'name': 'Vegan'}],
+        })
+
+        res, _ = self.get(url, {'expand': ''})
+        self.assertEqual(res.data['tags'], [self.tag.id])
+
+    def test_unknown_field_rejected(self):
+        """Test that unknown names are a bad request"""
+        for params in ({'fields': 'title,user'}, {'expand': 'price'}):
+            res = self.client.get(RECIPE_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expand_outside_fields_rejected(self):
+        """Test that a relation must be chosen to be expanded"""
+        res = self.client.get(
+            RECIPE_URL, {'fields': 'title', 'expand': 'tags'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_send_every_field(self):
+        """Test that create responses ignore the query parameters"""
+        res = self.client.post(
+            RECIPE_URL + '?fields=title',
+            {'title': 'Toast', 'time_minutes': 2, 'price': '0.50'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn('price', res.data)
@@ -3,7 +3,7 @@ from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
 
 from recipe.serializers import IngredientSerializer
 
@@ -46,7 +46,7 @@ class PrivateIngredientApiTests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_retrieve_ingredient_authenticated_user(self):
         """Test retrieving ingredient for authenticated user"""
@@ -57,8 +57,8 @@ class PrivateIngredientApiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_create_ingredient_successful(self):
         """Test that we can create an ingredient successfully"""
@@ -77,3 +77,26 @@ class PrivateIngredientApiTests(TestCase):
         res = self.client.post(INGREDIENTS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_ingredients_assigned_only(self):
+        """Test filtering ingredients by those assigned to recipes"""
+        assigned = Ingredient.objects.create(
+            user=self.test_user,
+            name='Assigned'
+        )
+        Ingredient.objects.create(user=self.test_user, name='Unassigned')
+        recipe = Recipe.objects.create(
+            user=self.test_user,
+            title='Porridge',
+            time_minutes=5,
+            price=2.00
+        )
+        recipe.ingredients.add(assigned)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data['results']],
+            [assigned.name]
+        )
@@ -0,0 +1,166 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient, Recipe
+from core.testing import QueryBudgetMixin
+from recipe.stats import get_summary_values
+from recipe.views import RecipeViewSet, TagsViewSet
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Create and return detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, number):
+    """Create and return a recipe with two tags and two ingredients"""
+    recipe = Recipe.objects.create(
+        user=user, title=f'Recipe {number}', time_minutes=10, price=5.00
+    )
+    recipe.tags.add(*[
+        Tag.objects.create(user=user, name=f'Tag {number} {index}')
+        for index in range(2)
+    ])
+    recipe.ingredients.add(*[
+        Ingredient.objects.create(user=user, name=f'Ingredient {number} {i}')
+        for i in range(2)
+    ])
+
+    return recipe
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test that recipe endpoints stay within their query budgets"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = [sample_recipe(self.user, n) for n in range(5)]
+
+    def test_list(self):
+        """Test listing recipes does not grow with the number of recipes"""
+        with self.assertWithinQueryBudget(RecipeViewSet, 'list'):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 5)
+
+    @override_settings(RECIPE_API_FAST_READS=False)
+    def test_list_serializers(self):
+        """Test listing recipes through the serializers"""
+        with self.assertWithinQueryBudget(RecipeViewSet, 'list'):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve(self):
+        """Test viewing a recipe with its tags and ingredients"""
+        with self.assertWithinQueryBudget(RecipeViewSet, 'retrieve'):
+            res = self.client.get(detail_url(self.recipes[0].id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_create(self):
+        """Test creating a recipe with tags and ingredients"""
+        recipe = self.recipes[0]
+        payload = {
+            'title': 'Cake',
+            'time_minutes': 30,
+            'price': 5.00,
+            'tags': list(recipe.tags.values_list('id', flat=True)),
+            'ingredients': list(
+                recipe.ingredients.values_list('id', flat=True)
+            ),
+        }
+
+        with self.assertWithinQueryBudget(RecipeViewSet, 'create'):
+            res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_partial_update(self):
+        """Test updating the title of a recipe"""
+        url = detail_url(self.recipes[0].id)
+
+        with self.assertWithinQueryBudget(RecipeViewSet, 'partial_update'):
+            res = self.client.patch(url, {'title': 'Cake'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_destroy(self):
+        """Test deleting a recipe"""
+        url = detail_url(self.recipes[0].id)
+
+        with self.assertWithinQueryBudget(RecipeViewSet, 'destroy'):
+            res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_search(self):
+        """Test searching recipes"""
+        with self.assertWithinQueryBudget(RecipeViewSet, 'search'):
+            res = self.client.get(RECIPE_URL + 'search/', {'q': 'recipe'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_stats(self):
+        """Test the stats of an account without a summary"""
+        with self.assertWithinQueryBudget(RecipeViewSet, 'stats'):
+            res = self.client.get(RECIPE_URL + 'stats/')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipes'], 5)
+
+    @override_settings(RECIPE_STATS_SUMMARY_THRESHOLD=5)
+    def test_writes_with_summary(self):
+        """Test that keeping a stats summary fits the write budgets"""
+        get_summary_values(self.user)
+        recipe = self.recipes[0]
+
+        with self.assertWithinQueryBudget(RecipeViewSet, 'stats'):
+            res = self.client.get(RECIPE_URL + 'stats/')
+        self.assertEqual(res.data['recipes'], 5)
+
+        with self.assertWithinQueryBudget(RecipeViewSet, 'create'):
+            self.client.post(RECIPE_URL, {
+                'title': 'Cake', 'time_minutes': 30, 'price': 5.00,
+                'tags': list(recipe.tags.values_list('id', flat=True)),
+            })
+        with self.assertWithinQueryBudget(RecipeViewSet, 'partial_update'):
+            self.client.patch(detail_url(recipe.id), {'price': 6.00})
+        with self.assertWithinQueryBudget(RecipeViewSet, 'destroy'):
+            self.client.delete(detail_url(recipe.id))
+
+    def test_tag_list(self):
+        """Test listing tags"""
+        with self.assertWithinQueryBudget(TagsViewSet, 'list'):
+            res = self.client.get(TAG_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+
+    def test_tag_create(self):
+        """Test creating a tag"""
+        with self.assertWithinQueryBudget(TagsViewSet, 'create'):
+            res = self.client.post(TAG_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_over_budget_fails(self):
+        """Test that the helper fails when an action runs too many queries"""
+        with self.assertRaises(AssertionError) as context:
+            with self.assertWithinQueryBudget(TagsViewSet, 'list'):
+                for recipe in self.recipes:
+                    list(recipe.tags.all())
+
+        self.assertIn('over its budget', str(context.exception))
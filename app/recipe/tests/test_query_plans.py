@@ -0,0 +1,105 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def sample_user(email='test@gmail.com', password='TestPass123'):
+    """Helper function that creates and returns a test user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN plans need Postgres')
+class ListQueryPlanTests(TestCase):
+    """Test that list queries are served by the composite indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Several users with enough rows each that sorting a page costs
+        # more than reading an index in order, as it does on real data
+        cls.user = sample_user()
+        users = [cls.user] + [
+            sample_user(f'user{number}@gmail.com') for number in range(3)
+        ]
+        for model in (Tag, Ingredient):
+            model.objects.bulk_create(
+                model(user=users[number // 2000], name=f'Name {number}',
+                      recipe_count=number % 7)
+                for number in range(8000)
+            )
+        Recipe.objects.bulk_create(
+            Recipe(user=users[number // 2000], title='Recipe', time_minutes=5,
+                   price=1)
+            for number in range(8000)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with connection.cursor() as cursor:
+            for model in (Tag, Ingredient, Recipe):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    def list_query(self, url, table, params=None):
+        """Request a list page and return the SQL that read from table"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, params)
+
+        return next(
+            query['sql'] for query in ctx.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+        )
+
+    def assertUsesIndex(self, sql, index_name):
+        """Assert that the sql reads the index in order, without a sort"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn(index_name, plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_tag_list_uses_user_name_index(self):
+        """Test that listing tags uses the (user, name, id) index"""
+        sql = self.list_query(TAGS_URL, 'core_tag')
+
+        self.assertIn('ORDER BY "core_tag"."name" DESC', sql)
+        self.assertUsesIndex(sql, 'core_tag_name_id_idx')
+
+    def test_popular_tag_list_uses_user_count_index(self):
+        """Test that listing popular tags uses the recipe_count index"""
+        sql = self.list_query(TAGS_URL, 'core_tag', {'ordering': 'popular'})
+
+        self.assertIn('ORDER BY "core_tag"."recipe_count" DESC', sql)
+        self.assertUsesIndex(sql, 'core_tag_user_count_idx')
+
+    def test_ingredient_list_uses_user_name_index(self):
+        """Test that listing ingredients uses the (user, name, id) index"""
+        sql = self.list_query(INGREDIENTS_URL, 'core_ingredient')
+
+        self.assertUsesIndex(sql, 'core_ingredient_name_id_idx')
+
+    def test_popular_ingredient_list_uses_user_count_index(self):
+        """Test that listing popular ingredients uses the count index"""
+        sql = self.list_query(
+            INGREDIENTS_URL, 'core_ingredient', {'ordering': 'popular'}
+        )
+
+        self.assertUsesIndex(sql, 'core_ingredient_user_count_idx')
+
+    def test_recipe_list_uses_user_id_index(self):
+        """Test that listing recipes uses the (user, id) index"""
+        sql = self.list_query(RECIPES_URL, 'core_recipe')
+
+        self.assertUsesIndex(sql, 'core_recipe_user_id_idx')
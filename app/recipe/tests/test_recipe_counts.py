@@ -0,0 +1,291 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.imports import RecipeImporter, clean_record
+from recipe.pagination import RecipeAttributeCursorPagination
+from recipe.versions import get_collection_version, RECIPES, TAGS
+
+RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk-create')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Create and return detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """Helper function to create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeCountTests(TestCase):
+    """Test the recipe_count of tags and ingredients"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.dinner = Tag.objects.create(user=self.user, name='Dinner')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+
+    def assertCounts(self, **expected):
+        """Assert the stored recipe_count of tags and ingredients by name"""
+        counts = {
+            obj.name.lower(): obj.recipe_count
+            for model in (Tag, Ingredient)
+            for obj in model.objects.filter(user=self.user)
+        }
+        for name, count in expected.items():
+            self.assertEqual(counts[name], count, name)
+
+    def test_add_remove_and_clear(self):
+        """Test that related manager changes move the counts"""
+        recipe = sample_recipe(self.user)
+        other = sample_recipe(self.user)
+
+        recipe.tags.add(self.vegan, self.dinner)
+        other.tags.add(self.vegan)
+        self.assertCounts(vegan=2, dinner=1)
+
+        # Removing a tag the recipe does not have changes nothing
+        other.tags.remove(self.vegan, self.dinner)
+        self.assertCounts(vegan=1, dinner=1)
+
+        recipe.tags.clear()
+        self.assertCounts(vegan=0, dinner=0)
+
+        recipe.tags.set([self.dinner])
+        self.assertCounts(vegan=0, dinner=1)
+
+    def test_changes_from_tag_side(self):
+        """Test that changes made through a tag move its count"""
+        recipes = [sample_recipe(self.user) for _ in range(3)]
+
+        self.vegan.recipe_set.add(*recipes)
+        self.assertCounts(vegan=3)
+
+        self.vegan.recipe_set.remove(recipes[0])
+        self.assertCounts(vegan=2)
+
+        self.vegan.recipe_set.clear()
+        self.assertCounts(vegan=0)
+
+    def test_deleting_recipe(self):
+        """Test that deleting a recipe uncounts its relations"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.vegan)
+        recipe.ingredients.add(self.salt)
+
+        self.client.delete(detail_url(recipe.id))
+
+        self.assertCounts(vegan=0, salt=0)
+
+    def test_api_create_and_update(self):
+        """Test that recipes written through the API move the counts"""
+        res = self.client.post(RECIPE_URL, {
+            'title': 'Curry', 'time_minutes': 30, 'price': '8.00',
+            'tags': [self.vegan.id], 'ingredients': [self.salt.id],
+        })
+        self.assertCounts(vegan=1, dinner=0, salt=1)
+
+        self.client.patch(
+            detail_url(res.data['id']), {'tags': [self.dinner.id]}
+        )
+        self.assertCounts(vegan=0, dinner=1, salt=1)
+
+    def test_bulk_writes(self):
+        """Test that bulk create, update and delete move the counts"""
+        res = self.client.post(BULK_URL, [
+            {'title': 'Soup', 'time_minutes': 15, 'price': '2.00',
+             'tags': [self.vegan.id], 'ingredients': [self.salt.id]},
+            {'title': 'Stew', 'time_minutes': 60, 'price': '11.00',
+             'tags': [self.vegan.id, self.dinner.id], 'ingredients': []},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertCounts(vegan=2, dinner=1, salt=1)
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        res = self.client.patch(BULK_URL, [
+            {'id': ids[0], 'tags': [self.dinner.id]},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounts(vegan=1, dinner=2, salt=1)
+
+        res = self.client.delete(BULK_URL, {'ids': ids}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCounts(vegan=0, dinner=0, salt=0)
+
+    def test_failed_bulk_delete_rolled_back(self):
+        """Test that a bulk delete failing to uncount deletes nothing"""
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.vegan)
+
+        with patch('recipe.usage.change_recipe_counts') as change:
+            change.side_effect = RuntimeError('lost connection')
+            with self.assertRaises(RuntimeError):
+                self.client.delete(
+                    BULK_URL, {'ids': [recipe.id]}, format='json'
+                )
+
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+        self.assertCounts(vegan=1)
+
+    def test_import(self):
+        """Test that imported recipes count their names"""
+        RecipeImporter(self.user).import_records([
+            clean_record({
+                'title': 'Pie', 'time_minutes': 45, 'price': 9,
+                'tags': ['vegan', 'Baking'], 'ingredients': ['Salt'],
+            }),
+            clean_record({
+                'title': 'Tea', 'time_minutes': 3, 'price': 1,
+                'tags': ['Vegan'],
+            }),
+        ])
+
+        self.assertCounts(vegan=2, baking=1, salt=1)
+
+    def test_order_by_popularity(self):
+        """Test listing tags with the most used first"""
+        Tag.objects.create(user=self.user, name='Unused')
+        for _ in range(2):
+            sample_recipe(self.user).tags.add(self.dinner)
+        sample_recipe(self.user).tags.add(self.vegan)
+
+        res = self.client.get(TAGS_URL, {'ordering': 'popular'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ['Dinner', 'Vegan', 'Unused']
+        )
+
+    def test_popular_ordering_pages(self):
+        """Test that the cursor follows the popularity ordering"""
+        sample_recipe(self.user).ingredients.add(self.salt)
+        for name in ('Pepper', 'Oil', 'Garlic'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(
+            INGREDIENTS_URL, {'ordering': 'popular', 'page_size': 2}
+        )
+        names = [item['name'] for item in res.data['results']]
+        res = self.client.get(res.data['next'])
+        names += [item['name'] for item in res.data['results']]
+
+        self.assertEqual(names[0], 'Salt')
+        self.assertEqual(len(set(names)), 4)
+
+    def test_popular_ties_past_offset_cutoff(self):
+        """Test paging through more equal counts than the offset cutoff"""
+        for name in ('Pepper', 'Oil', 'Garlic', 'Leek', 'Rice'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        pages = []
+        url = INGREDIENTS_URL + '?ordering=popular&page_size=2'
+        with patch.object(RecipeAttributeCursorPagination, 'offset_cutoff', 1):
+            while url:
+                res = self.client.get(url)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                pages.append([item['id'] for item in res.data['results']])
+                url = res.data['next']
+            res = self.client.get(res.data['previous'])
+
+        ids = [pk for page in pages for pk in page]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], pages[-2]
+        )
+
+    def test_invalid_cursor(self):
+        """Test that a cursor not matching the ordering is rejected"""
+        res = self.client.get(TAGS_URL, {'page_size': 1})
+        res = self.client.get(
+            res.data['next'].replace('ordering', 'x') + '&ordering=popular'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_ordering(self):
+        """Test that an unknown ordering is rejected"""
+        res = self.client.get(TAGS_URL, {'ordering': 'recipes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RepairRecipeCountsCommandTests(TestCase):
+    """Test the repair_recipe_counts management command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Testpass123'
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='Salt'
+        )
+        for _ in range(3):
+            recipe = sample_recipe(self.user)
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.ingredient)
+        Tag.objects.create(user=self.user, name='Unused')
+        Tag.objects.filter(id=self.tag.id).update(recipe_count=7)
+        Ingredient.objects.update(recipe_count=0)
+
+    def repair(self, **options):
+        """Run the command and return its output"""
+        out = StringIO()
+        call_command('repair_recipe_counts', stdout=out, **options)
+        return out.getvalue()
+
+    def test_repair_drifted_counts(self):
+        """Test that drifted counts are recounted in batches"""
+        versions = {
+            collection: get_collection_version(self.user, collection).version
+            for collection in (TAGS, RECIPES)
+        }
+
+        output = self.repair(batch_size=1)
+
+        self.tag.refresh_from_db()
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 3)
+        self.assertEqual(self.ingredient.recipe_count, 3)
+        self.assertIn('tags: 2 checked, 1 repaired.', output)
+        self.assertIn('ingredients: 1 checked, 1 repaired.', output)
+        for collection, version in versions.items():
+            self.assertGreater(
+                get_collection_version(self.user, collection).version,
+                version
+            )
+
+    def test_dry_run(self):
+        """Test that a dry run only reports the drift"""
+        output = self.repair(dry_run=True)
+
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.recipe_count, 7)
+        self.assertIn('tags: 2 checked, 1 drifted.', output)
@@ -1,14 +1,18 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 
 from core.models import Recipe, Ingredient, Tag
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk-create')
 
 
 def detail_url(recipe_id):
@@ -75,7 +79,7 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_retrieving_recipe_list_for_user(self):
         """Test retrieving the list of recipes for authenticated user only"""
@@ -89,8 +93,8 @@ class PrivateRecipeApiTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_detail_view(self):
         """Test retrieving the details of a recipe"""
@@ -195,3 +199,439 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(recipe.price, payload['price'])
         tags = recipe.tags.all()
         self.assertEqual(len(tags), 0)
+
+    def test_create_recipe_with_other_user_tag_fails(self):
+        """Test that tags of another user can't be assigned to a recipe"""
+        user2 = sample_user('test2@gmail.com', 'Password123')
+        tag = sample_tag(user=user2)
+        payload = {
+            'title': 'Stolen tag',
+            'tags': [tag.id],
+            'time_minutes': 20,
+            'price': 10.00
+        }
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(tag.id), str(res.data['tags']))
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_reports_all_missing_ingredients(self):
+        """Test that every missing ingredient id is reported at once"""
+        ingredient = sample_ingredient(user=self.user)
+        payload = {
+            'title': 'Mystery stew',
+            'ingredients': [ingredient.id, 9998, 9999],
+            'time_minutes': 20,
+            'price': 10.00
+        }
+
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('9998', str(res.data['ingredients']))
+        self.assertIn('9999', str(res.data['ingredients']))
+
+    def test_create_recipe_resolves_relations_in_one_query(self):
+        """Test that related ids are validated with one query per field"""
+        ingredients = [
+            sample_ingredient(user=self.user, name=f'Ingredient {i}')
+            for i in range(10)
+        ]
+        payload = {
+            'title': 'Big salad',
+            'ingredients': [ingredient.id for ingredient in ingredients],
+            'tags': [sample_tag(user=self.user).id],
+            'time_minutes': 20,
+            'price': 10.00
+        }
+        request = APIRequestFactory().post(RECIPE_URL)
+        request.user = self.user
+        serializer = RecipeSerializer(
+            data=payload, context={'request': request}
+        )
+
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(
+            serializer.validated_data['ingredients'], ingredients
+        )
+
+    def _count_queries(self, url):
+        """Request url and return the number of queries it executed"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def _create_recipes_with_relations(self, count):
+        """Create recipes that each have their own tag and ingredient"""
+        recipes = []
+        for i in range(count):
+            recipe = sample_recipe(self.user, title=f'Recipe {i}')
+            recipe.tags.add(sample_tag(self.user, name=f'Tag {recipe.id}'))
+            recipe.ingredients.add(
+                sample_ingredient(self.user, name=f'Ingredient {recipe.id}')
+            )
+            recipes.append(recipe)
+
+        return recipes
+
+    def test_recipe_list_query_count_is_constant(self):
+        """Test that listing recipes does not issue queries per recipe"""
+        self._create_recipes_with_relations(1)
+        baseline = self._count_queries(RECIPE_URL)
+
+        self._create_recipes_with_relations(10)
+        self.assertEqual(self._count_queries(RECIPE_URL), baseline)
+
+    def test_recipe_detail_query_count_is_constant(self):
+        """Test that recipe detail queries do not grow with relations"""
+        recipe = self._create_recipes_with_relations(1)[0]
+        baseline = self._count_queries(detail_url(recipe.id))
+
+        for i in range(5):
+            recipe.tags.add(sample_tag(self.user, name=f'Extra tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredient(self.user, name=f'Extra ingredient {i}')
+            )
+        self.assertEqual(self._count_queries(detail_url(recipe.id)), baseline)
+
+    def test_recipe_list_query_count_ignores_page_size(self):
+        """Test that the query count is the same for any page size"""
+        self._create_recipes_with_relations(10)
+
+        small_page = self._count_queries(RECIPE_URL + '?page_size=1')
+        large_page = self._count_queries(RECIPE_URL + '?page_size=10')
+        self.assertEqual(small_page, large_page)
+
+    def test_recipe_list_cursor_pagination(self):
+        """Test that following the cursor returns every recipe once"""
+        recipes = self._create_recipes_with_relations(5)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertIsNone(res.data['previous'])
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids.extend(recipe['id'] for recipe in res.data['results'])
+
+        self.assertEqual(ids, sorted([r.id for r in recipes], reverse=True))
+
+    @override_settings(RECIPE_API_MAX_PAGE_SIZE=3)
+    def test_recipe_list_page_size_limited(self):
+        """Test that the requested page size is capped by the settings"""
+        self._create_recipes_with_relations(5)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 50})
+
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertIsNotNone(res.data['next'])
+
+    @override_settings(THROTTLE_RATES={'recipe_write': '2/min'})
+    def test_writes_throttled_per_user(self):
+        """Test that writes past the rate are rejected, reads are not"""
+        cache.clear()
+        payload = {'title': 'Cake', 'time_minutes': 30, 'price': 5.00}
+        for _ in range(2):
+            res = self.client.post(RECIPE_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            res = self.client.post(RECIPE_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        other = sample_user(email='other@gmail.com')
+        self.client.force_authenticate(other)
+        res = self.client.post(RECIPE_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+
+class RecipeFilterApiTests(TestCase):
+    """Test filtering the recipe list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+        self.vegan = sample_tag(self.user, name='Vegan')
+        self.quick = sample_tag(self.user, name='Quick')
+        self.tofu = sample_ingredient(self.user, name='Tofu')
+        self.rice = sample_ingredient(self.user, name='Rice')
+
+        self.curry = sample_recipe(self.user, title='Tofu curry',
+                                   time_minutes=40, price=8.00)
+        self.curry.tags.add(self.vegan)
+        self.curry.ingredients.add(self.tofu, self.rice)
+        self.salad = sample_recipe(self.user, title='Salad',
+                                   time_minutes=5, price=3.50)
+        self.salad.tags.add(self.vegan, self.quick)
+        self.salad.ingredients.add(self.tofu)
+        self.toast = sample_recipe(self.user, title='Toast',
+                                   time_minutes=3, price=1.00)
+
+    def get_titles(self, params):
+        """Return the titles of the recipes listed for params"""
+        res = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {recipe['title'] for recipe in res.data['results']}
+
+    def test_filter_by_any_tag(self):
+        """Test returning recipes with any of the given tags"""
+        titles = self.get_titles({'tags': f'{self.vegan.id},{self.quick.id}'})
+
+        self.assertEqual(titles, {'Tofu curry', 'Salad'})
+
+    def test_filter_by_all_tags(self):
+        """Test returning recipes with all of the given tags"""
+        titles = self.get_titles({
+            'tags': f'{self.vegan.id},{self.quick.id}',
+            'tags_match': 'all',
+        })
+
+        self.assertEqual(titles, {'Salad'})
+
+    def test_filter_by_ingredients(self):
+        """Test filtering recipes by ingredients with any and all"""
+        ids = f'{self.tofu.id},{self.rice.id}'
+
+        self.assertEqual(self.get_titles({'ingredients': ids}),
+                         {'Tofu curry', 'Salad'})
+        self.assertEqual(
+            self.get_titles({'ingredients': ids, 'ingredients_match': 'all'}),
+            {'Tofu curry'}
+        )
+
+    def test_filter_by_time_and_price_ranges(self):
+        """Test filtering recipes by time and price ranges"""
+        self.assertEqual(self.get_titles({'max_time': 5}), {'Salad', 'Toast'})
+        self.assertEqual(self.get_titles({'min_time': 5, 'max_price': '4'}),
+                         {'Salad'})
+        self.assertEqual(self.get_titles({'min_price': '3.50'}),
+                         {'Tofu curry', 'Salad'})
+
+    def test_filter_by_title_prefix(self):
+        """Test filtering recipes by the start of their title"""
+        self.assertEqual(self.get_titles({'title': 'To'}),
+                         {'Tofu curry', 'Toast'})
+
+    def test_filter_does_not_duplicate_recipes(self):
+        """Test that recipes matching several ids are listed once"""
+        res = self.client.get(RECIPE_URL, {
+            'ingredients': f'{self.tofu.id},{self.rice.id}'
+        })
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_invalid_filters_rejected(self):
+        """Test that malformed filter values return a bad request"""
+        for params in [{'tags': 'one,two'}, {'min_price': 'cheap'},
+                       {'max_price': 'NaN'}, {'tags_match': 'some',
+                                              'tags': '1'}]:
+            res = self.client.get(RECIPE_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filters_do_not_add_queries(self):
+        """Test that filtering is done in the list query itself"""
+        with CaptureQueriesContext(connection) as unfiltered:
+            self.client.get(RECIPE_URL)
+        with CaptureQueriesContext(connection) as filtered:
+            self.client.get(RECIPE_URL, {
+                'tags': self.vegan.id,
+                'ingredients': f'{self.tofu.id},{self.rice.id}',
+                'ingredients_match': 'all',
+                'max_price': '10',
+            })
+
+        self.assertEqual(len(unfiltered), len(filtered))
+        self.assertNotIn('DISTINCT', filtered.captured_queries[0]['sql'])
+
+
+class RecipeBulkApiTests(TestCase):
+    """Test the bulk recipe endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_recipes(self):
+        """Test creating several recipes with relations in one request"""
+        tag = sample_tag(self.user)
+        ingredient = sample_ingredient(self.user)
+        payload = [
+            {
+                'title': 'Pancakes',
+                'time_minutes': 20,
+                'price': '4.50',
+                'tags': [tag.id],
+                'ingredients': [ingredient.id],
+            },
+            {
+                'title': 'Toast',
+                'time_minutes': 5,
+                'price': '1.00',
+                'tags': [],
+                'ingredients': [],
+            },
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['errors'], [])
+        self.assertEqual(
+            [recipe['title'] for recipe in res.data['results']],
+            ['Pancakes', 'Toast']
+        )
+        pancakes = Recipe.objects.get(user=self.user, title='Pancakes')
+        self.assertEqual(list(pancakes.tags.all()), [tag])
+        self.assertEqual(list(pancakes.ingredients.all()), [ingredient])
+
+    def test_bulk_create_reports_invalid_items(self):
+        """Test that invalid items are reported and valid ones created"""
+        payload = [
+            {
+                'title': 'Soup',
+                'time_minutes': 30,
+                'price': '3.00',
+                'tags': [],
+                'ingredients': [],
+            },
+            {'title': '', 'time_minutes': 'slow', 'price': '3.00'},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['errors'][0]['index'], 1)
+        self.assertIn('time_minutes', res.data['errors'][0]['errors'])
+        self.assertTrue(Recipe.objects.filter(title='Soup').exists())
+
+    def test_bulk_create_atomic_rejects_batch(self):
+        """Test that atomic mode creates nothing if any item is invalid"""
+        payload = [
+            {
+                'title': 'Soup',
+                'time_minutes': 30,
+                'price': '3.00',
+                'tags': [],
+                'ingredients': [],
+            },
+            {'title': 'Stew', 'price': '3.00'},
+        ]
+
+        res = self.client.post(BULK_URL + '?atomic=true', payload,
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_create_query_count_is_constant(self):
+        """Test that bulk create does not issue queries per recipe"""
+        def payload(count):
+            return [
+                {
+                    'title': f'Recipe {i}',
+                    'time_minutes': 5,
+                    'price': '1.00',
+                    'tags': [],
+                    'ingredients': [],
+                }
+                for i in range(count)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BULK_URL, payload(2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BULK_URL, payload(20), format='json')
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.assertEqual(len(small), len(large))
+        self.assertEqual(Recipe.objects.count(), 22)
+
+    def test_bulk_create_resolves_relations_once(self):
+        """Test that related ids are resolved once for the whole batch"""
+        tags = [sample_tag(self.user, name=f'Tag {i}') for i in range(5)]
+
+        def payload(count):
+            return [
+                {
+                    'title': f'Recipe {i}',
+                    'time_minutes': 5,
+                    'price': '1.00',
+                    'tags': [tag.id for tag in tags],
+                    'ingredients': [],
+                }
+                for i in range(count)
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(BULK_URL, payload(2), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(BULK_URL, payload(10), format='json')
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            self.assertEqual(len(small), len(large))
+        recipe = Recipe.objects.filter(user=self.user).last()
+        self.assertEqual(recipe.tags.count(), 5)
+
+    def test_bulk_partial_update(self):
+        """Test updating fields and relations of several recipes"""
+        recipe1 = sample_recipe(self.user, title='Old 1')
+        recipe2 = sample_recipe(self.user, title='Old 2')
+        recipe2.tags.add(sample_tag(self.user))
+        new_tag = sample_tag(self.user, name='new tag')
+        payload = [
+            {'id': recipe1.id, 'title': 'New 1'},
+            {'id': recipe2.id, 'tags': [new_tag.id]},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe1.title, 'New 1')
+        self.assertEqual(recipe2.title, 'Old 2')
+        self.assertEqual(list(recipe2.tags.all()), [new_tag])
+
+    def test_bulk_update_other_user_recipe_fails(self):
+        """Test that recipes of other users can't be bulk updated"""
+        user2 = sample_user('test2@gmail.com', 'Password123')
+        recipe = sample_recipe(user2, title='Theirs')
+
+        res = self.client.patch(BULK_URL, [{'id': recipe.id, 'title': 'x'}],
+                                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data['errors'][0]['errors'])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Theirs')
+
+    def test_bulk_delete(self):
+        """Test deleting recipes of authenticated user by id"""
+        user2 = sample_user('test2@gmail.com', 'Password123')
+        other = sample_recipe(user2)
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        recipe1.tags.add(sample_tag(self.user))
+
+        res = self.client.delete(
+            BULK_URL, {'ids': [recipe1.id, recipe2.id, other.id]},
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertTrue(Recipe.objects.filter(id=other.id).exists())
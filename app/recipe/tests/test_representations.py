@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Ingredient, Tag
+from recipe.cache import get_response_cache
+from recipe.representations import recipe_rows, represent_recipes
+from recipe.serializers import RecipeSerializer
+from recipe.views import relation_prefetches
+
+RECIPE_URL = reverse('recipe:recipe-list')
+SEARCH_URL = reverse('recipe:recipe-search')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_user(email='test@gmail.com', password='TestPass123'):
+    """Helper function that creates and returns a test user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def sample_recipe(user, **params):
+    """Helper function to create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class FastReadApiTests(TestCase):
+    """Test that plain row responses match the serializer responses"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Dessert', 'Breakfast')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Oats', 'Banana', 'Cocoa')
+        ]
+
+        self.recipe = sample_recipe(
+            self.user, title='Banana oat cookies', price='10.5',
+            link='https://example.com/cookies'
+        )
+        self.recipe.tags.add(tags[2], tags[0])
+        self.recipe.ingredients.add(*ingredients)
+        sample_recipe(self.user, title='Plain toast', price='0.99')
+
+    def get_both(self, url, params=None):
+        """Return the bodies of url from the fast and serializer paths"""
+        contents = []
+        for fast_reads in (True, False):
+            get_response_cache().clear()
+            with override_settings(RECIPE_API_FAST_READS=fast_reads):
+                res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            contents.append(res.content)
+
+        return contents
+
+    def test_recipe_list_identical(self):
+        """Test listing recipes from rows gives the same bytes"""
+        fast, slow = self.get_both(RECIPE_URL)
+
+        self.assertEqual(fast, slow)
+
+    def test_recipe_detail_identical(self):
+        """Test retrieving a recipe from rows gives the same bytes"""
+        fast, slow = self.get_both(detail_url(self.recipe.id))
+
+        self.assertEqual(fast, slow)
+
+    def test_recipe_search_identical(self):
+        """Test searching recipes from rows gives the same bytes"""
+        fast, slow = self.get_both(SEARCH_URL, {'q': 'banana'})
+
+        self.assertEqual(fast, slow)
+
+    def test_sparse_fields_identical(self):
+        """Test that ?fields= narrows both paths the same way"""
+        for params in ({'fields': 'title,price'}, {'fields': 'tags'}):
+            fast, slow = self.get_both(RECIPE_URL, params)
+            self.assertEqual(fast, slow)
+
+    def test_expanded_relations_identical(self):
+        """Test that ?expand= nests the same relations on both paths"""
+        for url, expand in ((RECIPE_URL, 'tags'),
+                            (detail_url(self.recipe.id), ''),
+                            (SEARCH_URL, 'ingredients,tags')):
+            fast, slow = self.get_both(url, {'q': 'banana', 'expand': expand})
+            self.assertEqual(fast, slow)
+
+    def test_attribute_lists_identical(self):
+        """Test listing tags and ingredients from rows gives the same bytes"""
+        for url in (TAGS_URL, INGREDIENTS_URL):
+            fast, slow = self.get_both(url)
+            self.assertEqual(fast, slow)
+
+    def test_missing_recipe_not_found(self):
+        """Test retrieving another user's recipe from rows returns 404"""
+        other = sample_recipe(sample_user('other@gmail.com', 'TestPass123'))
+
+        res = self.client.get(detail_url(other.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_represent_recipes_matches_serializer(self):
+        """Test building recipes from rows matches RecipeSerializer"""
+        recipes = Recipe.objects.order_by('-id')
+        serializer = RecipeSerializer(
+            recipes.prefetch_related(*relation_prefetches()), many=True
+        )
+
+        data = represent_recipes(recipe_rows(recipes))
+
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(data), renderer.render(serializer.data)
+        )
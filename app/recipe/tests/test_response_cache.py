@@ -0,0 +1,90 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe.cache import get_response_cache
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def sample_user(email='test@gmail.com', password='TestPass123'):
+    """Helper function that creates and returns a test user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def sample_recipe(user, **params):
+    """Helper function to create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheApiTests(TestCase):
+    """Test caching of rendered recipe responses"""
+
+    def setUp(self):
+        get_response_cache().clear()
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def get_titles(self, res):
+        """Return the recipe titles of a rendered list response"""
+        return [
+            recipe['title'] for recipe in json.loads(res.content)['results']
+        ]
+
+    def test_repeated_list_served_from_cache(self):
+        """Test that an unchanged list is not serialized twice"""
+        sample_recipe(self.user)
+        first = self.client.get(RECIPE_URL)
+        hits = get_response_cache().stats()['hits']
+
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(get_response_cache().stats()['hits'], hits + 1)
+
+    def test_write_invalidates_cached_list(self):
+        """Test that a new recipe shows up after a cached response"""
+        sample_recipe(self.user, title='First')
+        self.client.get(RECIPE_URL)
+
+        sample_recipe(self.user, title='Second')
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(self.get_titles(res), ['Second', 'First'])
+
+    def test_cache_is_per_user(self):
+        """Test that users never get each other's cached responses"""
+        sample_recipe(self.user, title='Mine')
+        self.client.get(RECIPE_URL)
+
+        user2 = sample_user('test2@gmail.com', 'Password123')
+        sample_recipe(user2, title='Theirs')
+        self.client.force_authenticate(user2)
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(self.get_titles(res), ['Theirs'])
+
+    @override_settings(RECIPE_RESPONSE_CACHE_MAX_ENTRY_BYTES=10)
+    def test_large_responses_not_cached(self):
+        """Test that responses above the size limit are not stored"""
+        sample_recipe(self.user)
+        self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(get_response_cache()), 0)
@@ -0,0 +1,145 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Ingredient, Tag
+from recipe.search import trigram_available
+
+SEARCH_URL = reverse('recipe:recipe-search')
+
+
+def sample_user(email='test@gmail.com', password='TestPass123'):
+    """Helper function that creates and returns a test user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def sample_recipe(user, **params):
+    """Helper function to create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchApiTests(TestCase):
+    """Test searching recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = sample_user()
+        self.client.force_authenticate(self.user)
+
+    def search(self, text):
+        """Search recipes and return the titles in result order"""
+        res = self.client.get(SEARCH_URL, {'q': text})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_requires_query(self):
+        """Test that the q parameter is required"""
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_by_title(self):
+        """Test finding recipes by words of their title"""
+        sample_recipe(self.user, title='Banana bread')
+        sample_recipe(self.user, title='Chicken soup')
+
+        self.assertEqual(self.search('bread'), ['Banana bread'])
+
+    def test_search_only_own_recipes(self):
+        """Test that recipes of other users are not searched"""
+        user2 = sample_user('test2@gmail.com', 'Password123')
+        sample_recipe(user2, title='Banana bread')
+
+        self.assertEqual(self.search('bread'), [])
+
+    def test_search_by_tag_and_ingredient(self):
+        """Test that added tags and ingredients become searchable"""
+        recipe = sample_recipe(self.user, title='Morning bowl')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Breakfast'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Oats')
+        )
+
+        self.assertEqual(self.search('breakfast'), ['Morning bowl'])
+        self.assertEqual(self.search('oats'), ['Morning bowl'])
+
+    def test_search_follows_renamed_tag(self):
+        """Test that renaming a tag updates the recipes searched by it"""
+        tag = Tag.objects.create(user=self.user, name='Supper')
+        recipe = sample_recipe(self.user, title='Stew')
+        recipe.tags.add(tag)
+
+        tag.name = 'Dinner'
+        tag.save()
+
+        self.assertEqual(self.search('dinner'), ['Stew'])
+        self.assertEqual(self.search('supper'), [])
+
+    def test_search_bulk_created_recipes(self):
+        """Test that recipes created in bulk are searchable"""
+        self.client.post(reverse('recipe:recipe-bulk-create'), [{
+            'title': 'Lemon tart',
+            'time_minutes': 60,
+            'price': '6.00',
+            'tags': [],
+            'ingredients': [],
+        }], format='json')
+
+        self.assertEqual(self.search('lemon'), ['Lemon tart'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Ranking needs Postgres')
+    def test_title_matches_rank_first(self):
+        """Test that title matches rank above tag matches"""
+        tagged = sample_recipe(self.user, title='Pasta bake')
+        tagged.tags.add(Tag.objects.create(user=self.user, name='Cheese'))
+        sample_recipe(self.user, title='Cheese toastie')
+
+        self.assertEqual(self.search('cheese'),
+                         ['Cheese toastie', 'Pasta bake'])
+
+    def test_recipe_queries_skip_search_vector(self):
+        """Test that recipes are read without their search vector"""
+        query = str(Recipe.objects.filter(user=self.user).query)
+
+        self.assertNotIn('search_vector', query)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Trigger needs Postgres')
+    def test_title_change_sets_vector_in_same_write(self):
+        """Test that renaming a recipe needs no second UPDATE"""
+        recipe = sample_recipe(self.user, title='Banana bread')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Baking'))
+        recipe = Recipe.objects.get(id=recipe.id)
+        recipe.title = 'Pumpkin pie'
+
+        with CaptureQueriesContext(connection) as ctx:
+            recipe.save()
+
+        self.assertFalse(any(
+            'search_vector' in query['sql'] for query in ctx.captured_queries
+        ))
+        self.assertEqual(self.search('pumpkin'), ['Pumpkin pie'])
+        self.assertEqual(self.search('baking'), ['Pumpkin pie'])
+        self.assertEqual(self.search('banana'), [])
+
+    def test_search_typo_falls_back_to_trigrams(self):
+        """Test that misspelled searches still find similar titles"""
+        if not trigram_available():
+            self.skipTest('pg_trgm is not installed')
+        sample_recipe(self.user, title='Lasagne')
+
+        self.assertEqual(self.search('lasagna'), ['Lasagne'])
@@ -0,0 +1,309 @@
+import threading
+from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, RecipeSummary, Tag
+from recipe.imports import RecipeImporter, clean_record
+from recipe import stats
+from recipe.stats import get_summary_values, recipe_aggregates, \
+    summary_write
+
+STATS_URL = reverse('recipe:recipe-stats')
+RECIPE_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk-create')
+
+
+def detail_url(recipe_id):
+    """Create and return detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """Helper function to create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeStatsApiTests(TestCase):
+    """Test the recipe stats endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        """Test that authentication is required for stats"""
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_empty_account(self):
+        """Test the stats of a user without recipes"""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'recipes': 0,
+            'price': {'avg': None, 'min': None, 'max': None},
+            'time_minutes': {'avg': None, 'min': None, 'max': None},
+            'top_ingredients': [],
+            'top_tags': [],
+        })
+
+    def test_stats_of_user_recipes(self):
+        """Test counts, averages and extremes of the user's recipes only"""
+        sample_recipe(self.user, price=Decimal('2.50'), time_minutes=10)
+        sample_recipe(self.user, price=Decimal('7.00'), time_minutes=25)
+        sample_recipe(self.user, price=Decimal('4.00'), time_minutes=30)
+        other = get_user_model().objects.create_user(
+            'other@gmail.com', 'Testpass123'
+        )
+        sample_recipe(other, price=Decimal('90.00'), time_minutes=300)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipes'], 3)
+        self.assertEqual(
+            res.data['price'], {'avg': '4.50', 'min': '2.50', 'max': '7.00'}
+        )
+        self.assertEqual(
+            res.data['time_minutes'], {'avg': 21.67, 'min': 10, 'max': 30}
+        )
+
+    def test_top_tags_and_ingredients(self):
+        """Test that the most used names come first, ties by name"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+        Tag.objects.create(user=self.user, name='Unused')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        for number in range(3):
+            recipe = sample_recipe(self.user, title=f'Recipe {number}')
+            recipe.tags.add(vegan)
+            recipe.ingredients.add(salt)
+        sample_recipe(self.user).tags.add(dessert)
+
+        with self.settings(RECIPE_STATS_TOP=2):
+            res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['top_tags'], [
+            {'id': vegan.id, 'name': 'Vegan', 'recipes': 3},
+            {'id': dessert.id, 'name': 'Dessert', 'recipes': 1},
+        ])
+        self.assertEqual(res.data['top_ingredients'], [
+            {'id': salt.id, 'name': 'Salt', 'recipes': 3},
+        ])
+
+    def test_stats_not_modified(self):
+        """Test that stats answer 304 until a recipe changes"""
+        recipe = sample_recipe(self.user)
+        etag = self.client.get(STATS_URL)['ETag']
+
+        res = self.client.get(STATS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(detail_url(recipe.id), {'price': '9.00'})
+        res = self.client.get(STATS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['price']['max'], '9.00')
+
+
+@override_settings(RECIPE_STATS_SUMMARY_THRESHOLD=3)
+class RecipeSummaryTests(TestCase):
+    """Test the running totals kept for accounts with many recipes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = [
+            sample_recipe(self.user, price=price, time_minutes=time)
+            for price, time in (
+                (Decimal('3.00'), 10), (Decimal('5.00'), 20),
+                (Decimal('6.00'), 30), (Decimal('8.00'), 40),
+            )
+        ]
+        # Reading the stats starts the summary once over the threshold
+        get_summary_values(self.user)
+
+    def assertSummaryCurrent(self):
+        """Assert that the summary matches the user's recipes"""
+        summary = RecipeSummary.objects.get(user=self.user)
+        self.assertFalse(summary.stale)
+        for name, value in recipe_aggregates(self.user).items():
+            self.assertEqual(getattr(summary, name), value, name)
+
+    def test_summary_created_over_threshold(self):
+        """Test that a summary is only kept for large accounts"""
+        self.assertSummaryCurrent()
+
+        other = get_user_model().objects.create_user(
+            'other@gmail.com', 'Testpass123'
+        )
+        sample_recipe(other)
+        get_summary_values(other)
+        self.assertFalse(RecipeSummary.objects.filter(user=other).exists())
+
+    def test_recipe_written_while_summary_starts(self):
+        """Test that a recipe saved during the first aggregate is counted"""
+        other = get_user_model().objects.create_user(
+            'other@gmail.com', 'Testpass123'
+        )
+        for _ in range(3):
+            sample_recipe(other)
+
+        def aggregate_then_write(user):
+            values = recipe_aggregates(user)
+            if not Recipe.objects.filter(user=user, title='Late').exists():
+                sample_recipe(user, title='Late')
+            return values
+
+        with patch.object(stats, 'recipe_aggregates', aggregate_then_write):
+            get_summary_values(other)
+
+        summary = RecipeSummary.objects.get(user=other)
+        self.assertFalse(summary.stale)
+        self.assertEqual(summary.recipe_count, 4)
+
+    def test_summary_read_without_aggregating(self):
+        """Test that stats of a summarized account skip the aggregate"""
+        with self.assertNumQueries(1):
+            values = get_summary_values(self.user)
+
+        self.assertEqual(values['recipe_count'], 4)
+
+    def test_create_updates_summary(self):
+        """Test that creating recipes adds to the totals and extremes"""
+        self.client.post(RECIPE_URL, {
+            'title': 'Cheap', 'time_minutes': 5, 'price': '1.00'
+        })
+        sample_recipe(self.user, price=Decimal('12.00'), time_minutes=90)
+
+        self.assertSummaryCurrent()
+
+    def test_update_updates_summary(self):
+        """Test that changing a price moves the totals"""
+        self.client.patch(
+            detail_url(self.recipes[1].id), {'price': '6.50'}
+        )
+
+        self.assertSummaryCurrent()
+
+    def test_deleting_extreme_marks_stale(self):
+        """Test that removing the cheapest recipe rebuilds the summary"""
+        self.client.delete(detail_url(self.recipes[0].id))
+
+        self.assertTrue(RecipeSummary.objects.get(user=self.user).stale)
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.data['price']['min'], '5.00')
+        self.assertSummaryCurrent()
+
+    def test_deleting_middle_keeps_summary(self):
+        """Test that removing neither extreme only subtracts"""
+        self.recipes[1].delete()
+
+        self.assertSummaryCurrent()
+
+    def test_dropping_below_threshold_removes_summary(self):
+        """Test that the summary goes once the account is small again"""
+        self.recipes[1].delete()
+        self.recipes[2].delete()
+        get_summary_values(self.user)
+
+        self.assertFalse(
+            RecipeSummary.objects.filter(user=self.user).exists()
+        )
+
+    def test_bulk_writes_update_summary(self):
+        """Test that bulk create, update and delete keep totals current"""
+        res = self.client.post(BULK_URL, [
+            {'title': 'Soup', 'time_minutes': 15, 'price': '2.00',
+             'tags': [], 'ingredients': []},
+            {'title': 'Stew', 'time_minutes': 60, 'price': '11.00',
+             'tags': [], 'ingredients': []},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertSummaryCurrent()
+
+        res = self.client.patch(BULK_URL, [
+            {'id': self.recipes[1].id, 'time_minutes': 25},
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertSummaryCurrent()
+
+        res = self.client.delete(
+            BULK_URL, {'ids': [self.recipes[1].id]}, format='json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertSummaryCurrent()
+
+    def test_import_updates_summary(self):
+        """Test that imported recipes are added to the totals"""
+        RecipeImporter(self.user).import_records([
+            clean_record({'title': 'Pie', 'time_minutes': 45, 'price': 9}),
+            clean_record({'title': 'Tea', 'time_minutes': 3, 'price': 1}),
+        ])
+
+        self.assertSummaryCurrent()
+
+
+@override_settings(RECIPE_STATS_SUMMARY_THRESHOLD=3)
+class ConcurrentSummaryTests(TransactionTestCase):
+    """Test summary changes committed alongside a refresh of the totals"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Testpass123'
+        )
+        for _ in range(3):
+            sample_recipe(self.user)
+        get_summary_values(self.user)
+
+    def test_write_outside_transaction_marks_stale(self):
+        """Test that a write committed on its own has the totals rebuilt"""
+        sample_recipe(self.user)
+
+        self.assertTrue(RecipeSummary.objects.get(user=self.user).stale)
+        self.assertEqual(get_summary_values(self.user)['recipe_count'], 4)
+
+    @skipUnless(connection.vendor == 'postgresql', 'Row locks need Postgres')
+    def test_refresh_during_write_counts_recipe_once(self):
+        """Test that a refresh waits for a write and its change to commit"""
+        RecipeSummary.objects.filter(user=self.user).update(stale=True)
+
+        def refresh():
+            try:
+                get_summary_values(self.user)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=refresh)
+        with summary_write(self.user.id):
+            sample_recipe(self.user)
+            thread.start()
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+
+        summary = RecipeSummary.objects.get(user=self.user)
+        self.assertFalse(summary.stale)
+        self.assertEqual(summary.recipe_count, 4)
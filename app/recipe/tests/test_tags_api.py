@@ -5,7 +5,7 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Tag, Recipe
 
 from recipe.serializers import TagSerializer
 
@@ -49,7 +49,7 @@ class PrivateTagsAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_retrive_tags_for_authenticated_user(self):
         """Test retrieve tags pertaining to authenticated user"""
@@ -60,8 +60,21 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+
+    def test_retrieve_tags_paginated(self):
+        """Test that tags are paginated by name using a cursor"""
+        for name in ['Breakfast', 'Dinner', 'Lunch']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        names = [tag['name'] for tag in res.data['results']]
+        res = self.client.get(res.data['next'])
+        names.extend(tag['name'] for tag in res.data['results'])
+
+        self.assertEqual(names, ['Lunch', 'Dinner', 'Breakfast'])
+        self.assertIsNone(res.data['next'])
 
     def test_create_tag(self):
         """Test create tag successful"""
@@ -81,3 +94,73 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.post(TAGS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_tags_assigned_only(self):
+        """Test filtering tags by those assigned to recipes"""
+        assigned = Tag.objects.create(user=self.user, name='Assigned')
+        Tag.objects.create(user=self.user, name='Unassigned')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Porridge',
+            time_minutes=5,
+            price=2.00
+        )
+        recipe.tags.add(assigned)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in res.data['results']],
+            [assigned.name]
+        )
+
+    def test_create_duplicate_tag_ignoring_case(self):
+        """Test that a tag name can't be reused with different case"""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_create_tag_name_used_by_other_user(self):
+        """Test that tag names are only unique per user"""
+        Tag.objects.create(user=test_user('other@gmail.com'), name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_upsert_tags(self):
+        """Test that upserting names returns ids and creates missing tags"""
+        existing = Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=test_user('other@gmail.com'), name='Dessert')
+        url = f'{TAGS_URL}?upsert=true'
+
+        res = self.client.post(
+            url, {'names': ['Dessert', 'VEGAN', 'dessert']}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        dessert = Tag.objects.get(user=self.user, name='Dessert')
+        self.assertEqual(res.data['results'], [
+            {'id': dessert.id, 'name': 'Dessert'},
+            {'id': existing.id, 'name': 'Vegan'},
+        ])
+
+        again = self.client.post(url, {'names': ['dessert']}, format='json')
+
+        self.assertEqual(
+            again.data['results'], [{'id': dessert.id, 'name': 'Dessert'}]
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_upsert_tags_invalid(self):
+        """Test that an empty batch of names is rejected"""
+        res = self.client.post(
+            f'{TAGS_URL}?upsert=true', {'names': []}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
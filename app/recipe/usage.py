@@ -0,0 +1,164 @@
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Recipe
+from recipe.representations import RELATION_FIELDS
+
+_pending = threading.local()
+
+
+def relation_parts(field_name):
+    """Return the through model, target model and target column name"""
+    field = Recipe._meta.get_field(field_name)
+    return (
+        field.remote_field.through,
+        field.related_model,
+        field.m2m_reverse_field_name() + '_id',
+    )
+
+
+def change_recipe_counts(model, deltas):
+    """
+    Add deltas, a map of id to change, to the recipe_count of model rows.
+
+    Rows with the same change share one UPDATE. The counters only move
+    with F() expressions, so concurrent writers never lose an update.
+    """
+    ids_by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            ids_by_delta[delta].append(pk)
+
+    for delta, ids in sorted(ids_by_delta.items()):
+        model.objects.filter(id__in=sorted(ids)).update(
+            recipe_count=F('recipe_count') + delta
+        )
+
+
+def count_relations(field_name, recipe_ids):
+    """Return how many of the recipes use each tag or ingredient"""
+    through, _, target = relation_parts(field_name)
+    rows = through.objects.filter(recipe_id__in=recipe_ids).values(
+        target
+    ).annotate(
+        recipes=Count('recipe_id')
+    ).order_by().values_list(target, 'recipes')
+
+    return dict(rows)
+
+
+def uncount_linked(field_name, recipe_id, target_ids=None):
+    """Decrement the tags or ingredients a recipe is linked to"""
+    through, model, target = relation_parts(field_name)
+    links = through.objects.filter(recipe_id=recipe_id)
+    if target_ids is not None:
+        links = links.filter(**{f'{target}__in': target_ids})
+
+    model.objects.filter(id__in=links.values(target)).update(
+        recipe_count=F('recipe_count') - 1
+    )
+
+
+def record_m2m_change(field_name, instance, action, reverse, pk_set):
+    """
+    Apply an m2m_changed signal of a recipe relation to the counters.
+
+    Removals are counted before the rows go, as pk_set may hold targets
+    that are not linked.
+    """
+    through, model, target = relation_parts(field_name)
+    if not reverse:
+        if action == 'post_add' and pk_set:
+            model.objects.filter(id__in=pk_set).update(
+                recipe_count=F('recipe_count') + 1
+            )
+        elif action == 'pre_remove' and pk_set:
+            uncount_linked(field_name, instance.pk, pk_set)
+        elif action == 'pre_clear':
+            uncount_linked(field_name, instance.pk)
+        return
+
+    # From the tag or ingredient side pk_set holds recipe ids
+    counter = model.objects.filter(pk=instance.pk)
+    if action == 'post_add' and pk_set:
+        counter.update(recipe_count=F('recipe_count') + len(pk_set))
+    elif action == 'pre_remove' and pk_set:
+        linked = through.objects.filter(
+            recipe_id__in=pk_set, **{target: instance.pk}
+        ).count()
+        if linked:
+            counter.update(recipe_count=F('recipe_count') - linked)
+    elif action == 'pre_clear':
+        counter.update(recipe_count=0)
+
+
+def record_added_relations(field_name, target_ids):
+    """Count through rows written without m2m_changed signals"""
+    _, model, _ = relation_parts(field_name)
+    change_recipe_counts(model, Counter(target_ids))
+
+
+def record_removed_relations(field_name, recipe_ids):
+    """Uncount the relations of recipes about to lose them in bulk"""
+    _, model, _ = relation_parts(field_name)
+    change_recipe_counts(model, {
+        pk: -count
+        for pk, count in count_relations(field_name, recipe_ids).items()
+    })
+
+
+def deleting_recipes_individually():
+    """Return False inside bulk_deleted_recipes(), which counts for them"""
+    return not getattr(_pending, 'bulk_delete', False)
+
+
+@contextmanager
+def bulk_deleted_recipes(recipes):
+    """
+    Uncount the relations of recipes deleted in the block in one pass.
+
+    Deleting a recipe otherwise decrements its tags and ingredients from
+    a pre_delete signal, two UPDATEs per recipe. The counts are taken
+    before the block, as the through rows go with the recipes.
+    """
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    removed = {
+        name: count_relations(name, recipe_ids) for name in RELATION_FIELDS
+    }
+    previous = getattr(_pending, 'bulk_delete', False)
+    _pending.bulk_delete = True
+    try:
+        yield
+    finally:
+        _pending.bulk_delete = previous
+
+    for name, counts in removed.items():
+        _, model, _ = relation_parts(name)
+        change_recipe_counts(
+            model, {pk: -count for pk, count in counts.items()}
+        )
+
+
+def recount_recipe_counts(queryset):
+    """
+    Set the recipe_count of the queryset's tags or ingredients from the
+    through table and return the number of rows updated.
+
+    The count is a subquery of the UPDATE, so a relation added by a
+    concurrent transaction is either counted here or added after it.
+    """
+    field_name = next(
+        name for name in RELATION_FIELDS
+        if Recipe._meta.get_field(name).related_model is queryset.model
+    )
+    through, _, target = relation_parts(field_name)
+    counts = through.objects.filter(**{target: OuterRef('pk')}).order_by(
+    ).values(target).annotate(recipes=Count('recipe_id')).values('recipes')
+
+    return queryset.update(recipe_count=Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0
+    ))
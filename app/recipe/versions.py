@@ -0,0 +1,68 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import CollectionVersion
+
+RECIPES = 'recipes'
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+
+_pending = threading.local()
+
+
+def create_collection_versions(user):
+    """Create the version rows of every collection of a new user"""
+    CollectionVersion.objects.bulk_create([
+        CollectionVersion(user=user, collection=collection)
+        for collection in (RECIPES, TAGS, INGREDIENTS)
+    ], ignore_conflicts=True)
+
+
+def get_collection_version(user, collection):
+    """Return the version row of a user's collection, creating it"""
+    version, _ = CollectionVersion.objects.get_or_create(
+        user=user,
+        collection=collection
+    )
+
+    return version
+
+
+def bump_collection_versions(user_id, *collections):
+    """
+    Increment the version of the given collections of a user.
+
+    Only existing rows are bumped. Rows are created with the user, or for
+    older accounts the first time a version is read, so a collection
+    without a row has never handed out a validator that could go stale.
+    Inside deferred_version_bumps() the bumps are collected and applied
+    once when the block exits.
+    """
+    pending = getattr(_pending, 'bumps', None)
+    if pending is not None:
+        pending.setdefault(user_id, set()).update(collections)
+        return
+
+    CollectionVersion.objects.filter(
+        user_id=user_id,
+        collection__in=collections
+    ).update(version=F('version') + 1, updated_at=timezone.now())
+
+
+@contextmanager
+def deferred_version_bumps():
+    """Apply the version bumps made inside the block once, at its end"""
+    if getattr(_pending, 'bumps', None) is not None:
+        yield
+        return
+
+    _pending.bumps = {}
+    try:
+        yield
+    finally:
+        bumps, _pending.bumps = _pending.bumps, None
+        for user_id, collections in bumps.items():
+            bump_collection_versions(user_id, *collections)
@@ -1,49 +1,226 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
+from core.authentication import CachedTokenAuthentication
 from core.models import Tag, Ingredient, Recipe
+from core.throttling import WriteRateThrottle
 from recipe import serializers
+from recipe.attributes import upsert_names
+from recipe.export import export_json, export_ndjson
+from recipe.filters import filter_assigned, filter_recipes, parse_names
+from recipe.renderers import NDJSONRenderer
+from recipe.mixins import CachedResponseMixin, FastReadMixin
+from recipe.representations import recipe_rows, represent_attributes, \
+    represent_recipes, RECIPE_COLUMNS, RECIPE_FIELDS, RELATION_FIELDS
+from recipe.search import search_recipes
+from recipe.stats import deferred_summary_updates, get_recipe_stats, \
+    summary_write
+from recipe.usage import bulk_deleted_recipes
+from recipe.pagination import RecipeAttributeCursorPagination, \
+    RecipeCursorPagination
+from recipe.versions import deferred_version_bumps, RECIPES, TAGS, \
+    INGREDIENTS
 
 
-class BaseRecipeAttributeViewset(viewsets.GenericViewSet,
+def relation_prefetches(names=RELATION_FIELDS, expand=()):
+    """Return prefetches of the recipe relations ordered by id"""
+    models = {'ingredients': Ingredient, 'tags': Tag}
+    return [
+        Prefetch(name, queryset=models[name].objects.only(
+            *(('id', 'name') if name in expand else ('id',))
+        ).order_by('id'))
+        for name in names
+    ]
+
+
+class BaseRecipeAttributeViewset(CachedResponseMixin,
+                                 FastReadMixin,
+                                 viewsets.GenericViewSet,
                                  mixins.ListModelMixin,
                                  mixins.CreateModelMixin):
     """Viewset to manage recipe attributes"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeAttributeCursorPagination
+    query_budgets = {'list': 2, 'create': 5}
+    # Values of ?ordering=, popular ones first use the recipe_count index
+    orderings = {
+        'name': ('-name', '-id'),
+        'popular': ('-recipe_count', '-id'),
+    }
 
     def get_queryset(self):
         """Return objects for authenticated user"""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        queryset = self.queryset.filter(user=self.request.user)
+
+        assigned_only = self.request.query_params.get('assigned_only', '')
+        if assigned_only.lower() in ('1', 'true'):
+            queryset = filter_assigned(queryset, self.recipe_field)
+
+        return queryset.order_by(*self.get_ordering())
+
+    def get_ordering(self):
+        """Return the ordering chosen with ?ordering=, by name by default"""
+        name = self.request.query_params.get('ordering') or 'name'
+        if name not in self.orderings:
+            raise ValidationError({
+                'ordering': f'Expected one of: {", ".join(self.orderings)}.'
+            })
+
+        return self.orderings[name]
+
+    def get_rows(self, queryset):
+        """Return the id and name columns, plus the cursor position"""
+        return queryset.values('id', 'name', 'recipe_count')
+
+    def represent_rows(self, rows):
+        """Return the serialized form of the object rows"""
+        return represent_attributes(rows)
+
+    def create(self, request, *args, **kwargs):
+        """Create one object, or upsert a batch of names with ?upsert=true"""
+        if request.query_params.get('upsert', '').lower() in ('1', 'true'):
+            return self.upsert(request)
+
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """Create object for authenticated user"""
-        serializer.save(user=self.request.user)
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user)
+        except IntegrityError:
+            # Another request created the same name since validation
+            raise ValidationError(
+                {'name': [serializer.duplicate_name_message()]}
+            )
+
+    def upsert(self, request):
+        """Return the ids of a batch of names, creating missing objects"""
+        serializer = serializers.RecipeAttributeUpsertSerializer(
+            data=request.data
+        )
+        serializer.is_valid(raise_exception=True)
+
+        objects = upsert_names(
+            self.queryset.model,
+            request.user,
+            serializer.validated_data['names'],
+            self.version_collection
+        )
+
+        return Response(
+            {'results': [{'id': pk, 'name': name} for pk, name in objects]},
+            status=status.HTTP_200_OK
+        )
 
 
 class TagsViewSet(BaseRecipeAttributeViewset):
     """Manage tags in the database"""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    recipe_field = 'tags'
+    version_collection = TAGS
 
 
 class IngredientViewSet(BaseRecipeAttributeViewset):
     """Manage ingredients in database"""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    recipe_field = 'ingredients'
+    version_collection = INGREDIENTS
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedResponseMixin, FastReadMixin,
+                    viewsets.ModelViewSet):
     """Manage recipes in database"""
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
+    version_collection = RECIPES
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+    throttle_classes = (WriteRateThrottle,)
+    throttle_scope = 'recipe_write'
+    # Reads narrowed by ?fields= and ?expand=, see get_fieldset
+    fieldset_actions = ('list', 'retrieve', 'search')
+    # Most queries an action may run, see core.testing.QueryBudgetMixin
+    query_budgets = {
+        'list': 4,
+        'retrieve': 4,
+        'search': 4,
+        'stats': 5,
+        'create': 22,
+        'partial_update': 9,
+        'destroy': 11,
+    }
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        """Return recipes for authenticated user with relations prefetched"""
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.action == 'list':
+            queryset = filter_recipes(queryset, self.request.query_params)
+
+        if self.action in self.fieldset_actions:
+            fields, expand = self.get_fieldset()
+            if fields is not None:
+                queryset = queryset.only(
+                    *[name for name in RECIPE_COLUMNS if name in fields]
+                )
+            relations = [
+                name for name in RELATION_FIELDS
+                if fields is None or name in fields
+            ]
+            return queryset.prefetch_related(
+                *relation_prefetches(relations, expand)
+            )
+
+        if self.action in ('bulk_create', 'bulk_update'):
+            return queryset.prefetch_related(*relation_prefetches())
+
+        return queryset
+
+    def get_fieldset(self):
+        """
+        Return the fields and the nested relations of a read.
+
+        ?fields= picks the fields sent, the id is always sent. ?expand=
+        names the relations sent as objects instead of ids, by default
+        none in lists and all in a single recipe.
+        """
+        params = self.request.query_params
+        fields = parse_names(params, 'fields', RECIPE_FIELDS)
+        if fields is not None:
+            fields = {'id', *fields}
+
+        expand = parse_names(params, 'expand', RELATION_FIELDS)
+        if expand is None:
+            expand = RELATION_FIELDS if self.action == 'retrieve' else ()
+            if fields is not None:
+                expand = [name for name in expand if name in fields]
+        elif fields is not None and not fields.issuperset(expand):
+            raise ValidationError(
+                {'expand': 'Expanded relations must be in fields.'}
+            )
+
+        return fields, set(expand)
+
+    def get_serializer_context(self):
+        """Pass the chosen fields and expansions to the serializers"""
+        context = super().get_serializer_context()
+        if self.action in self.fieldset_actions:
+            context['fields'], context['expand'] = self.get_fieldset()
+
+        return context
 
     def get_serializer_class(self):
         """Return appropriate serializer"""
@@ -52,6 +229,161 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return serializers.RecipeSerializer
 
+    def get_rows(self, queryset):
+        """Return the column values of the recipes"""
+        fields, _ = self.get_fieldset()
+        return recipe_rows(queryset, fields)
+
+    def represent_rows(self, rows):
+        """Return the serialized form of the recipe rows"""
+        fields, expand = self.get_fieldset()
+        return represent_recipes(rows, fields=fields, expand=expand)
+
     def perform_create(self, serializer):
         """Create a new recipe for authenticated user"""
-        serializer.save(user=self.request.user)
+        with summary_write(self.request.user.id):
+            serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        """Update a recipe along with the summary of its owner"""
+        with summary_write(self.request.user.id):
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """Delete a recipe along with its summary figures"""
+        with summary_write(self.request.user.id):
+            instance.delete()
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Return recipes matching the ?q= search text, best first"""
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This query parameter is required.'})
+
+        recipes = search_recipes(self.get_queryset(), text)
+        if self.use_fast_reads():
+            return Response({
+                'results': self.timed_represent(self.get_rows(recipes))
+            })
+
+        serializer = self.get_serializer(recipes, many=True)
+
+        return Response({'results': serializer.data})
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Return counts, price and time figures and most used names"""
+        # Recipe versions also move with tag and ingredient changes
+        return self.get_conditional_response(self.get_stats, request)
+
+    def get_stats(self, request):
+        """Return the stats response of authenticated user"""
+        return Response(get_recipe_stats(request.user))
+
+    @action(detail=False, methods=['get'],
+            renderer_classes=(JSONRenderer, NDJSONRenderer))
+    def export(self, request):
+        """Stream every recipe of authenticated user with relations nested"""
+        # The body queries the database as it is read; under ASGI it is read
+        # on the thread pool by app.asgi.StreamingASGIHandler.
+        recipes = self.get_queryset().order_by('id')
+        renderer = request.accepted_renderer
+
+        if renderer.format == 'ndjson':
+            content = export_ndjson(recipes)
+        else:
+            content = export_json(recipes)
+
+        response = StreamingHttpResponse(
+            content, content_type=renderer.media_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+        return response
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """Create a batch of recipes for authenticated user"""
+        serializer = self.get_bulk_serializer(data=request.data)
+
+        return self.save_bulk(
+            serializer, status.HTTP_201_CREATED, user=request.user
+        )
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """Partially update a batch of recipes identified by id"""
+        ids = []
+        if isinstance(request.data, list):
+            for item in request.data:
+                try:
+                    ids.append(int(item.get('id')))
+                except (AttributeError, TypeError, ValueError):
+                    continue
+
+        instances = self.queryset.filter(user=request.user, id__in=ids)
+        serializer = self.get_bulk_serializer(
+            instances, data=request.data, partial=True
+        )
+
+        return self.save_bulk(serializer, status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete the recipes of authenticated user with the given ids"""
+        serializer = serializers.RecipeBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        recipes = self.queryset.filter(
+            user=request.user,
+            id__in=serializer.validated_data['ids'],
+        )
+        # The relations are counted, deleted and uncounted in one
+        # transaction, so a failure cannot leave the counts behind
+        with summary_write(request.user.id), deferred_version_bumps(), \
+                deferred_summary_updates(), bulk_deleted_recipes(recipes):
+            deleted, _ = recipes.delete()
+
+        return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        """Return a list serializer, atomic when ?atomic=true is passed"""
+        context = self.get_serializer_context()
+        context['atomic'] = self.request.query_params.get(
+            'atomic', ''
+        ).lower() in ('1', 'true')
+
+        return serializers.RecipeSerializer(
+            *args, many=True, context=context, **kwargs
+        )
+
+    def save_bulk(self, serializer, success_status, **kwargs):
+        """Save valid items in one transaction and report failed ones"""
+        serializer.is_valid(raise_exception=True)
+        errors = serializer.item_errors
+
+        recipes = []
+        if serializer.validated_data:
+            with summary_write(self.request.user.id):
+                recipes = serializer.save(**kwargs)
+
+        saved = self.get_queryset().filter(id__in=[r.id for r in recipes])
+        data = {
+            item['id']: item
+            for item in serializers.RecipeSerializer(saved, many=True).data
+        }
+        results = [data[recipe.id] for recipe in recipes]
+
+        if errors and not results:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = success_status
+
+        return Response(
+            {'results': results, 'errors': errors},
+            status=response_status
+        )
@@ -4,8 +4,10 @@ from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 import re
 
+from core.profiling import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """serializer for the user object"""
 
     class Meta:
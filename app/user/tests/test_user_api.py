@@ -1,10 +1,17 @@
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.hashers import HashingUnavailable
+from core.testing import QueryBudgetMixin
+from user.views import CreateTokenView, CreateUserView, ManagerUserView
+
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ACCOUNT_URL = reverse('user:account')
@@ -14,7 +21,7 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-class PublicUserApiTest(TestCase):
+class PublicUserApiTest(QueryBudgetMixin, TestCase):
     """Create tests for public users."""
 
     def setUp(self):
@@ -27,7 +34,8 @@ class PublicUserApiTest(TestCase):
             'password': 'Testpass123',
             'name': 'Igor'
         }
-        res = self.client.post(CREATE_USER_URL, payload)
+        with self.assertWithinQueryBudget(CreateUserView, 'post'):
+            res = self.client.post(CREATE_USER_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         user = get_user_model().objects.get(**res.data)
@@ -69,7 +77,8 @@ class PublicUserApiTest(TestCase):
         """Test that a token was created for a valid user"""
         payload = {'email': 'test@gmail.com', 'password': 'testPass123'}
         create_user(**payload)
-        res = self.client.post(TOKEN_URL, payload)
+        with self.assertWithinQueryBudget(CreateTokenView, 'post'):
+            res = self.client.post(TOKEN_URL, payload)
 
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -101,6 +110,81 @@ class PublicUserApiTest(TestCase):
         self.assertNotIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    @override_settings(
+        PASSWORD_HASHERS=['core.hashers.PooledPBKDF2PasswordHasher'],
+        PASSWORD_HASH_ITERATIONS=1000
+    )
+    def test_token_login_busy_hashing(self):
+        """Test that logins are answered with 429 when hashing is saturated"""
+        create_user(email='test@gmail.com', password='Testpass123')
+        payload = {'email': 'test@gmail.com', 'password': 'Testpass123'}
+
+        with patch('core.hashers.HashingPool.run') as run:
+            run.side_effect = HashingUnavailable(wait=1)
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '1')
+        self.assertNotIn('token', res.data)
+
+    @override_settings(
+        PASSWORD_HASHERS=['core.hashers.PooledPBKDF2PasswordHasher'],
+        PASSWORD_HASH_ITERATIONS=1000
+    )
+    def test_create_user_busy_hashing(self):
+        """Test that sign ups are answered with 429 when hashing is busy"""
+        payload = {
+            'email': 'test@gmail.com',
+            'password': 'Testpass123',
+            'name': 'Test'
+        }
+
+        with patch('core.hashers.HashingPool.run') as run:
+            run.side_effect = HashingUnavailable(wait=1)
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(
+            get_user_model().objects.filter(email=payload['email']).exists()
+        )
+
+    @override_settings(THROTTLE_RATES={'login': '2/min'})
+    def test_token_login_throttled(self):
+        """Test that repeated logins from one address are rejected"""
+        cache.clear()
+        create_user(email='test@gmail.com', password='Testpass123')
+        payload = {'email': 'test@gmail.com', 'password': 'Wrongpass123'}
+
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.assertNumQueries(0):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+    @override_settings(THROTTLE_RATES={'register': '1/hour'})
+    def test_create_user_throttled(self):
+        """Test that sign ups past the rate are rejected"""
+        cache.clear()
+        payload = {
+            'email': 'test@gmail.com',
+            'password': 'Testpass123',
+            'name': 'Test'
+        }
+        res = self.client.post(CREATE_USER_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        payload['email'] = 'other@gmail.com'
+        res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(
+            get_user_model().objects.filter(email=payload['email']).exists()
+        )
+
     def test_retrieve_user_unauthorized(self):
         """Test that authentication is required for users"""
         res = self.client.get(ACCOUNT_URL)
@@ -108,7 +192,7 @@ class PublicUserApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateUserApiTests(TestCase):
+class PrivateUserApiTests(QueryBudgetMixin, TestCase):
     """Test for authenticated user"""
 
     def setUp(self):
@@ -122,7 +206,8 @@ class PrivateUserApiTests(TestCase):
 
     def test_retrieve_authenticated_user(self):
         """Test the GET endpoint on the user profile url"""
-        res = self.client.get(ACCOUNT_URL)
+        with self.assertWithinQueryBudget(ManagerUserView, 'get'):
+            res = self.client.get(ACCOUNT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, {
@@ -139,7 +224,8 @@ class PrivateUserApiTests(TestCase):
     def test_update_user_profile(self):
         """Test that we can update an authenticated user"""
         payload = {'name': 'New Name', 'password': 'newPass123'}
-        res = self.client.patch(ACCOUNT_URL, payload)
+        with self.assertWithinQueryBudget(ManagerUserView, 'patch'):
+            res = self.client.patch(ACCOUNT_URL, payload)
 
         self.user.refresh_from_db()
 
@@ -1,27 +1,40 @@
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.authentication import CachedTokenAuthentication
+from core.throttling import HashingUnavailableMixin, WriteRateThrottle
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(HashingUnavailableMixin, generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
+    throttle_classes = (WriteRateThrottle,)
+    throttle_scope = 'register'
+    query_budgets = {'post': 3}
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(HashingUnavailableMixin, ObtainAuthToken):
     """Create a token for authenticated user"""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (WriteRateThrottle,)
+    throttle_scope = 'login'
+    query_budgets = {'post': 5}
 
 
-class ManagerUserView(generics.RetrieveUpdateAPIView):
+class ManagerUserView(HashingUnavailableMixin,
+                      generics.RetrieveUpdateAPIView):
     """View to manage user profile"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    query_budgets = {'get': 1, 'patch': 5}
 
     def get_object(self):
         """Retrieve and return authenticated user"""
-        return self.request.user
+        # The cached user only holds its id and flags, load it whole once
+        # rather than a query per deferred column
+        return get_user_model().objects.get(pk=self.request.user.pk)
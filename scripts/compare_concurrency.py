@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Compare how WSGI and ASGI deployments cope with many concurrent clients.
+
+Runs the load_test.py client against both servers at increasing numbers
+of concurrent keep-alive connections and prints throughput, p99 latency
+and errors side by side. Start both deployments first, for example:
+
+    gunicorn app.wsgi --workers 1 --bind 127.0.0.1:8001
+    gunicorn app.asgi:application --workers 1 \
+        --worker-class uvicorn.workers.UvicornWorker --bind 127.0.0.1:8002
+
+    python scripts/compare_concurrency.py /api/recipe/recipes/ \
+        --wsgi http://127.0.0.1:8001 --asgi http://127.0.0.1:8002 \
+        --token <token>
+"""
+
+import argparse
+import threading
+import time
+
+from load_test import percentile, worker
+
+
+def run(url, headers, concurrency, duration):
+    """Load url with concurrency connections, return req/s, p99 and errors"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(url, headers, deadline, latencies, errors, lock)
+        )
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        percentile(latencies, 0.99) * 1000,
+        sum(errors)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', help='Path to request on both servers')
+    parser.add_argument('--wsgi', required=True, help='WSGI server base URL')
+    parser.add_argument('--asgi', required=True, help='ASGI server base URL')
+    parser.add_argument('--token', help='API token sent as Token auth')
+    parser.add_argument('--levels', type=int, nargs='+',
+                        default=[1, 8, 32, 128],
+                        help='Numbers of concurrent connections')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds per level and server')
+    args = parser.parse_args()
+
+    headers = {'Accept': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Token {args.token}'
+
+    print(f'{"clients":>8} {"wsgi req/s":>11} {"p99":>9} {"err":>5} '
+          f'{"asgi req/s":>11} {"p99":>9} {"err":>5}')
+    for concurrency in args.levels:
+        row = [f'{concurrency:>8}']
+        for base in (args.wsgi, args.asgi):
+            rate, p99, errors = run(
+                base.rstrip('/') + args.path, headers, concurrency,
+                args.duration
+            )
+            row.append(f'{rate:>11.1f} {p99:>7.1f}ms {errors:>5}')
+        print(' '.join(row))
+
+
+if __name__ == '__main__':
+    main()
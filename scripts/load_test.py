@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Closed loop HTTP load generator in the spirit of wrk.
+
+Each of --concurrency threads keeps one keep-alive connection open and
+sends GET requests back to back for --duration seconds. Throughput and
+latency percentiles are printed at the end, so runs against
+``manage.py runserver`` and gunicorn can be compared directly:
+
+    python scripts/load_test.py http://localhost:8000/api/recipe/recipes/ \
+        --token <token> --concurrency 16 --duration 30
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, fraction):
+    """Return the value below which fraction of sorted values fall"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def worker(url, headers, deadline, latencies, errors, lock):
+    """Send requests over one connection until the deadline"""
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    connection_class = (
+        http.client.HTTPSConnection if parts.scheme == 'https'
+        else http.client.HTTPConnection
+    )
+    connection = connection_class(parts.netloc, timeout=30)
+
+    local_latencies = []
+    local_errors = 0
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            continue
+        local_latencies.append(time.monotonic() - started)
+
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('url', help='URL to request')
+    parser.add_argument('--token', help='API token sent as Token auth')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds to run for')
+    args = parser.parse_args()
+
+    headers = {'Accept': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Token {args.token}'
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(args.url, headers, deadline, latencies, errors, lock)
+        )
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    print(f'{len(latencies)} requests in {elapsed:.1f}s, '
+          f'{sum(errors)} errors')
+    print(f'Requests/sec: {len(latencies) / elapsed:.1f}')
+    for label, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+        print(f'Latency {label}: '
+              f'{percentile(latencies, fraction) * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()